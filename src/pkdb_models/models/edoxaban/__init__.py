@@ -1,13 +1,32 @@
+import os
 from pathlib import Path
 
 EDOXABAN_PATH = Path(__file__).parent
 
 MODEL_BASE_PATH = EDOXABAN_PATH / "models" / "results" / "models"
 MODEL_PATH = MODEL_BASE_PATH / "edoxaban_body_flat.xml"
+MODEL_PATH_QSS = MODEL_BASE_PATH / "edoxaban_body_qss_flat.xml"
+MODEL_ODE_PATH = MODEL_BASE_PATH / "edoxaban_body_flat_ode.py"
 
 RESULTS_PATH = EDOXABAN_PATH / "results"
 RESULTS_PATH_SIMULATION = RESULTS_PATH / "simulation"
 RESULTS_PATH_FIT = RESULTS_PATH / "fit"
+RESULTS_PATH_REFERENCE = RESULTS_PATH / "reference"
+RESULTS_PATH_BENCHMARK = RESULTS_PATH / "benchmark"
+
+# caches are stored in the package, in the user cache directory for read-only
+# installations (e.g. site-packages) or in $EDOXABAN_CACHE_PATH
+if "EDOXABAN_CACHE_PATH" in os.environ:
+    CACHE_PATH = Path(os.environ["EDOXABAN_CACHE_PATH"])
+elif os.access(EDOXABAN_PATH, os.W_OK):
+    CACHE_PATH = EDOXABAN_PATH / "cache"
+else:
+    CACHE_PATH = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "edoxaban"
+CACHE_PATH_MODELS = CACHE_PATH / "models"
+CACHE_PATH_SIMULATIONS = CACHE_PATH / "simulations"
+CACHE_PATH_MMAP = CACHE_PATH / "mmap"
+CACHE_PATH_DATASETS = CACHE_PATH / "datasets"
+CACHE_PATH_RESIDUALS = CACHE_PATH / "residuals"
 
 # DATA_PATH_BASE = EDOXABAN_PATH.parents[3] / "pkdb_data" / "studies"
 DATA_PATH_BASE = EDOXABAN_PATH / "data"
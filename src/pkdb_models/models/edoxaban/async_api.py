@@ -0,0 +1,205 @@
+"""Asyncio API for simulations.
+
+Simulations run on a process pool with one preloaded model per worker, so
+that the event loop is never blocked by the simulation stack:
+
+    async with AsyncSimulator(n_workers=4) as simulator:
+        Q_ = simulator.Q_
+        df = await simulator.simulate(
+            changes={"PODOSE_edo": Q_(60, "mg")},
+            timecourse=Timecourse(start=0, end=24 * 60, steps=500),
+        )
+        async for k, df in simulator.simulate_many(
+            (({"PODOSE_edo": Q_(dose, "mg")}, tc) for dose in doses)
+        ):
+            ...
+
+The `default_changes()` of `EdoxabanSimulationExperiment` are applied
+before the given changes and the results contain the selections of the
+experiment tasks (`EdoxabanSimulationExperiment.selections`) in model units.
+
+At most `max_pending` simulations are submitted to the pool, further calls
+wait (back-pressure). Cancelled or timed out simulations which have not
+started are removed from the pool, running simulations finish in the worker
+and their results are discarded.
+"""
+import asyncio
+import copy
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+import pandas as pd
+from sbmlsim.simulation import Timecourse, TimecourseSim
+from sbmlsim.simulator.simulation_serial import SimulatorSerial
+from sbmlutils import log
+
+from pkdb_models.models.edoxaban import MODEL_PATH, model_cache
+from pkdb_models.models.edoxaban.backends import Backend, simulator_class
+from pkdb_models.models.edoxaban.experiments.base_experiment import EdoxabanSimulationExperiment
+from pkdb_models.models.edoxaban.parallel import _init_simulator_worker, _run_timecourses
+from pkdb_models.models.edoxaban.solver_profiles import SolverProfile, get_solver_settings
+
+logger = log.get_logger(__name__)
+
+
+class AsyncSimulator:
+    """Simulations on a pool of preloaded models for asyncio callers."""
+
+    def __init__(
+        self,
+        n_workers: int = 1,
+        backend: Backend = Backend.ROADRUNNER,
+        profile: SolverProfile = SolverProfile.PRODUCTION,
+        max_pending: Optional[int] = None,
+        timeout: Optional[float] = None,
+        model_path: Path = MODEL_PATH,
+    ):
+        """
+        :param max_pending: maximal number of simulations in the pool (default: 2 * n_workers)
+        :param timeout: default timeout of a simulation [s]
+        """
+        self.n_workers = n_workers
+        self.backend = backend
+        self.profile = profile
+        self.max_pending = max_pending or 2 * n_workers
+        self.timeout = timeout
+        self.model_path = model_path
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._simulator: Optional[SimulatorSerial] = None
+
+    async def __aenter__(self) -> "AsyncSimulator":
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.close()
+
+    async def start(self) -> None:
+        """Start the worker processes and load the models."""
+        loop = asyncio.get_running_loop()
+        model_cache.install()
+        worker_class = simulator_class(self.backend)
+        settings = get_solver_settings(self.profile)
+
+        # units of the model for the normalization of the changes
+        self._simulator = await loop.run_in_executor(
+            None, lambda: worker_class(model=self.model_path, **settings)
+        )
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.n_workers,
+            initializer=_init_simulator_worker,
+            initargs=(worker_class, self.model_path, settings),
+        )
+        self._semaphore = asyncio.Semaphore(self.max_pending)
+
+        # preload the models in all workers
+        await asyncio.gather(*[
+            loop.run_in_executor(self._executor, _run_timecourses, None, [])
+            for _ in range(self.n_workers)
+        ])
+        logger.info(f"{self.n_workers} workers started ({self.backend.value}, {self.profile.value})")
+
+    async def close(self) -> None:
+        """Stop the worker processes, pending simulations are cancelled."""
+        if self._executor is not None:
+            executor = self._executor
+            self._executor = None
+            await asyncio.get_running_loop().run_in_executor(
+                None, lambda: executor.shutdown(wait=True, cancel_futures=True)
+            )
+
+    @property
+    def Q_(self):
+        """Quantity of the unit registry of the model."""
+        return self._simulator.uinfo.ureg.Quantity
+
+    def units(self, sid: str) -> str:
+        """Units of a selection."""
+        return str(self._simulator.uinfo[sid])
+
+    def _timecourse_sim(
+        self, changes: Dict, timecourse: Union[Timecourse, TimecourseSim]
+    ) -> TimecourseSim:
+        """Normalized simulation with the default changes applied."""
+        if isinstance(timecourse, Timecourse):
+            timecourse = TimecourseSim([timecourse])
+        # the timecourse of the caller is not modified
+        tcsim = copy.deepcopy(timecourse)
+        first = tcsim.timecourses[0]
+        first.changes = {
+            **EdoxabanSimulationExperiment._default_changes(Q_=self.Q_),
+            **first.changes,
+            **changes,
+        }
+        tcsim.normalize(uinfo=self._simulator.uinfo)
+        return tcsim
+
+    async def simulate(
+        self,
+        changes: Dict,
+        timecourse: Union[Timecourse, TimecourseSim],
+        selections: Optional[List[str]] = None,
+        timeout: Optional[float] = None,
+    ) -> pd.DataFrame:
+        """Simulate timecourse with changes.
+
+        :param selections: default are the selections of the experiment tasks
+        :param timeout: timeout [s], default is the timeout of the simulator
+        :raises asyncio.TimeoutError: if the simulation exceeds the timeout
+        """
+        if self._executor is None:
+            raise RuntimeError("AsyncSimulator is not started.")
+        tcsim = self._timecourse_sim(changes, timecourse)
+        if selections is None:
+            selections = list(EdoxabanSimulationExperiment.selections)
+
+        async with self._semaphore:
+            future = asyncio.get_running_loop().run_in_executor(
+                self._executor, _run_timecourses, selections, [tcsim]
+            )
+            dfs = await asyncio.wait_for(
+                future, timeout=timeout if timeout is not None else self.timeout
+            )
+        return dfs[0]
+
+    async def simulate_many(
+        self,
+        items: Iterable[Tuple[Dict, Union[Timecourse, TimecourseSim]]],
+        selections: Optional[List[str]] = None,
+        timeout: Optional[float] = None,
+    ) -> AsyncIterator[Tuple[int, pd.DataFrame]]:
+        """Simulate (changes, timecourse) items, yields (index, result) as completed.
+
+        Items are consumed lazily, at most `max_pending` simulations are in
+        flight. Closing the iterator cancels the pending simulations.
+        """
+
+        async def run(k: int, changes: Dict, timecourse) -> Tuple[int, pd.DataFrame]:
+            return k, await self.simulate(
+                changes, timecourse, selections=selections, timeout=timeout
+            )
+
+        pending: Set[asyncio.Task] = set()
+        try:
+            for k, (changes, timecourse) in enumerate(items):
+                if len(pending) >= self.max_pending:
+                    done, pending = await asyncio.wait(
+                        pending, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    for task in done:
+                        yield task.result()
+                pending.add(asyncio.ensure_future(run(k, changes, timecourse)))
+
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
@@ -0,0 +1,20 @@
+"""Simulation backends for the edoxaban model."""
+from typing import Type
+
+from sbmlsim.simulator.simulation_serial import SimulatorSerial
+
+from pkdb_models.models.edoxaban.batch import SimulatorBatch
+from pkdb_models.models.edoxaban.linear import SimulatorLinear
+from pkdb_models.models.edoxaban.options import Backend
+
+
+def simulator_class(backend: Backend) -> Type[SimulatorSerial]:
+    """Simulator class for given backend."""
+    if not isinstance(backend, Backend):
+        raise ValueError(f"Unsupported backend: '{backend}'")
+
+    if backend == Backend.LINEAR:
+        return SimulatorLinear
+    if backend == Backend.BATCH:
+        return SimulatorBatch
+    return SimulatorSerial
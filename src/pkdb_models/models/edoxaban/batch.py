@@ -0,0 +1,162 @@
+"""Batched simulation of scans.
+
+The points of a `ScanSim` are by default integrated one after the other.
+The batched simulator stacks all points of a scan into one state array of
+shape (points, states) and advances them together on the output grid with
+the exact propagators of the linear system (see `linear`)
+
+    X[k + 1, p] = Phi_p X[k, p] + gamma_p
+
+so that every time step is a single vectorized operation over the batch
+axis. The coagulation effects are evaluated vectorized from the venous
+edoxaban concentration.
+
+Points with identical parameters (e.g. dose scans) share system and
+propagator, the wall time of such scans is nearly independent of the number
+of points. Every distinct parameter set (e.g. body weight or clearance
+scans) requires its own extraction of the linear system (n + 1 evaluations
+of the rates of change for n states) and matrix exponential, so these scans
+scale linearly with the number of points.
+
+Scans which cannot be batched (different time grids, no reset, model
+changes, nonlinear systems) are simulated point by point. The results are
+identical in layout to the serial simulator.
+"""
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sbmlsim.simulation import TimecourseSim
+from sbmlutils import log
+
+from pkdb_models.models.edoxaban.instrumentation import Stage, timed
+from pkdb_models.models.edoxaban.linear import LinearSystem, SimulatorLinear
+from pkdb_models.models.edoxaban.regimen import (
+    coagulation_effects,
+    coagulation_outputs,
+)
+
+logger = log.get_logger(__name__)
+
+
+def _grid(simulation: TimecourseSim) -> Tuple:
+    """Time grid of the simulation, batched simulations share the grid."""
+    return (
+        simulation.reset,
+        simulation.time_offset,
+        tuple((tc.start, tc.end, tc.steps, tc.discard) for tc in simulation.timecourses),
+    )
+
+
+def advance(
+    systems: List[LinearSystem], X: np.ndarray, times: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Advance the batch of states X (points, states) on the time grid.
+
+    :return: outputs (times, points, outputs) and final states (points, states)
+    """
+    C = np.stack([s.C for s in systems])
+    d = np.stack([s.d for s in systems])
+    Y = np.empty(shape=(len(times), X.shape[0], C.shape[1]))
+    Y[0] = np.matmul(C, X[..., np.newaxis])[..., 0] + d
+    if len(times) > 1:
+        dt = float(times[1] - times[0])
+        Phi = np.stack([s.propagator(dt)[0] for s in systems])
+        gamma = np.stack([s.propagator(dt)[1] for s in systems])
+        for k in range(1, len(times)):
+            X = np.matmul(Phi, X[..., np.newaxis])[..., 0] + gamma
+            Y[k] = np.matmul(C, X[..., np.newaxis])[..., 0] + d
+    return Y, X
+
+
+class SimulatorBatch(SimulatorLinear):
+    """Simulator advancing all timecourses of a scan together."""
+
+    def batchable(self, simulations: List[TimecourseSim]) -> bool:
+        """Simulations can be batched (shared grid, reset, no model changes)."""
+        grid = _grid(simulations[0])
+        return all(
+            sim.reset
+            and _grid(sim) == grid
+            and not any(tc.model_changes for tc in sim.timecourses)
+            for sim in simulations
+        )
+
+    def _apply_changes(self, changes: Dict) -> None:
+        for key, value in changes.items():
+            self.r[key] = float(getattr(value, "magnitude", value))
+
+    @timed(Stage.SIMULATION)
+    def _timecourses(self, simulations: List[TimecourseSim]) -> List[pd.DataFrame]:
+        if len(simulations) <= 1 or not self.batchable(simulations):
+            return super()._timecourses(simulations)
+
+        dfs = self._batch(simulations)
+        if dfs is None:
+            logger.info("Scan can not be batched, simulating points one by one.")
+            return super()._timecourses(simulations)
+        return dfs
+
+    def _batch(self, simulations: List[TimecourseSim]) -> Optional[List[pd.DataFrame]]:
+        """Batched simulation, returns None if the scan can not be batched."""
+        selections = list(self.r.timeCourseSelections)
+        # venous edoxaban is required for the coagulation effects
+        selections_batch = selections + (
+            ["[Cve_edo]"] if "[Cve_edo]" not in selections else []
+        )
+        k_cve = selections_batch.index("[Cve_edo]")
+        effects_model = coagulation_effects(self.r.getSBML())
+
+        n_points = len(simulations)
+        X: Optional[np.ndarray] = None
+        frames: List[List[pd.DataFrame]] = [[] for _ in range(n_points)]
+        t_offset = simulations[0].time_offset
+        for k_tc, tc in enumerate(simulations[0].timecourses):
+            systems: List[LinearSystem] = []
+            x0s: List[np.ndarray] = []
+            parameters: Dict[str, List[float]] = {
+                pid: [] for pid in effects_model.parameters
+            }
+            for p, sim in enumerate(simulations):
+                # restore state of the point before the segment
+                self.r.resetToOrigin()
+                for tc_previous in sim.timecourses[:k_tc]:
+                    self._apply_changes(tc_previous.changes)
+                if X is not None:
+                    self._set_state(X[p])
+                    self.r.model.setTime(tc.start)
+                self._apply_changes(sim.timecourses[k_tc].changes)
+
+                system = self.linear_system(selections_batch)
+                if system is None:
+                    return None
+                nonlinear = {selections_batch[j] for j in system.nonlinear_outputs}
+                if not nonlinear.issubset(coagulation_outputs):
+                    return None
+                systems.append(system)
+                x0s.append(self._get_state())
+                for pid in effects_model.parameters:
+                    parameters[pid].append(self.r.getValue(pid))
+
+            times = np.linspace(tc.start, tc.end, num=tc.steps + 1)
+            Y, X = advance(systems, X=np.array(x0s), times=times)
+
+            effects = effects_model(
+                cve_edo=Y[:, :, k_cve],
+                parameters={pid: np.array(v) for pid, v in parameters.items()},
+            )
+            for j, sid in enumerate(selections):
+                if sid in effects:
+                    Y[:, :, j] = effects[sid]
+
+            if not tc.discard:
+                for p in range(n_points):
+                    df = pd.DataFrame(Y[:, p, : len(selections)], columns=selections)
+                    if "time" in df.columns:
+                        df["time"] = times + t_offset
+                    frames[p].append(df)
+                t_offset += tc.end
+
+        # final state of the last point in the model
+        self._set_state(X[-1])
+        return [pd.concat(point_frames, sort=False) for point_frames in frames]
@@ -0,0 +1,318 @@
+"""Benchmark suite of the model pipeline.
+
+Times the hot paths of the pipeline:
+
+* load/compile of the model (`edoxaban_body_flat.xml`),
+* a single 24 h timecourse,
+* every study in `EXPERIMENTS["studies"]`,
+* the parameter scan and dose dependency experiments,
+* one cost evaluation for every `FitExperimentSubset`,
+* PK/PD calculation (`calculate_edoxaban_pk`/`calculate_edoxaban_pd`),
+* figure rendering.
+
+Results are compared against a stored baseline; benchmarks which are slower
+than the baseline by more than the threshold are reported as regressions.
+The benchmarks run offline, figures are rendered with the `Agg` backend.
+
+Usage:
+
+    run_edoxaban --action benchmark_baseline
+    run_edoxaban --action benchmark
+"""
+import io
+import json
+import platform
+import statistics
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Type
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import numpy as np
+import pandas as pd
+import roadrunner
+from matplotlib import pyplot as plt
+from sbmlsim.experiment import SimulationExperiment
+from sbmlsim.simulation import Timecourse, TimecourseSim
+from sbmlsim.simulator.simulation_serial import SimulatorSerial
+from sbmlutils import log
+from sbmlutils.console import console
+
+from pkdb_models.models.edoxaban import MODEL_PATH, RESULTS_PATH_BENCHMARK
+from pkdb_models.models.edoxaban import model_cache
+from pkdb_models.models.edoxaban.experiments.base_experiment import (
+    EdoxabanSimulationExperiment,
+)
+from pkdb_models.models.edoxaban.experiments.misc import DoseDependencyExperiment
+from pkdb_models.models.edoxaban.experiments.scans.scan_parameters import (
+    EdoxabanParameterScan,
+)
+from pkdb_models.models.edoxaban.solver_profiles import (
+    SolverProfile,
+    get_solver_settings,
+    run_experiment,
+)
+
+logger = log.get_logger(__name__)
+
+BASELINE_PATH = RESULTS_PATH_BENCHMARK / "baseline.json"
+
+
+@dataclass
+class Benchmark:
+    """Benchmark of a single step of the pipeline.
+
+    `setup` is not timed and returns the function which is timed.
+    """
+
+    name: str
+    setup: Callable[[], Callable[[], Any]]
+    repeat: int = 3
+
+
+def _package_version(package: str) -> str:
+    try:
+        return version(package)
+    except PackageNotFoundError:
+        return "unknown"
+
+
+@lru_cache(maxsize=None)
+def _simulated_experiment(experiment_class: Type[SimulationExperiment]) -> SimulationExperiment:
+    """Experiment with simulation results (shared between benchmarks)."""
+    return run_experiment(experiment_class, profile=SolverProfile.REFERENCE)
+
+
+def _setup_model_load() -> Callable[[], Any]:
+    return lambda: roadrunner.RoadRunner(str(MODEL_PATH))
+
+
+def _setup_model_load_cached() -> Callable[[], Any]:
+    model_cache.load_roadrunner(MODEL_PATH)
+    return lambda: model_cache.load_roadrunner(MODEL_PATH)
+
+
+def _setup_timecourse() -> Callable[[], Any]:
+    simulator = SimulatorSerial(
+        model=MODEL_PATH, **get_solver_settings(SolverProfile.REFERENCE)
+    )
+    Q_ = simulator.uinfo.ureg.Quantity
+    tcsim = TimecourseSim(
+        Timecourse(
+            start=0,
+            end=24 * 60,  # [min]
+            steps=1000,
+            changes={
+                **EdoxabanSimulationExperiment._default_changes(Q_),
+                "PODOSE_edo": Q_(60, "mg"),
+            },
+        )
+    )
+    tcsim.normalize(uinfo=simulator.uinfo)
+
+    return lambda: simulator._timecourses([tcsim])
+
+
+def _setup_experiment(experiment_class: Type[SimulationExperiment]):
+    def setup() -> Callable[[], Any]:
+        return lambda: run_experiment(experiment_class, profile=SolverProfile.REFERENCE)
+    return setup
+
+
+def _setup_fit_cost(fit_subset) -> Callable[[], Callable[[], Any]]:
+    def setup() -> Callable[[], Any]:
+        from pkdb_models.models.edoxaban.fitting.fitting import (
+            create_optimization_problem,
+            fit_kwargs,
+            get_fit_experiments,
+            get_fit_parameters,
+        )
+
+        model_cache.install()
+        parameters = get_fit_parameters(fit_subset=fit_subset)
+        op = create_optimization_problem(
+            fit_experiments=get_fit_experiments(fit_subset=fit_subset),
+            opid=f"benchmark_{fit_subset.value}",
+            parameters=parameters,
+        )
+        op.initialize(**fit_kwargs)
+        xlog = np.log10([p.start_value for p in parameters])
+        return lambda: op.residuals(xlog=xlog)
+    return setup
+
+
+def _setup_pk() -> Callable[[], Any]:
+    experiment = _simulated_experiment(EdoxabanParameterScan)
+    return lambda: experiment.calculate_edoxaban_pk()
+
+
+def _setup_pd() -> Callable[[], Any]:
+    experiment = _simulated_experiment(EdoxabanParameterScan)
+    return lambda: experiment.calculate_edoxaban_pd()
+
+
+def _setup_figures() -> Callable[[], Any]:
+    experiment = _simulated_experiment(EdoxabanParameterScan)
+
+    def render() -> None:
+        for fig in experiment.figures_mpl().values():
+            fig.savefig(io.BytesIO(), format="png")
+            plt.close(fig)
+
+    return render
+
+
+def benchmarks() -> List[Benchmark]:
+    """All benchmarks of the pipeline."""
+    from pkdb_models.models.edoxaban.fitting.fitting import FitExperimentSubset
+    from pkdb_models.models.edoxaban.simulations import EXPERIMENTS
+
+    items = [
+        Benchmark("model_load", setup=_setup_model_load),
+        Benchmark("model_load_cached", setup=_setup_model_load_cached),
+        Benchmark("timecourse_24h", setup=_setup_timecourse, repeat=10),
+    ]
+    for experiment_class in EXPERIMENTS["studies"] + [
+        EdoxabanParameterScan, DoseDependencyExperiment
+    ]:
+        items.append(
+            Benchmark(
+                f"experiment_{experiment_class.__name__}",
+                setup=_setup_experiment(experiment_class),
+                repeat=1,
+            )
+        )
+    for fit_subset in FitExperimentSubset:
+        items.append(
+            Benchmark(f"fit_cost_{fit_subset.value}", setup=_setup_fit_cost(fit_subset))
+        )
+    items.extend([
+        Benchmark("calculate_edoxaban_pk", setup=_setup_pk),
+        Benchmark("calculate_edoxaban_pd", setup=_setup_pd),
+        Benchmark("figures_mpl_EdoxabanParameterScan", setup=_setup_figures, repeat=1),
+    ])
+    return items
+
+
+def run_benchmarks(
+    names: Optional[List[str]] = None, repeat: Optional[int] = None
+) -> pd.DataFrame:
+    """Run benchmarks (all or selected by name).
+
+    :return: DataFrame with min/median/max wall time [s] per benchmark
+    """
+    rows = []
+    for benchmark in benchmarks():
+        if names and benchmark.name not in names:
+            continue
+        console.print(f"Benchmark: {benchmark.name}")
+        func = benchmark.setup()
+        durations = []
+        for _ in range(repeat or benchmark.repeat):
+            t_start = time.perf_counter()
+            func()
+            durations.append(time.perf_counter() - t_start)
+        rows.append({
+            "benchmark": benchmark.name,
+            "repeat": len(durations),
+            "min": min(durations),
+            "median": statistics.median(durations),
+            "max": max(durations),
+        })
+    return pd.DataFrame(rows)
+
+
+def _environment() -> Dict[str, str]:
+    """Environment of the benchmark run."""
+    return {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "python": platform.python_version(),
+        "roadrunner": roadrunner.__version__,
+        "sbmlsim": _package_version("sbmlsim"),
+        "sbmlutils": _package_version("sbmlutils"),
+    }
+
+
+def write_benchmarks(df: pd.DataFrame, path: Path) -> None:
+    """Write benchmark results with environment information as JSON."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f_json:
+        json.dump(
+            {"environment": _environment(), "benchmarks": df.to_dict(orient="records")},
+            f_json,
+            indent=2,
+        )
+
+
+def read_benchmarks(path: Path) -> pd.DataFrame:
+    """Read benchmark results."""
+    with open(path, "r") as f_json:
+        return pd.DataFrame(json.load(f_json)["benchmarks"])
+
+
+def create_baseline(baseline_path: Path = BASELINE_PATH) -> pd.DataFrame:
+    """Run all benchmarks and store the results as baseline."""
+    df = run_benchmarks()
+    write_benchmarks(df, path=baseline_path)
+    console.print(df.to_string(index=False))
+    console.print(f"Benchmark baseline stored: '{baseline_path}'")
+    return df
+
+
+def compare_baseline(
+    baseline_path: Path = BASELINE_PATH,
+    threshold: float = 0.2,
+    names: Optional[List[str]] = None,
+) -> pd.DataFrame:
+    """Run benchmarks and compare the median times against the baseline.
+
+    Benchmarks slower than the baseline by more than `threshold` (relative)
+    are reported as regressions.
+    """
+    if not baseline_path.exists():
+        raise IOError(
+            f"No benchmark baseline '{baseline_path}', "
+            f"create baseline with 'run_edoxaban --action benchmark_baseline'."
+        )
+    df = run_benchmarks(names=names)
+    write_benchmarks(
+        df,
+        path=RESULTS_PATH_BENCHMARK / f"benchmark_{datetime.now():%Y%m%d_%H%M%S}.json",
+    )
+
+    baseline = read_benchmarks(baseline_path)[["benchmark", "median"]]
+    df = df.merge(
+        baseline.rename(columns={"median": "baseline"}), on="benchmark", how="left"
+    )
+    df["ratio"] = df["median"] / df["baseline"]
+    df["status"] = np.where(
+        df["baseline"].isna(),
+        "new",
+        np.where(
+            df["ratio"] > 1 + threshold,
+            "slower",
+            np.where(df["ratio"] < 1 - threshold, "faster", "ok"),
+        ),
+    )
+
+    console.rule("Benchmarks vs baseline", style="white")
+    console.print(df.to_string(index=False))
+    regressions = df[df.status == "slower"]
+    if len(regressions):
+        console.print(
+            f"Regressions (> {threshold:.0%} slower): "
+            f"{', '.join(regressions.benchmark)}",
+            style="error",
+        )
+    else:
+        console.print("No regressions.", style="success")
+    return df
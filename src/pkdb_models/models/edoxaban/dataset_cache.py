@@ -0,0 +1,191 @@
+"""Cache of parsed and converted datasets.
+
+`datasets()` of the studies parses the TSV files of the study, groups them by
+label and converts the units (`DataSet.from_df`, `unit_conversion`). The
+resulting datasets are cached
+
+* in memory, so that every process loads the datasets of a study once
+  (shared by the simulation experiments and the fit experiments),
+* on disk in `CACHE_PATH_DATASETS` (pickle), so that later runs skip parsing.
+
+Entries are keyed by the experiment class, the source code of `datasets()`
+and the molecular weights. They are invalidated if a TSV file of the study
+(`<sid>_*.tsv` in the data paths) is added, removed or changed. Files are
+compared by modification time and size, and by content hash if these
+differ.
+
+The cache is enabled for all experiments via `EdoxabanSimulationExperiment`.
+"""
+import hashlib
+import inspect
+import os
+import pickle
+import tempfile
+from functools import wraps
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+from sbmlsim.data import DataSet
+from sbmlutils import log
+
+from pkdb_models.models.edoxaban import CACHE_PATH_DATASETS
+
+logger = log.get_logger(__name__)
+
+# in-memory cache: key -> (files, datasets)
+_datasets: Dict[str, Tuple[Dict, Dict[str, Tuple[pd.DataFrame, Dict]]]] = {}
+
+
+def _data_paths(experiment) -> List[Path]:
+    data_path = experiment.data_path
+    if isinstance(data_path, (list, tuple)):
+        return [Path(p) for p in data_path]
+    return [Path(data_path)]
+
+
+def _data_files(sid: str, data_paths: List[Path]) -> List[Path]:
+    """TSV files of the study."""
+    files = set()
+    for data_path in data_paths:
+        data_path = Path(data_path)
+        if data_path.exists():
+            files.update(data_path.rglob(f"{sid}_*.tsv"))
+            files.update(data_path.rglob(f"{sid}.tsv"))
+    return sorted(files)
+
+
+def _file_hash(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _file_info(path: Path, previous: Optional[Dict] = None) -> Dict:
+    """Modification time, size and hash of file (hash reused if stat unchanged)."""
+    stat = path.stat()
+    info = {"mtime": stat.st_mtime_ns, "size": stat.st_size}
+    if previous and (previous["mtime"], previous["size"]) == (info["mtime"], info["size"]):
+        info["sha256"] = previous["sha256"]
+    else:
+        info["sha256"] = _file_hash(path)
+    return info
+
+
+def _files_unchanged(files: Dict[str, Dict], current: List[Path]) -> Tuple[bool, Dict]:
+    """Check files against the stored infos, returns updated infos."""
+    if sorted(files) != [str(p) for p in current]:
+        return False, {}
+    infos = {}
+    for path in current:
+        previous = files[str(path)]
+        info = _file_info(path, previous=previous)
+        if info["sha256"] != previous["sha256"]:
+            return False, {}
+        infos[str(path)] = info
+    return True, infos
+
+
+def _key(experiment, source: str) -> str:
+    data = [
+        type(experiment).__module__,
+        type(experiment).__qualname__,
+        source,
+        repr(getattr(experiment, "Mr", None)),
+        [str(p) for p in _data_paths(experiment)],
+    ]
+    return hashlib.sha256(repr(data).encode("utf-8")).hexdigest()
+
+
+def _to_datasets(entries: Dict[str, Tuple[pd.DataFrame, Dict]], ureg) -> Dict[str, DataSet]:
+    """Datasets with the unit registry of the experiment (copies)."""
+    dsets = {}
+    for label, (df, udict) in entries.items():
+        dset = DataSet(df.copy())
+        dset.udict = dict(udict)
+        dset.ureg = ureg
+        dsets[label] = dset
+    return dsets
+
+
+def _from_datasets(dsets: Dict[str, DataSet]) -> Dict[str, Tuple[pd.DataFrame, Dict]]:
+    """Datasets without unit registry (picklable)."""
+    return {
+        label: (pd.DataFrame(dset).copy(), dict(dset.udict))
+        for label, dset in dsets.items()
+    }
+
+
+def _read(path: Path) -> Optional[Tuple[Dict, Dict]]:
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as err:
+        logger.warning(f"Corrupt dataset cache entry '{path}', removed: {err}")
+        path.unlink(missing_ok=True)
+        return None
+
+
+def _write(path: Path, files: Dict, entries: Dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump((files, entries), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def cached_datasets(f_datasets: Callable) -> Callable:
+    """Decorator caching the datasets of an experiment."""
+    if getattr(f_datasets, "__dataset_cache__", False):
+        return f_datasets
+
+    try:
+        source = inspect.getsource(f_datasets)
+    except (OSError, TypeError):
+        source = f_datasets.__qualname__
+
+    @wraps(f_datasets)
+    def wrapper(self) -> Dict[str, DataSet]:
+        key = _key(self, source)
+        current = _data_files(self.sid, _data_paths(self))
+        path = CACHE_PATH_DATASETS / f"{self.sid}_{key[:16]}.pkl"
+
+        for load in (lambda: _datasets.get(key), lambda: _read(path)):
+            cached = load()
+            if cached is None:
+                continue
+            files, entries = cached
+            unchanged, infos = _files_unchanged(files, current)
+            if unchanged:
+                if infos != files:
+                    # touched files with identical content
+                    _write(path, infos, entries)
+                _datasets[key] = (infos, entries)
+                return _to_datasets(entries, ureg=self.ureg)
+
+        dsets = f_datasets(self)
+        files = {str(p): _file_info(p) for p in current}
+        entries = _from_datasets(dsets)
+        _datasets[key] = (files, entries)
+        _write(path, files, entries)
+        logger.debug(f"Datasets cached: '{self.sid}' -> '{path}'")
+        return dsets
+
+    wrapper.__dataset_cache__ = True
+    return wrapper
+
+
+def clear() -> None:
+    """Remove all entries."""
+    _datasets.clear()
+    if CACHE_PATH_DATASETS.exists():
+        for path in CACHE_PATH_DATASETS.glob("*.pkl"):
+            path.unlink(missing_ok=True)
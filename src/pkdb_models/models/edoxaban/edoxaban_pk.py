@@ -1,6 +1,17 @@
 import pandas as pd
 from pkdb_analysis.pk.pharmacokinetics import TimecoursePK
 
+# selections required by calculate_edoxaban_pk
+pk_selections = [
+    "time",
+    "PODOSE_edo",
+    "[Cve_edo]", "Aurine_edo", "Afeces_edo",
+    "[Cve_m4]", "Aurine_m4", "Afeces_m4",
+    "[Cve_m6]", "Aurine_m6", "Afeces_m6",
+]
+# selections required by calculate_edoxaban_pd
+pd_selections = ["time", "PODOSE_edo", "PT", "aPTT", "Xa_inhibition"]
+
 
 def process_substance_pk(experiment, xres, scandim, dose_index, dose_value, substance, keys):
     """Process PK calculations for a substance."""
@@ -2,14 +2,22 @@
 Reusable functionality for multiple simulation experiments.
 """
 import pandas as pd
+import shutil
+import weakref
 from collections import namedtuple
-from typing import Dict
-from pkdb_models.models.edoxaban import MODEL_PATH
+from pathlib import Path
+from typing import Dict, List
+from pkdb_models.models.edoxaban import CACHE_PATH_MMAP, MODEL_PATH
 from sbmlsim.experiment import SimulationExperiment
 from sbmlsim.model import AbstractModel
+from sbmlsim.simulation import TimecourseSim
 from sbmlsim.task import Task
 
+from pkdb_models.models.edoxaban.dataset_cache import cached_datasets
 from pkdb_models.models.edoxaban.edoxaban_pk import calculate_edoxaban_pk, calculate_edoxaban_pd
+from pkdb_models.models.edoxaban.instrumentation import Stage, instrument_experiment, timed
+from pkdb_models.models.edoxaban.mmap_results import MemmapScanSimulator, run_path
+from pkdb_models.models.edoxaban.selections import minimal_selections, report_pruned
 
 # Constants for conversion
 MolecularWeights = namedtuple("MolecularWeights", "edo m4 m6 mx")
@@ -51,6 +59,46 @@ class EdoxabanSimulationExperiment(SimulationExperiment):
     label_edo_total_feces = label_edo_total + " feces"
 
 
+    # candidate selections, only the selections used by the experiment are simulated
+    selections: List[str] = [
+        "time",
+        "[Cve_edo]",
+        "[Cve_m4]",
+        "[Cve_m6]",
+        "[Cve_mx]",
+        "[Cve_edo_total]",
+
+        "Aurine_edo",
+        "Aurine_m4",
+        "Aurine_m6",
+        "Aurine_mx",
+        "Aurine_edo_total",
+
+        "Afeces_edo",
+        "Afeces_m4",
+        "Afeces_m6",
+        "Afeces_mx",
+        "Afeces_edo_total",
+
+        # cases
+        'KI__f_renal_function',
+        'f_cirrhosis',
+
+        "PT",
+        "PT_change",
+        "PT_ratio",
+        "aPTT",
+        "aPTT_change",
+        "aPTT_ratio",
+        "Xa_inhibition",
+
+        "PODOSE_edo",
+        "GU__F_edo_abs",
+        "BW",
+    ]
+    # report pruned selections
+    debug_selections: bool = False
+
     labels: Dict[str, str] = {
         "time": "time",
         "[Cve_edo]": label_edo_plasma,
@@ -182,11 +230,26 @@ class EdoxabanSimulationExperiment(SimulationExperiment):
         "Severe cirrhosis": "#045a8d",  # CPT C
     }
 
+    def __init_subclass__(cls, **kwargs):
+        """Cache datasets (see dataset_cache), record datasets and figures as
+        stages (see instrumentation)."""
+        super().__init_subclass__(**kwargs)
+        if "datasets" in cls.__dict__:
+            cls.datasets = cached_datasets(cls.__dict__["datasets"])
+        instrument_experiment(cls)
+
+    # model of the simulations, experiments can opt into the reduced model
+    # with fast equilibration in quasi-steady state (MODEL_PATH_QSS)
+    model_path: Path = MODEL_PATH
+
+    # scans are streamed into memory maps during the simulation (see mmap_results)
+    memmap_scans: bool = False
+
     def models(self) -> Dict[str, AbstractModel]:
         Q_ = self.Q_
         return {
             "model": AbstractModel(
-                source=MODEL_PATH,
+                source=self.model_path,
                 language_type=AbstractModel.LanguageType.SBML,
                 changes={},
             )
@@ -231,45 +294,40 @@ class EdoxabanSimulationExperiment(SimulationExperiment):
             }
         return {}
 
+    def _run_tasks(self, simulator, *args, **kwargs):
+        """Run simulations and scans.
+
+        The timecourses of all tasks are announced to pooled simulators
+        (see `parallel.SimulatorPool`), so that the tasks run concurrently.
+        Scans of experiments with `memmap_scans` are written to a directory
+        of the run, which is removed with the experiment.
+        """
+        if self.memmap_scans:
+            path = run_path(CACHE_PATH_MMAP / self.sid)
+            weakref.finalize(self, shutil.rmtree, path, ignore_errors=True)
+            simulator = MemmapScanSimulator(simulator, path=path)
+
+        submit = getattr(simulator, "submit", None)
+        if submit is None:
+            return super()._run_tasks(simulator, *args, **kwargs)
+
+        submit([
+            (self._simulations[task.simulation_id], self._models[task.model_id].changes)
+            for task in self._tasks.values()
+            if isinstance(self._simulations[task.simulation_id], TimecourseSim)
+        ])
+        try:
+            return super()._run_tasks(simulator, *args, **kwargs)
+        finally:
+            simulator.clear()
+
     def data(self) -> Dict:
-        self.add_selections_data(
-            selections=[
-                "time",
-                "[Cve_edo]",
-                "[Cve_m4]",
-                "[Cve_m6]",
-                "[Cve_mx]",
-                "[Cve_edo_total]",
-
-                "Aurine_edo",
-                "Aurine_m4",
-                "Aurine_m6",
-                "Aurine_mx",
-                "Aurine_edo_total",
-
-                "Afeces_edo",
-                "Afeces_m4",
-                "Afeces_m6",
-                "Afeces_mx",
-                "Afeces_edo_total",
-
-                # cases
-                'KI__f_renal_function',
-                'f_cirrhosis',
-
-                "PT",
-                "PT_change",
-                "PT_ratio",
-                "aPTT",
-                "aPTT_change",
-                "aPTT_ratio",
-                "Xa_inhibition",
-
-                "PODOSE_edo",
-                "GU__F_edo_abs",
-                "BW",
-            ]
+        selections = minimal_selections(
+            type(self), EdoxabanSimulationExperiment, tuple(self.selections)
         )
+        if self.debug_selections:
+            report_pruned(self.sid, tuple(self.selections), selections)
+        self.add_selections_data(selections=selections)
         return {}
 
     @property
@@ -306,6 +364,7 @@ class EdoxabanSimulationExperiment(SimulationExperiment):
         "vd": "l",
     }
 
+    @timed(Stage.PK)
     def calculate_edoxaban_pk(self, scans: list = []) -> Dict[str, pd.DataFrame]:
        """Calculate pk parameters for simulations (scans)"""
        pk_dfs = {}
@@ -321,6 +380,7 @@ class EdoxabanSimulationExperiment(SimulationExperiment):
                pk_dfs[sim_key] = df
        return pk_dfs
 
+    @timed(Stage.PK)
     def calculate_edoxaban_pd(self, scans: list = []) -> Dict[str, pd.DataFrame]:
        """Calculate pd parameters for simulations (scans)"""
        pd_dfs = {}
@@ -1 +1,4 @@
-from .dose_dependency import DoseDependencyExperiment
\ No newline at end of file
+"""Experiments are imported on first access (see `registry`)."""
+from pkdb_models.models.edoxaban.registry import lazy_experiments
+
+__all__, __getattr__ = lazy_experiments(__name__)
@@ -13,6 +13,7 @@ from sbmlutils.console import console
 from pkdb_models.models.edoxaban.experiments.base_experiment import (
     EdoxabanSimulationExperiment,
 )
+from pkdb_models.models.edoxaban.backends import Backend
 from pkdb_models.models.edoxaban.helpers import run_experiments
 
 
@@ -22,6 +23,9 @@ class EdoxabanParameterScan(EdoxabanSimulationExperiment):
     font = {"weight": "bold", "size": 20}
     tick_font_size = 17
 
+    # large scan results are accessed via memory maps
+    memmap_scans = True
+
     tend = 48 * 60
     steps = 2000
     dose_edo = 60  # [mg]
@@ -498,4 +502,8 @@ class EdoxabanParameterScan(EdoxabanSimulationExperiment):
 
 
 if __name__ == "__main__":
-    run_experiments(EdoxabanParameterScan, output_dir=EdoxabanParameterScan.__name__)
+    run_experiments(
+        EdoxabanParameterScan,
+        output_dir=EdoxabanParameterScan.__name__,
+        backend=Backend.BATCH,
+    )
@@ -1,15 +1,4 @@
-from .bathala2012 import Bathala2012
-from .brown2015 import Brown2015
-from .chen2017a import Chen2017a
-from .chen2017b import Chen2017b
-from .lenard2024 import Lenard2024
-from .lenard2025 import Lenard2025
-from .liu2022 import Liu2022
-from .matsushima2013 import Matsushima2013
-from .mendell2011 import Mendell2011
-from .mendell2015 import Mendell2015
-from .mendell2015a import Mendell2015a
-from .ogata2010 import Ogata2010
-from .parasrampuria2016 import Parasrampuria2016
-from .parasrampuria2016b import Parasrampuria2016b
-from .rohr2024 import Rohr2024
\ No newline at end of file
+"""Experiments are imported on first access (see `registry`)."""
+from pkdb_models.models.edoxaban.registry import lazy_experiments
+
+__all__, __getattr__ = lazy_experiments(__name__)
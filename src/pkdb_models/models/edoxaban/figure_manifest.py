@@ -0,0 +1,131 @@
+"""Fingerprints of rendered figures.
+
+Figures are only rendered if their inputs changed. The fingerprint of a
+figure file is a hash of
+
+* the results of all tasks of the experiment,
+* the datasets of the experiment,
+* the source code of the experiment class (figure definitions),
+* the figure key, format and render settings.
+
+The fingerprints of the rendered files are stored in the manifest
+`figures.json` in the output directory of the experiment. A figure is
+skipped if the file exists and its fingerprint is unchanged. Entries are
+removed before a figure is rendered and added after it was written, so
+that failed renderings are repeated. Delete the manifest to force the
+rendering of all figures.
+"""
+import hashlib
+import inspect
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Dict
+
+import matplotlib
+import numpy as np
+import pandas as pd
+from sbmlsim.experiment import SimulationExperiment
+from sbmlsim.plot import Figure
+from sbmlutils import log
+
+logger = log.get_logger(__name__)
+
+MANIFEST_FILENAME = "figures.json"
+
+
+def _hash_array(h: "hashlib._Hash", values: np.ndarray) -> None:
+    values = np.ascontiguousarray(values)
+    h.update(f"{values.dtype}{values.shape}".encode("utf-8"))
+    h.update(values.tobytes())
+
+
+def _hash_dataframe(h: "hashlib._Hash", df: pd.DataFrame) -> None:
+    h.update(json.dumps([str(c) for c in df.columns]).encode("utf-8"))
+    try:
+        _hash_array(h, pd.util.hash_pandas_object(df, index=True).values)
+    except TypeError:
+        # unhashable cells
+        h.update(df.to_csv().encode("utf-8"))
+
+
+def experiment_fingerprint(experiment: SimulationExperiment) -> str:
+    """Hash of the inputs of all figures of the experiment."""
+    h = hashlib.sha256()
+
+    for task_key, xres in sorted(experiment.results.items()):
+        h.update(task_key.encode("utf-8"))
+        for sid, da in sorted(xres.xds.data_vars.items()):
+            h.update(f"{sid}{da.dims}".encode("utf-8"))
+            _hash_array(h, da.values)
+
+    for dset_key, dset in sorted(getattr(experiment, "_datasets", {}).items()):
+        h.update(dset_key.encode("utf-8"))
+        _hash_dataframe(h, dset)
+
+    for cls in type(experiment).__mro__:
+        if cls is SimulationExperiment:
+            break
+        try:
+            h.update(inspect.getsource(cls).encode("utf-8"))
+        except (OSError, TypeError):
+            # e.g. dynamically created subclasses
+            h.update(cls.__qualname__.encode("utf-8"))
+
+    return h.hexdigest()
+
+
+def figure_fingerprint(experiment_hash: str, fig_key: str, fig_format: str) -> str:
+    """Hash of a figure file."""
+    data = {
+        "experiment": experiment_hash,
+        "figure": fig_key,
+        "format": fig_format,
+        "dpi": Figure.fig_dpi,
+        "legend_fontsize": Figure.legend_fontsize,
+        "matplotlib": matplotlib.__version__,
+    }
+    return hashlib.sha256(
+        json.dumps(data, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+
+
+class FigureManifest:
+    """Fingerprints of the figure files in a directory."""
+
+    def __init__(self, output_path: Path):
+        self.path = Path(output_path) / MANIFEST_FILENAME
+        self.entries: Dict[str, str] = {}
+        if self.path.exists():
+            try:
+                with open(self.path, "r") as f_json:
+                    self.entries = json.load(f_json)
+            except (OSError, ValueError) as err:
+                logger.warning(f"Corrupt figure manifest '{self.path}', ignored: {err}")
+
+    def unchanged(self, fig_path: Path, fingerprint: str) -> bool:
+        """Figure file exists with the given fingerprint."""
+        return fig_path.exists() and self.entries.get(fig_path.name) == fingerprint
+
+    def discard(self, fig_path: Path) -> None:
+        """Remove entry of a figure which is rendered."""
+        if self.entries.pop(fig_path.name, None) is not None:
+            self.write()
+
+    def update(self, fig_path: Path, fingerprint: str) -> None:
+        """Add entry of a written figure."""
+        self.entries[fig_path.name] = fingerprint
+        self.write()
+
+    def write(self) -> None:
+        """Write manifest (atomic)."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f_json:
+                json.dump(self.entries, f_json, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
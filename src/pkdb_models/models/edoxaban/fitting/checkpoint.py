@@ -0,0 +1,163 @@
+"""Checkpoints of optimization runs.
+
+Every finished multistart run of an optimization problem is stored in the
+run directory of the fit (`<output_dir>/runs/<name>__<subset>__<seed>`):
+
+    <run directory>/
+        run.json                     settings of the fit
+        <opid>/<seed>_<size>/run_<k>.pkl
+                                     start vector, optimum, cost, duration,
+                                     status and trajectory of run k
+        <opid>.json                  combined `OptimizationResult`
+
+Runs are identified by the optimization problem, the seed and size of the
+worker (chunk) which executed it and the index of the run in the worker.
+A run directory with checkpoints is only replaced with `--overwrite`.
+On resume, stored runs are loaded instead of optimized, so the rebuilt
+`OptimizationResult` contains the stored and the new runs. The start vectors
+of least square runs depend only on the seed, i.e. resumed least square fits
+are identical to uninterrupted fits. Differential evolution runs after
+stored runs use other random numbers.
+"""
+import json
+import os
+import pickle
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy.optimize import OptimizeResult
+from sbmlsim.fit.options import OptimizationAlgorithmType
+from sbmlutils import log
+
+from pkdb_models.models.edoxaban.fitting.memoization import MemoizedOptimizationProblem
+
+logger = log.get_logger(__name__)
+
+
+def run_directory(output_dir: Path, name: str, subset: str, seed: int) -> Path:
+    """Directory with the checkpoints of a fit."""
+    return Path(output_dir) / "runs" / f"{name}__{subset}__{seed}"
+
+
+def prepare_run_directory(
+    run_dir: Path, settings: Dict[str, Any], resume: bool, overwrite: bool = False
+) -> None:
+    """Create the run directory of a fit.
+
+    Resumed fits must use the same settings, otherwise the stored runs do not
+    belong to the fit. Existing checkpoints are only removed with `overwrite`,
+    a non-empty run directory is never silently replaced.
+    """
+    run_dir = Path(run_dir)
+    settings_path = run_dir / "run.json"
+    if resume and settings_path.exists():
+        with open(settings_path, "r") as f_json:
+            stored = json.load(f_json)
+        if stored != settings:
+            raise ValueError(
+                f"Fit settings differ from the stored settings of '{run_dir}', "
+                f"can not resume: {settings} != {stored}"
+            )
+        n_runs = len(list(run_dir.glob("*/*/run_*.pkl")))
+        logger.info(f"Resume fit '{run_dir}' with {n_runs} finished runs.")
+        return
+
+    if run_dir.exists() and any(run_dir.iterdir()):
+        if not overwrite:
+            reason = (
+                "has no settings ('run.json') to resume from" if resume
+                else "contains the checkpoints of an earlier fit"
+            )
+            raise FileExistsError(
+                f"Run directory '{run_dir}' {reason}, use '--resume' to continue "
+                f"the fit or '--overwrite' to remove the checkpoints."
+            )
+        logger.warning(f"Checkpoints of '{run_dir}' are removed (overwrite).")
+        shutil.rmtree(run_dir)
+    run_dir.mkdir(parents=True, exist_ok=True)
+    with open(settings_path, "w") as f_json:
+        json.dump(settings, f_json, indent=2)
+
+
+def _write(path: Path, data: Any) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _read(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as err:
+        logger.warning(f"Corrupt checkpoint '{path}', removed: {err}")
+        path.unlink(missing_ok=True)
+        return None
+
+
+class CheckpointedOptimizationProblem(MemoizedOptimizationProblem):
+    """Optimization problem which stores every finished run.
+
+    Without `checkpoint_path` no runs are stored.
+    """
+
+    def __init__(self, *args, checkpoint_path: Optional[Path] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkpoint_path: Optional[Path] = checkpoint_path
+        self._run_key: Optional[str] = None
+        self._run_index: int = 0
+
+    def optimize(
+        self, size: Optional[int] = 5, seed: Optional[int] = None, **kwargs
+    ) -> Tuple[List[OptimizeResult], List]:
+        """Run parameter optimization, stored runs are loaded."""
+        self._run_key = f"{seed}_{size}"
+        self._run_index = 0
+        return super().optimize(size=size, seed=seed, **kwargs)
+
+    def _optimize_single(
+        self,
+        x0: np.ndarray = None,
+        algorithm=OptimizationAlgorithmType.LEAST_SQUARE,
+        **kwargs,
+    ) -> Tuple[OptimizeResult, List]:
+        """Run single optimization or load the stored run."""
+        if self.checkpoint_path is None or self._run_key is None:
+            return super()._optimize_single(x0=x0, algorithm=algorithm, **kwargs)
+
+        path = Path(self.checkpoint_path) / self._run_key / f"run_{self._run_index}.pkl"
+        self._run_index += 1
+
+        data = _read(path)
+        if data is not None:
+            same_start = (x0 is None and data["x0_sample"] is None) or (
+                x0 is not None
+                and data["x0_sample"] is not None
+                and np.allclose(x0, data["x0_sample"])
+            )
+            if same_start:
+                logger.debug(f"Run loaded from checkpoint: '{path}'")
+                return OptimizeResult(**data["fit"]), data["trajectory"]
+            logger.warning(f"Start vector of '{path}' differs, run is repeated.")
+
+        fit, trajectory = super()._optimize_single(x0=x0, algorithm=algorithm, **kwargs)
+        _write(
+            path,
+            {
+                "x0_sample": x0,
+                "fit": dict(fit),
+                "trajectory": trajectory,
+            },
+        )
+        return fit, trajectory
@@ -3,8 +3,10 @@ import logging
 from pathlib import Path
 
 import itertools
-from typing import List, Dict, Tuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import List, Dict, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 from pymetadata.console import console
 from sbmlsim.fit import FitParameter, FitExperiment
@@ -15,6 +17,12 @@ from sbmlsim.fit.runner import run_optimization
 from sbmlsim.fit.options import *
 from sbmlsim.fit.sampling import SamplingType
 
+from pkdb_models.models.edoxaban.fitting.checkpoint import (
+    prepare_run_directory,
+    run_directory,
+)
+from pkdb_models.models.edoxaban.fitting.sensitivities import SensitivityOptimizationProblem
+from pkdb_models.models.edoxaban.fitting.memoization import cache_statistics
 from pkdb_models.models.edoxaban.fitting.fit_experiments import (
     f_fitexp_all,
     f_fitexp_control,
@@ -31,6 +39,8 @@ from pkdb_models.models.edoxaban import (
     EDOXABAN_PATH,
     DATA_PATHS,
 )
+from pkdb_models.models.edoxaban import model_cache
+from pkdb_models.models.edoxaban.solver_profiles import SolverProfile, get_solver_settings
 
 logger = logging.getLogger(__name__)
 
@@ -45,22 +55,31 @@ fit_kwargs = {
     "weighting_points": WeightingPointsType.ERROR_WEIGHTING,  # no errors weighed with CV=0.5
     # additional integrator settings
     "variable_step_size": True,
-    "relative_tolerance": 1e-6,
-    "absolute_tolerance": 1e-6,
+    **get_solver_settings(SolverProfile.FIT),
     # serial optimization
     # "serial": False,
 }
 
 
 def create_optimization_problem(
-    fit_experiments: List[FitExperiment], opid: str, parameters: List[FitParameter]
+    fit_experiments: List[FitExperiment],
+    opid: str,
+    parameters: List[FitParameter],
+    checkpoint_path: Optional[Path] = None,
+    sensitivities: bool = False,
 ) -> OptimizationProblem:
-    op = OptimizationProblem(
+    """Optimization problem, runs are stored in checkpoint_path/opid.
+
+    :param sensitivities: sensitivity-based Jacobian for least squares
+    """
+    op = SensitivityOptimizationProblem(
         opid=opid,
         fit_experiments=fit_experiments,
         fit_parameters=parameters,
         base_path=EDOXABAN_PATH,
         data_path=DATA_PATHS,
+        checkpoint_path=checkpoint_path / opid if checkpoint_path else None,
+        sensitivities=sensitivities,
     )
     return op
 
@@ -73,6 +92,7 @@ def fitlsq(op, seed: int, **kwargs) -> Tuple[OptimizationResult, OptimizationPro
         algorithm=OptimizationAlgorithmType.LEAST_SQUARE,
         # parameters for least square optimization
         sampling=SamplingType.LOGUNIFORM_LHS,
+        # finite difference Jacobian (if no sensitivities, see `sensitivities`)
         diff_step=0.05,
         # diff_step=0.05,
         # ftol=1e-10,
@@ -94,6 +114,18 @@ def fitde(op, seed: int, **kwargs) -> Tuple[OptimizationResult, OptimizationProb
     return opt_res, op
 
 
+def fitsade(op, seed: int, **kwargs) -> Tuple[OptimizationResult, OptimizationProblem]:
+    """Global surrogate-assisted differential evolution fitting (see `surrogate`)."""
+    opt_res = run_optimization(
+        problem=op,
+        seed=seed,
+        algorithm=OptimizationAlgorithmType.DIFFERENTIAL_EVOLUTION,
+        surrogate=True,
+        **kwargs
+    )
+    return opt_res, op
+
+
 class OptimizationStrategy(str, Enum):
     """Strategy for fitting.
 
@@ -109,6 +141,7 @@ class FitMethod(str, Enum):
 
     LSQ = "LSQ",
     DE = "DE",
+    SADE = "SADE",  # surrogate-assisted differential evolution
 
 
 class FitExperimentSubset(str, Enum):
@@ -120,6 +153,85 @@ class FitExperimentSubset(str, Enum):
     PD = "PD",
 
 
+def _run_chunks(size: int, n_chunks: int, seed: Optional[int]) -> List[Tuple[int, int]]:
+    """(size, seed) of the chunks of `size` optimization runs.
+
+    Every chunk is run with the public `run_optimization(serial=True)` and
+    its own seed drawn from `seed`, so that the result is reproducible for a
+    seed and number of chunks, independent of sbmlsim's split of parallel
+    runs.
+    """
+    n_chunks = max(1, min(n_chunks, size))
+    sizes = [len(c) for c in np.array_split(range(size), n_chunks)]
+    seeds = np.random.SeedSequence(seed).generate_state(n_chunks)
+    return [(int(s), int(chunk_seed)) for s, chunk_seed in zip(sizes, seeds)]
+
+
+def _init_fit_worker() -> None:
+    """Reuse compiled models in the fit worker."""
+    model_cache.install()
+
+
+def _fit_chunk(
+    fit_method: "FitMethod", op: OptimizationProblem, size: int, seed: int, kwargs: Dict
+) -> OptimizationResult:
+    """Serial optimization runs of a chunk in a fit worker."""
+    f_fit = {FitMethod.LSQ: fitlsq, FitMethod.DE: fitde, FitMethod.SADE: fitsade}[fit_method]
+    opt_result, _ = f_fit(op, seed=seed, size=size, n_cores=1, serial=True, **kwargs)
+    return opt_result
+
+
+def fit_single_parallel(
+    fit_method: "FitMethod",
+    ops: Dict[str, OptimizationProblem],
+    n_cores: int,
+    n_optimizations: int,
+    seed: int,
+    kwargs: Dict,
+) -> Dict[str, Tuple[OptimizationResult, OptimizationProblem]]:
+    """Fit the optimization problems concurrently on n_cores.
+
+    Every problem is split in n_cores chunks of runs (`_run_chunks`) and all
+    chunks are scheduled on a single pool of n_cores workers, longest chunks
+    first (estimated by runs * mappings). Idle workers take the next chunk, so
+    that small problems fill the gaps of large problems. The chunks of a
+    problem are combined in order, i.e. the results only depend on the seed
+    and n_cores, not on the scheduling.
+    """
+    tasks = []
+    for opid, op in ops.items():
+        n_mappings = sum(len(fit_exp.mappings) for fit_exp in op.fit_experiments)
+        for k, (size, chunk_seed) in enumerate(_run_chunks(n_optimizations, n_cores, seed)):
+            tasks.append((size * max(1, n_mappings), opid, k, size, chunk_seed))
+    tasks.sort(key=lambda task: task[0], reverse=True)
+
+    chunks: Dict[str, Dict[int, OptimizationResult]] = {opid: {} for opid in ops}
+    n_chunks = {opid: sum(1 for t in tasks if t[1] == opid) for opid in ops}
+    with ProcessPoolExecutor(
+        max_workers=min(n_cores, len(tasks)), initializer=_init_fit_worker
+    ) as executor:
+        futures = {
+            executor.submit(_fit_chunk, fit_method, ops[opid], size, chunk_seed, kwargs): (opid, k)
+            for _, opid, k, size, chunk_seed in tasks
+        }
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                opid, k = futures[future]
+                chunks[opid][k] = future.result()
+                if len(chunks[opid]) == n_chunks[opid]:
+                    console.log(f"Optimization finished: '{opid}'")
+
+    return {
+        opid: (
+            OptimizationResult.combine([chunks[opid][k] for k in sorted(chunks[opid])]),
+            ops[opid],
+        )
+        for opid in ops
+    }
+
+
 def fit_edoxaban(
     optimization_strategy: OptimizationStrategy,
     fit_method: FitMethod,
@@ -128,13 +240,28 @@ def fit_edoxaban(
     n_cores: int,
     n_optimizations: int,
     seed: int,
+    profile: SolverProfile = SolverProfile.FIT,
+    checkpoint_path: Optional[Path] = None,
+    sensitivities: bool = False,
 ) -> Dict[str, Tuple[OptimizationResult, OptimizationProblem]]:
+    """Fit the parameters.
+
+    :param checkpoint_path: run directory for storing finished runs (resume)
+    :param sensitivities: sensitivity-based Jacobian for least squares
+        (finite differences otherwise)
+    """
 
     if not isinstance(optimization_strategy, OptimizationStrategy):
         raise ValueError
     if not isinstance(fit_method, FitMethod):
         raise ValueError
 
+    # reuse compiled models in all optimization workers
+    model_cache.install()
+
+    # integrator settings of the solver profile
+    kwargs = {**fit_kwargs, **get_solver_settings(profile)}
+
     def fit_op(
         op: OptimizationProblem,
     ) -> Tuple[OptimizationResult, OptimizationProblem]:
@@ -144,9 +271,11 @@ def fit_edoxaban(
         opt_result: OptimizationResult
         op: OptimizationProblem
         if fit_method == FitMethod.LSQ:
-            opt_result, op = fitlsq(op, seed=seed, size=n_optimizations, n_cores=n_cores, **fit_kwargs)
+            opt_result, op = fitlsq(op, seed=seed, size=n_optimizations, n_cores=n_cores, **kwargs)
         elif fit_method == FitMethod.DE:
-            opt_result, op = fitde(op, seed=seed, size=n_optimizations, n_cores=n_cores, **fit_kwargs)
+            opt_result, op = fitde(op, seed=seed, size=n_optimizations, n_cores=n_cores, **kwargs)
+        elif fit_method == FitMethod.SADE:
+            opt_result, op = fitsade(op, seed=seed, size=n_optimizations, n_cores=n_cores, **kwargs)
 
         return opt_result, op
 
@@ -155,19 +284,40 @@ def fit_edoxaban(
 
     if optimization_strategy == OptimizationStrategy.SINGLE:
         # fit all experiments individually
+        ops = {}
         for fit_exp in fit_experiments:
             opid = fit_exp.experiment_class.__name__
 
-            op = create_optimization_problem(
-                fit_experiments=[fit_exp], opid=opid, parameters=parameters
+            ops[opid] = create_optimization_problem(
+                fit_experiments=[fit_exp],
+                opid=opid,
+                parameters=parameters,
+                checkpoint_path=checkpoint_path,
+                sensitivities=sensitivities,
+            )
+        if n_cores > 1 and len(ops) > 1:
+            # concurrent fits of the experiments on a shared pool
+            results = fit_single_parallel(
+                fit_method=fit_method,
+                ops=ops,
+                n_cores=n_cores,
+                n_optimizations=n_optimizations,
+                seed=seed,
+                kwargs=kwargs,
             )
-            results[opid] = fit_op(op=op)
+        else:
+            for opid, op in ops.items():
+                results[opid] = fit_op(op=op)
 
     elif optimization_strategy == OptimizationStrategy.ALL:
         # fit all experiments together
         opid = "all"
         op = create_optimization_problem(
-            fit_experiments=fit_experiments, opid=opid, parameters=parameters
+            fit_experiments=fit_experiments,
+            opid=opid,
+            parameters=parameters,
+            checkpoint_path=checkpoint_path,
+            sensitivities=sensitivities,
         )
         results[opid] = fit_op(op)
 
@@ -265,7 +415,7 @@ def main() -> None:
         "--method",
         action="store",
         dest="method",
-        help="Method for optimization [LSQ, DE]",
+        help="Method for optimization [LSQ, DE, SADE]",
     )
     parser.add_option(
         "-x",
@@ -281,6 +431,35 @@ def main() -> None:
         dest="output_dir",
         help="Path to output folder with optimization results (optional)",
     )
+    parser.add_option(
+        "-p",
+        "--profile",
+        action="store",
+        dest="profile",
+        default=SolverProfile.FIT.value,
+        help="Solver profile [reference, production, fit, preview] (optional)",
+    )
+    parser.add_option(
+        "--sensitivities",
+        action="store_true",
+        dest="sensitivities",
+        default=False,
+        help="Sensitivity Jacobian for LSQ instead of finite differences (optional)",
+    )
+    parser.add_option(
+        "--resume",
+        action="store_true",
+        dest="resume",
+        default=False,
+        help="Resume fit, finished runs of the run directory are reused (optional)",
+    )
+    parser.add_option(
+        "--overwrite",
+        action="store_true",
+        dest="overwrite",
+        default=False,
+        help="Remove the finished runs of an existing run directory (optional)",
+    )
 
     console.rule(style="white")
     console.print(":wrench: FIT EDOXABAN :wrench:")
@@ -311,7 +490,7 @@ def main() -> None:
         from pkdb_models.models.edoxaban import RESULTS_PATH_FIT
         output_dir = RESULTS_PATH_FIT
     else:
-        output_dir = Path(options.output_path)
+        output_dir = Path(options.output_dir)
 
     if not output_dir.exists():
         console.log(f"Create output directory: {output_dir}")
@@ -324,6 +503,7 @@ def main() -> None:
     method: str = str(options.method)
     subset: str = str(options.subset)
     strategy: str = str(options.strategy)
+    profile = SolverProfile(str(options.profile))
 
     fit_method = FitMethod(method)
     fit_subset = FitExperimentSubset(subset)
@@ -336,6 +516,33 @@ def main() -> None:
     console.print(f"{'method':<20}: {fit_method}")
     console.print(f"{'subset':<20}: {fit_subset}")
     console.print(f"{'strategy':<20}: {optimization_strategy}")
+    console.print(f"{'profile':<20}: {profile}")
+    sensitivities: bool = options.sensitivities
+    console.print(f"{'sensitivities':<20}: {sensitivities}")
+
+    run_dir = run_directory(output_dir, name=name, subset=subset, seed=seed)
+    console.print(f"{'run directory':<20}: {run_dir}")
+    console.print(f"{'resume':<20}: {options.resume}")
+    console.print(f"{'overwrite':<20}: {options.overwrite}")
+    try:
+        prepare_run_directory(
+            run_dir,
+            settings={
+                "name": name,
+                "subset": fit_subset.value,
+                "seed": seed,
+                "runs": n_optimizations,
+                "cores": n_cores,
+                "method": fit_method.value,
+                "strategy": optimization_strategy.value,
+                "profile": profile.value,
+                "sensitivities": sensitivities,
+            },
+            resume=options.resume,
+            overwrite=options.overwrite,
+        )
+    except (FileExistsError, ValueError) as err:
+        _parser_message(str(err))
 
     console.rule("Parameters", align="left", style="white")
 
@@ -355,17 +562,24 @@ def main() -> None:
         n_cores=n_cores,
         n_optimizations=n_optimizations,
         seed=seed,
+        profile=profile,
+        checkpoint_path=run_dir,
+        sensitivities=sensitivities,
     )
 
     # Serialization
-    # FIXME: this must store the results
-    console.print(results)
-
-
-
-
-
-    # TODO: serialization
+    for opid, (opt_result, _) in results.items():
+        opt_result.to_json(path=run_dir / f"{opid}.json")
+        console.print(f"{opid}: {opt_result}")
+
+    # Memoized residual evaluations
+    console.rule("Residual cache", align="left", style="white")
+    df_cache = pd.DataFrame([
+        {"opid": opid, **cache_statistics(opt_result)}
+        for opid, (opt_result, _) in results.items()
+    ])
+    console.print(df_cache)
+    df_cache.to_csv(run_dir / "residual_cache.tsv", sep="\t", index=False)
 
     console.rule(style="white")
     # Create report
@@ -386,7 +600,7 @@ def main() -> None:
             output_dir=output_dir,
             show_plots=False,
             show_titles=False,
-            **fit_kwargs
+            **{**fit_kwargs, **get_solver_settings(profile)}
         )
         opt_analysis.run(mpl_parameters=mpl_parameters)
 
@@ -399,5 +613,9 @@ if __name__ == "__main__":
     fit_edoxaban --cores=10 --runs=10 --seed=1234 --method=LSQ --strategy=ALL --subset=CONTROL --name=EDOXABAN_LSQ_CONTROL
     fit_edoxaban --cores=10 --runs=10 --seed=1234 --method=LSQ --strategy=ALL --subset=PK --name=EDOXABAN_LSQ_PK
     fit_edoxaban --cores=15 --runs=100 --seed=1234 --method=LSQ --strategy=ALL --subset=PD --name=EDOXABAN_LSQ_PD
+    fit_edoxaban --cores=15 --runs=100 --seed=1234 --method=LSQ --strategy=ALL --subset=PD --name=EDOXABAN_LSQ_PD --resume
+    fit_edoxaban --cores=15 --runs=100 --seed=1234 --method=LSQ --strategy=ALL --subset=PD --name=EDOXABAN_LSQ_PD --overwrite
+    fit_edoxaban --cores=10 --runs=10 --seed=1234 --method=LSQ --strategy=ALL --subset=PK --name=EDOXABAN_LSQ_PK --sensitivities
+    fit_edoxaban --cores=10 --runs=10 --seed=1234 --method=SADE --strategy=ALL --subset=PK --name=EDOXABAN_SADE_PK
     """
     main()
\ No newline at end of file
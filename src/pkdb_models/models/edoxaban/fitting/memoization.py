@@ -0,0 +1,232 @@
+"""Memoization of the residual evaluations of optimization problems.
+
+Least square steps, finite differences and differential evolution often
+evaluate the same parameter vectors again, e.g. parameters clipped to the
+bounds. Residuals are memoized
+
+* in memory, bounded and least recently used entries are evicted,
+* in a local store (`CACHE_PATH_RESIDUALS`, see `ResultCache`), which is
+  shared by the processes fitting the same problem.
+
+Entries are keyed by the parameter vector (log10), quantized to `quantum`.
+The quantum is the relative tolerance of the integrator (1e-6 in the fit
+profile): a log10 step q changes the parameters by ~2.3 q relative, so
+residuals of parameters within a quantum differ by about the integration
+error. Least square steps below the quantum are below the accuracy of the
+residuals, the finite differences (`diff_step=0.05`) are far above it.
+The store is partitioned by a hash of the problem (parameters, mappings,
+reference data, weights, residual settings, integrator settings, models, the
+normalized changes and model changes of the simulations, selections and the
+roadrunner and sbmlsim versions), so that only identical problems share
+residuals. If the store can not be written, residuals are memoized in memory.
+
+Hits, misses and the hit rate are counted per optimization run and stored in
+the fit (`cache_hits`, `cache_misses`, `cache_hit_rate`), i.e. in the
+`<opid>.json` of the fit, see `cache_statistics`.
+"""
+import hashlib
+import json
+from collections import OrderedDict
+from copy import deepcopy
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import roadrunner
+import sbmlsim
+from sbmlsim.fit.options import OptimizationAlgorithmType
+from sbmlsim.fit.result import OptimizationResult
+from sbmlutils import log
+
+from pkdb_models.models.edoxaban import CACHE_PATH_RESIDUALS
+from pkdb_models.models.edoxaban.fitting.surrogate import SurrogateOptimizationProblem
+from pkdb_models.models.edoxaban.model_cache import sbml_hash
+from pkdb_models.models.edoxaban.result_cache import ResultCache, simulation_key
+
+logger = log.get_logger(__name__)
+
+
+class ResidualMemo:
+    """Bounded LRU memo of residual vectors with a shared local store."""
+
+    def __init__(
+        self,
+        namespace: str,
+        max_entries: int = 4096,
+        quantum: float = 1e-6,
+        store_path: Optional[Path] = CACHE_PATH_RESIDUALS,
+        max_store_size: int = 512 * 1024**2,
+    ):
+        """
+        :param quantum: resolution of the log10 parameters of the keys
+            (relative tolerance of the integrator)
+        :param store_path: shared local store (None: memory only)
+        :param max_store_size: size of the store [bytes]
+        """
+        self.max_entries = max_entries
+        self.quantum = quantum
+        self._entries: OrderedDict = OrderedDict()
+        self.store: Optional[ResultCache] = None
+        if store_path is not None:
+            self.store = ResultCache(
+                cache_path=Path(store_path) / namespace, max_size=max_store_size
+            )
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def key(self, xlog: np.ndarray) -> str:
+        """Key of the quantized parameter vector."""
+        quantized = np.round(np.asarray(xlog, dtype=float) / self.quantum).astype(np.int64)
+        return hashlib.sha256(quantized.tobytes()).hexdigest()
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """Memoized residuals or None."""
+        residuals = self._entries.get(key)
+        if residuals is not None:
+            self._entries.move_to_end(key)
+        elif self.store is not None:
+            residuals = self.store.get(key)
+            if residuals is not None:
+                self._remember(key, residuals)
+
+        if residuals is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return residuals
+
+    def put(self, key: str, residuals: np.ndarray) -> None:
+        """Memoize residuals."""
+        self._remember(key, residuals)
+        if self.store is not None:
+            try:
+                self.store.put(key, residuals)
+            except OSError as err:
+                logger.warning(
+                    f"Residual store '{self.store.cache_path}' not writable, "
+                    f"residuals are memoized in memory: {err}"
+                )
+                self.store = None
+
+    def _remember(self, key: str, residuals: np.ndarray) -> None:
+        self._entries[key] = residuals
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class MemoizedOptimizationProblem(SurrogateOptimizationProblem):
+    """Optimization problem with memoized residuals.
+
+    The memo is created on initialization.
+    """
+
+    def __init__(self, *args, memoize: bool = True, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.memoize: bool = memoize
+        self._memo: Optional[ResidualMemo] = None
+
+    def initialize(self, *args, **kwargs) -> None:
+        """Initialize problem and the memo of the residuals."""
+        super().initialize(*args, **kwargs)
+        self._memo = None
+        if self.memoize:
+            self._memo = ResidualMemo(
+                namespace=self._namespace(kwargs),
+                quantum=kwargs.get("relative_tolerance", 1e-6),
+            )
+
+    def _simulation_keys(self) -> List[str]:
+        """Hashes of the simulations of the mappings.
+
+        Changes are normalized to the model units, the fitted parameters are
+        set by the optimization and are not part of the hash.
+        """
+        keys = []
+        for model, simulation, selections in zip(
+            self.models, self.simulations, self.selections
+        ):
+            simulation = deepcopy(simulation)
+            simulation.normalize(uinfo=model.uinfo)
+            for tc in simulation.timecourses:
+                for pid in self.pids:
+                    tc.changes.pop(pid, None)
+            context = json.dumps({
+                "selections": sorted(selections),
+                "model_changes": sorted(
+                    (key, str(value)) for key, value in model.changes.items()
+                ),
+            })
+            keys.append(simulation_key(context, simulation))
+        return keys
+
+    def _namespace(self, settings: Dict) -> str:
+        """Hash of the problem."""
+        h = hashlib.sha256()
+        models = sorted({
+            sbml_hash(Path(fit_exp.experiment_class.model_path))
+            for fit_exp in self.fit_experiments
+        })
+        h.update(repr([
+            self.opid,
+            self.pids,
+            self.punits,
+            self.mapping_keys,
+            self.yid_observable,
+            sorted((key, str(value)) for key, value in settings.items()),
+            models,
+            self._simulation_keys(),
+            roadrunner.__version__,
+            sbmlsim.__version__,
+        ]).encode("utf-8"))
+        for arrays in [self.x_references, self.y_references, self.weights]:
+            for array in arrays:
+                h.update(np.asarray(array, dtype=float).tobytes())
+        return f"{self.opid}_{h.hexdigest()[:16]}"
+
+    def residuals(self, xlog: np.ndarray, complete_data=False):
+        """Calculate residuals for given parameter vector (memoized)."""
+        if complete_data or self._memo is None:
+            return super().residuals(xlog, complete_data=complete_data)
+
+        key = self._memo.key(xlog)
+        residuals = self._memo.get(key)
+        if residuals is None:
+            residuals = super().residuals(xlog)
+            self._memo.put(key, residuals)
+        else:
+            # store the local step
+            self._trajectory.append(
+                (deepcopy(np.power(10, xlog)), 0.5 * np.sum(np.power(residuals, 2)))
+            )
+        return residuals.copy()
+
+    def _optimize_single(
+        self,
+        x0: np.ndarray = None,
+        algorithm=OptimizationAlgorithmType.LEAST_SQUARE,
+        **kwargs,
+    ):
+        """Run single optimization, counts the hits of the memo."""
+        if self._memo is None:
+            return super()._optimize_single(x0=x0, algorithm=algorithm, **kwargs)
+
+        hits, misses = self._memo.hits, self._memo.misses
+        fit, trajectory = super()._optimize_single(x0=x0, algorithm=algorithm, **kwargs)
+        fit.cache_hits = self._memo.hits - hits
+        fit.cache_misses = self._memo.misses - misses
+        total = fit.cache_hits + fit.cache_misses
+        fit.cache_hit_rate = fit.cache_hits / total if total else 0.0
+        return fit, trajectory
+
+
+def cache_statistics(opt_result: OptimizationResult) -> Dict[str, float]:
+    """Hits, misses and hit rate of the residual evaluations of all runs."""
+    hits = int(sum(fit.get("cache_hits", 0) for fit in opt_result.fits))
+    misses = int(sum(fit.get("cache_misses", 0) for fit in opt_result.fits))
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / total if total else 0.0,
+    }
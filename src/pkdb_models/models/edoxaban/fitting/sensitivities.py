@@ -0,0 +1,258 @@
+"""Sensitivity-based Jacobian of the least square residuals.
+
+The least square optimizer approximates the Jacobian of the residuals by
+finite differences (`diff_step`), i.e. one simulation of all fit mappings
+per parameter. Here the Jacobian is calculated from forward sensitivities
+of the observables, which are integrated together with the states by the
+`OdeSimulator` (generated ODE module, see `models.codegen`):
+
+    dr_i/dlog10(p_j) = w_i * dy(t_i)/dp_j * p_j * ln(10)
+
+with the scaling w_i of the residuals (normalization, weights, loss function).
+In these runs the residuals are calculated from the same integration as the
+Jacobian (instead of roadrunner), which `least_squares` requests at the
+evaluated parameters. They agree with the roadrunner residuals within the
+tolerances of the integration and are not memoized (see `memoization`).
+
+The sensitivity integration is expensive. For the PK subset (20 mappings,
+10 parameters, fit profile) residuals and Jacobian take ~3.3 s, the roadrunner
+residuals ~0.08 s, i.e. a finite difference Jacobian ~0.8 s. Every trial step
+of the optimizer pays the full integration. Sensitivities therefore are
+opt-in (`--sensitivities`) for problems where the finite differences
+(`diff_step`) are too inaccurate, not for speed.
+
+Sensitivities are used if all fit experiments simulate `MODEL_PATH`, the
+generated ODE module exists, all fit parameters are model parameters and
+the timecourses only contain changes (no model changes). Otherwise the
+finite differences are used.
+"""
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sbmlsim.fit.options import (
+    LossFunctionType,
+    OptimizationAlgorithmType,
+    ResidualType,
+)
+from sbmlsim.simulation import TimecourseSim
+from sbmlutils import log
+
+from pkdb_models.models.edoxaban import MODEL_ODE_PATH, MODEL_PATH
+from pkdb_models.models.edoxaban.fitting.checkpoint import CheckpointedOptimizationProblem
+from pkdb_models.models.edoxaban.ode_simulator import OdeSimulator
+
+logger = log.get_logger(__name__)
+
+
+def _magnitude(value) -> float:
+    return float(getattr(value, "magnitude", value))
+
+
+class SensitivityOptimizationProblem(CheckpointedOptimizationProblem):
+    """Optimization problem with sensitivity-based Jacobian for least squares."""
+
+    def __init__(self, *args, sensitivities: bool = False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.sensitivities: bool = sensitivities
+        self._ode_simulator: Optional[OdeSimulator] = None
+        self._tolerances: Dict[str, float] = {}
+        # least square run with sensitivities, last evaluated (xlog, jacobian)
+        self._sensitivity_run: bool = False
+        self._last: Optional[Tuple[np.ndarray, np.ndarray]] = None
+
+    def __getstate__(self) -> Dict:
+        # the generated ODE module is loaded in every process
+        state = self.__dict__.copy()
+        state["_ode_simulator"] = None
+        return state
+
+    def initialize(self, *args, **kwargs) -> None:
+        """Initialize problem, stores the tolerances for the sensitivities."""
+        self._tolerances = {
+            key: kwargs[key]
+            for key in ["relative_tolerance", "absolute_tolerance"]
+            if key in kwargs
+        }
+        self._ode_simulator = None
+        super().initialize(*args, **kwargs)
+
+    def _optimize_single(
+        self,
+        x0: np.ndarray = None,
+        algorithm=OptimizationAlgorithmType.LEAST_SQUARE,
+        **kwargs,
+    ):
+        """Run single optimization, least squares with sensitivity Jacobian."""
+        if not (
+            algorithm == OptimizationAlgorithmType.LEAST_SQUARE
+            and self.sensitivities
+            and "jac" not in kwargs
+            and self._sensitivities_supported()
+        ):
+            return super()._optimize_single(x0=x0, algorithm=algorithm, **kwargs)
+
+        kwargs["jac"] = self.jacobian
+        kwargs.pop("diff_step", None)
+        self._sensitivity_run, self._last = True, None
+        try:
+            return super()._optimize_single(x0=x0, algorithm=algorithm, **kwargs)
+        finally:
+            self._sensitivity_run, self._last = False, None
+
+    def _sensitivities_supported(self) -> bool:
+        """Check if the Jacobian can be calculated with sensitivities."""
+        reason = None
+        if not Path(MODEL_ODE_PATH).exists():
+            reason = f"ODE module '{MODEL_ODE_PATH}' does not exist"
+        elif any(
+            Path(fit_exp.experiment_class.model_path) != Path(MODEL_PATH)
+            for fit_exp in self.fit_experiments
+        ):
+            reason = f"experiments do not simulate '{MODEL_PATH.name}'"
+        elif any(xid != "time" for xid in self.xid_observable):
+            reason = "observables are not timecourses"
+        else:
+            ode = self.ode_simulator.ode
+            settable = set(ode.p_ids) | set(ode.x_ids) | {f"[{sid}]" for sid in ode.compartments}
+            if any(pid not in ode.p_ids for pid in self.pids):
+                reason = "fit parameters are not model parameters"
+            for simulation in self.simulations:
+                if not simulation.reset or any(
+                    tc.model_changes or set(tc.changes) - settable
+                    for tc in simulation.timecourses
+                ):
+                    reason = "simulations contain unsupported changes"
+        if reason:
+            logger.warning(f"Finite difference Jacobian for '{self.opid}': {reason}.")
+            self.sensitivities = False
+            return False
+        return True
+
+    @property
+    def ode_simulator(self) -> OdeSimulator:
+        """Simulator of the generated ODE module (BDF with sparse Jacobian)."""
+        if self._ode_simulator is None:
+            self._ode_simulator = OdeSimulator(method="BDF", **self._tolerances)
+        return self._ode_simulator
+
+    def _simulate_sensitivities(
+        self, simulation: TimecourseSim, times: np.ndarray, yid: str
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Observable and sensitivities at the times (like `SimulatorSerial._timecourse`)."""
+        simulator = self.ode_simulator
+        y = np.zeros(len(times))
+        dy = np.zeros((len(times), len(self.pids)))
+        done = np.zeros(len(times), dtype=bool)
+
+        t_offset = simulation.time_offset
+        for k, tc in enumerate(simulation.timecourses):
+            changes = {key: _magnitude(value) for key, value in tc.changes.items()}
+            if k == 0:
+                simulator.reset(changes=changes, parameters=self.pids)
+            else:
+                simulator.set(changes)
+
+            mask = ~done & (times >= t_offset + tc.start) & (times <= t_offset + tc.end)
+            if tc.discard:
+                mask[:] = False
+            values, sensitivities = simulator.simulate_sensitivities(
+                start=tc.start, end=tc.end, times=times[mask] - t_offset, selections=[yid]
+            )
+            y[mask] = values[yid]
+            dy[mask] = sensitivities[yid]
+            done |= mask
+            if not tc.discard:
+                t_offset += tc.end
+
+        return y, dy
+
+    def residuals(self, xlog: np.ndarray, complete_data=False):
+        """Calculate residuals for given parameter vector.
+
+        In least square runs with sensitivities the residuals are calculated
+        from the sensitivity integration, the Jacobian at the same parameters
+        is kept for `jacobian`.
+        """
+        if complete_data or not self._sensitivity_run:
+            return super().residuals(xlog, complete_data=complete_data)
+
+        residuals, jacobian = self._evaluate(xlog)
+        self._last = (np.array(xlog, dtype=float), jacobian)
+        # store the local step
+        self._trajectory.append(
+            (np.power(10, xlog), 0.5 * np.sum(np.power(residuals, 2)))
+        )
+        return residuals
+
+    def jacobian(self, xlog: np.ndarray) -> np.ndarray:
+        """Jacobian of the residuals with respect to the logarithmic parameters."""
+        if self._last is not None and np.array_equal(self._last[0], xlog):
+            return self._last[1]
+        return self._evaluate(xlog)[1]
+
+    def _evaluate(self, xlog: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Residuals and Jacobian from a single sensitivity integration."""
+        x = np.power(10, xlog)
+        Q_ = self.runner.Q_
+
+        residual_parts: List[np.ndarray] = []
+        jacobian_parts: List[np.ndarray] = []
+        for k, _ in enumerate(self.mapping_keys):
+            # changes as in `residuals`
+            simulation: TimecourseSim = self.simulations[k]
+            simulation.timecourses[0].changes.update(
+                {self.pids[ix]: Q_(value, self.punits[ix]) for ix, value in enumerate(x)}
+            )
+            simulation.normalize(uinfo=self.models[k].uinfo)
+            # parameters in model units
+            p = np.array(
+                [_magnitude(simulation.timecourses[0].changes[pid]) for pid in self.pids]
+            )
+
+            y_ref = self.y_references[k]
+            try:
+                y, dy = self._simulate_sensitivities(
+                    simulation, times=self.x_references[k], yid=self.yid_observable[k]
+                )
+                if self.residual in {
+                    ResidualType.ABSOLUTE_TO_BASELINE,
+                    ResidualType.NORMALIZED_TO_BASELINE,
+                }:
+                    y = y - y[0]
+                    dy = dy - dy[0]
+            except RuntimeError as err:
+                # error in integration (total error as in `residuals`), constant residuals
+                logger.error(f"RuntimeError in sensitivities ('{self.pids} = {x}'): \n{err}")
+                y, dy = 6.0 * y_ref, np.zeros((len(y_ref), len(x)))
+
+            scale = np.sqrt(self.weights[k])
+            if self.residual in {
+                ResidualType.NORMALIZED,
+                ResidualType.NORMALIZED_TO_BASELINE,
+            }:
+                scale = scale / np.mean(y_ref)
+            residuals_weighted = (y - y_ref) * scale
+
+            # loss function and its derivative
+            if self.loss_function == LossFunctionType.LINEAR:
+                loss = residuals_weighted
+                dloss = np.ones_like(residuals_weighted)
+            elif self.loss_function == LossFunctionType.SOFT_L1:
+                loss = 2 * (np.power(1 + residuals_weighted, 0.5) - 1)
+                dloss = 1.0 / np.sqrt(1 + residuals_weighted)
+            elif self.loss_function == LossFunctionType.CAUCHY:
+                loss = np.log(1 + residuals_weighted)
+                dloss = 1.0 / (1 + residuals_weighted)
+            elif self.loss_function == LossFunctionType.ARCTAN:
+                loss = np.arctan(residuals_weighted)
+                dloss = 1.0 / (1 + np.power(residuals_weighted, 2))
+            else:
+                raise ValueError(f"LossFunctionType not supported: '{self.loss_function}'")
+
+            residual_parts.append(loss)
+            jacobian_parts.append(
+                (dloss * scale)[:, np.newaxis] * dy * (p * np.log(10))[np.newaxis, :]
+            )
+
+        return np.concatenate(residual_parts), np.vstack(jacobian_parts)
@@ -0,0 +1,260 @@
+"""Surrogate-assisted differential evolution.
+
+Every candidate of differential evolution requires a simulation of all fit
+experiments. Here a radial basis function model of the cost, trained on
+all evaluated points, pre-screens the candidates, only pre-screened
+candidates are simulated:
+
+* every generation, several DE/rand/1/bin trials are created per member
+  and the best trial according to the surrogate is kept,
+* trials which are predicted to improve on their target are ranked by the
+  predicted improvement, the best `eval_fraction` of the population are
+  simulated and compete with their targets, all other trials are discarded,
+* the minimum of the surrogate near the best member is simulated and
+  replaces the best member if it is better (local exploitation without
+  collapsing the population onto the best member).
+
+The surrogate models log(cost) in the unit cube of the (log10) bounds.
+Parameters of trials outside of the bounds are reinitialized randomly (like
+scipy), clipping would accumulate the population on the bounds.
+Convergence is checked like `scipy.optimize.differential_evolution` on the
+simulated costs of the population. As only a part of the population is
+simulated per generation, the best simulated cost must in addition not have
+improved for `stagnation` generations. Like scipy, the best member is
+polished with L-BFGS-B on func (`polish`). The number of simulations is
+limited by `max_evaluations`.
+
+On the one-compartment test problem (`tests/test_surrogate.py`) this reaches
+the cost of scipy with ~500 instead of ~1500 evaluations.
+
+The method is available as `FitMethod.SADE`: the fit uses the
+differential evolution runner of sbmlsim with `surrogate=True`, which is
+handled by `SurrogateOptimizationProblem`.
+"""
+import time
+from copy import deepcopy
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy.interpolate import RBFInterpolator
+from scipy.optimize import OptimizeResult, minimize
+from scipy.stats import qmc
+from sbmlsim.fit.optimization import OptimizationProblem
+from sbmlsim.fit.options import OptimizationAlgorithmType
+from sbmlutils import log
+
+logger = log.get_logger(__name__)
+
+
+class _Surrogate:
+    """RBF model of log(cost) on the evaluated points."""
+
+    def __init__(self, u: np.ndarray, f: np.ndarray, max_points: int):
+        u, index = np.unique(u, axis=0, return_index=True)
+        f = f[index]
+        if len(f) > max_points:
+            # best points
+            keep = np.argsort(f)[:max_points]
+            u, f = u[keep], f[keep]
+        self.offset = 1e-12 * (1.0 + np.median(np.abs(f)))
+        self.f_min = np.min(f)
+        log_f = np.log(f - self.f_min + self.offset)
+        try:
+            self.rbf = RBFInterpolator(u, log_f, kernel="thin_plate_spline", degree=1)
+        except np.linalg.LinAlgError:
+            # degenerate points (e.g. all on a bound), smoothed fit
+            self.rbf = RBFInterpolator(
+                u, log_f, kernel="thin_plate_spline", degree=1, smoothing=1e-8
+            )
+
+    def __call__(self, u: np.ndarray) -> np.ndarray:
+        """Predicted cost."""
+        log_f = np.minimum(self.rbf(np.atleast_2d(u)), 700.0)
+        return np.exp(log_f) + self.f_min - self.offset
+
+
+def surrogate_differential_evolution(
+    func: Callable[[np.ndarray], float],
+    bounds: Sequence[Tuple[float, float]],
+    popsize: int = 15,
+    maxiter: int = 1000,
+    tol: float = 0.01,
+    atol: float = 0.0,
+    mutation: Tuple[float, float] = (0.5, 1.0),
+    recombination: float = 0.7,
+    n_trials: int = 5,
+    eval_fraction: float = 0.2,
+    stagnation: int = 10,
+    polish: bool = True,
+    max_evaluations: Optional[int] = None,
+    max_points: int = 500,
+    seed: Optional[int] = None,
+) -> OptimizeResult:
+    """Minimize func with surrogate-assisted differential evolution.
+
+    :param popsize: population size is popsize * dimension (like scipy)
+    :param n_trials: trials per member screened by the surrogate
+    :param eval_fraction: maximal fraction of the population simulated per
+        generation
+    :param stagnation: generations without improvement of the best cost
+        required for convergence
+    :param polish: polish the best member with L-BFGS-B
+    :param max_evaluations: maximal number of evaluations of func
+    :param max_points: maximal number of points of the surrogate
+    :return: OptimizeResult with x, fun, nfev, nit, success and message
+    """
+    rng = np.random.default_rng(seed)
+    bounds = np.asarray(bounds, dtype=float)
+    lower, upper = bounds[:, 0], bounds[:, 1]
+    dim = len(bounds)
+    n_pop = max(5, popsize * dim)
+    n_eval = max(1, int(np.ceil(eval_fraction * n_pop)))
+    if max_evaluations is None:
+        max_evaluations = n_pop * (maxiter + 1)
+
+    U: List[np.ndarray] = []
+    F: List[float] = []
+
+    def evaluate(u: np.ndarray) -> float:
+        f = float(func(lower + u * (upper - lower)))
+        if not np.isfinite(f):
+            f = np.finfo(float).max / 1e10
+        U.append(u.copy())
+        F.append(f)
+        return f
+
+    # initial population (latin hypercube)
+    pop = qmc.LatinHypercube(d=dim, seed=rng).random(n_pop)
+    pop_f = np.array([evaluate(u) for u in pop])
+
+    message = "Maximum number of iterations has been exceeded."
+    success = False
+    nit = 0
+    f_best = np.min(pop_f)
+    n_stagnant = 0
+    for nit in range(1, maxiter + 1):
+        if (
+            n_stagnant >= stagnation
+            and np.std(pop_f) <= atol + tol * np.abs(np.mean(pop_f))
+        ):
+            message = "Optimization terminated successfully."
+            success = True
+            break
+        if len(F) >= max_evaluations:
+            message = "Maximum number of function evaluations has been exceeded."
+            break
+
+        surrogate = _Surrogate(np.array(U), np.array(F), max_points=max_points)
+
+        # DE/rand/1/bin trials with dithered mutation
+        trials = np.empty((n_pop, n_trials, dim))
+        for i in range(n_pop):
+            for k in range(n_trials):
+                r0, r1, r2 = rng.choice(
+                    [j for j in range(n_pop) if j != i], size=3, replace=False
+                )
+                scale = rng.uniform(*mutation)
+                mutant = pop[r0] + scale * (pop[r1] - pop[r2])
+                cross = rng.random(dim) < recombination
+                cross[rng.integers(dim)] = True
+                trial = np.where(cross, mutant, pop[i])
+                # out of bounds parameters are reinitialized (like scipy)
+                outside = (trial < 0.0) | (trial > 1.0)
+                trial[outside] = rng.random(np.count_nonzero(outside))
+                trials[i, k] = trial
+
+        # pre-screening: best trial per member, largest predicted improvements
+        predicted = surrogate(trials.reshape(-1, dim)).reshape(n_pop, n_trials)
+        k_best = np.argmin(predicted, axis=1)
+        candidates = trials[np.arange(n_pop), k_best]
+        improvement = pop_f - predicted[np.arange(n_pop), k_best]
+        screened = [i for i in np.argsort(-improvement)[:n_eval] if improvement[i] > 0]
+        for i in screened:
+            if len(F) >= max_evaluations:
+                break
+            f = evaluate(candidates[i])
+            if f <= pop_f[i]:
+                pop[i], pop_f[i] = candidates[i], f
+
+        # minimum of the surrogate near the best member
+        if len(F) < max_evaluations:
+            ibest = np.argmin(pop_f)
+            radius = np.maximum(np.std(pop, axis=0), 1e-6)
+            local_bounds = list(zip(
+                np.clip(pop[ibest] - radius, 0.0, 1.0),
+                np.clip(pop[ibest] + radius, 0.0, 1.0),
+            ))
+            local = minimize(
+                lambda u: float(surrogate(u)[0]), pop[ibest], method="L-BFGS-B",
+                bounds=local_bounds,
+            )
+            u_local = np.clip(local.x, 0.0, 1.0)
+            if not np.any(np.all(np.isclose(U, u_local, rtol=0, atol=1e-12), axis=1)):
+                f = evaluate(u_local)
+                if f < pop_f[ibest]:
+                    pop[ibest], pop_f[ibest] = u_local, f
+
+        if np.min(pop_f) < f_best - atol - tol * np.abs(f_best):
+            n_stagnant = 0
+        else:
+            n_stagnant += 1
+        f_best = min(f_best, np.min(pop_f))
+
+    ibest = np.argmin(pop_f)
+    if polish and len(F) < max_evaluations:
+        polished = minimize(
+            lambda u: evaluate(np.clip(u, 0.0, 1.0)) if len(F) < max_evaluations else np.inf,
+            pop[ibest], method="L-BFGS-B", bounds=[(0.0, 1.0)] * dim,
+        )
+        if polished.fun < pop_f[ibest]:
+            pop[ibest], pop_f[ibest] = np.clip(polished.x, 0.0, 1.0), polished.fun
+
+    return OptimizeResult(
+        x=lower + pop[ibest] * (upper - lower),
+        fun=pop_f[ibest],
+        nfev=len(F),
+        nit=nit,
+        success=success,
+        message=message,
+    )
+
+
+class SurrogateOptimizationProblem(OptimizationProblem):
+    """Optimization problem with surrogate-assisted differential evolution.
+
+    Differential evolution runs with the keyword `surrogate=True` use
+    `surrogate_differential_evolution` instead of scipy.
+    """
+
+    def _optimize_single(
+        self,
+        x0: np.ndarray = None,
+        algorithm=OptimizationAlgorithmType.LEAST_SQUARE,
+        **kwargs,
+    ):
+        """Run single optimization."""
+        surrogate = kwargs.pop("surrogate", False)
+        if not (surrogate and algorithm == OptimizationAlgorithmType.DIFFERENTIAL_EVOLUTION):
+            return super()._optimize_single(x0=x0, algorithm=algorithm, **kwargs)
+
+        self._trajectory = []
+        ts = time.time()
+        bounds_log = [
+            (np.log10(p.lower_bound), np.log10(p.upper_bound)) for p in self.parameters
+        ]
+        opt_result = surrogate_differential_evolution(
+            func=self.cost_least_square,
+            bounds=bounds_log,
+            # reproducible with the seed of the run
+            seed=np.random.randint(np.iinfo(np.int32).max),
+            **kwargs,
+        )
+        te = time.time()
+        logger.info(
+            f"Surrogate DE: {opt_result.nfev} simulations, {opt_result.nit} generations"
+        )
+        opt_result.x0 = x0  # store start value
+        opt_result.duration = te - ts
+        opt_result.cost = opt_result.fun
+        opt_result.x = np.power(10, opt_result.x)
+        return opt_result, deepcopy(self._trajectory)
@@ -1,4 +1,5 @@
-from typing import List, Type, Union
+from contextlib import nullcontext
+from typing import List, Optional, Type, Union
 
 from pkdb_models.models.edoxaban import (
     DATA_PATHS,
@@ -6,9 +7,14 @@ from pkdb_models.models.edoxaban import (
     EDOXABAN_PATH,
     RESULTS_PATH_SIMULATION,
 )
+from pkdb_models.models.edoxaban import instrumentation, model_cache, rendering
+from pkdb_models.models.edoxaban.backends import Backend, simulator_class
+from pkdb_models.models.edoxaban.parallel import SimulatorPool, run_experiments_pool
+from pkdb_models.models.edoxaban.result_cache import cached
+from pkdb_models.models.edoxaban.result_store import ResultStore
+from pkdb_models.models.edoxaban.solver_profiles import SolverProfile, get_solver_settings
 from sbmlsim.experiment import ExperimentRunner, SimulationExperiment
 from sbmlsim.report.experiment_report import ExperimentReport, ReportResults
-from sbmlsim.simulator.simulation_serial import SimulatorSerial
 from sbmlutils import log
 from sbmlutils.console import console
 
@@ -21,23 +27,40 @@ def run_experiments(
     ],
     output_dir: str,
     save_results: bool = False,
+    n_workers: int = 1,
+    backend: Backend = Backend.ROADRUNNER,
+    profile: SolverProfile = SolverProfile.REFERENCE,
+    cache: bool = False,
+    result_store: bool = False,
+    render_workers: int = 2,
 ):
-    """Execute given simulation experiment(s)."""
+    """Execute given simulation experiment(s).
+
+    With `n_workers > 1` multiple experiments are distributed over a process
+    pool; a single experiment splits its scans over the pool instead.
+    The `backend` selects the numerical solution of the model, the `profile`
+    the integrator tolerances. With `cache` unchanged simulations are loaded
+    from the result cache. With `result_store` the xarray results of all tasks
+    are written to the compressed store `results.zarr`.
+    With `render_workers > 0` figures of sequentially run experiments are
+    rendered by a process pool while the next experiment is simulated.
+    Timings per experiment and stage are written to `timings.json` and
+    added to the HTML report.
+    """
     output_path = RESULTS_PATH_SIMULATION / output_dir
-    simulator = SimulatorSerial(model=MODEL_PATH)
+    model_cache.install()
+    instrumentation.install()
+    rendering.install()
 
-    if isinstance(experiment_classes, SimulationExperiment):
+    if not isinstance(experiment_classes, list):
         experiment_classes = [experiment_classes]
 
-    runner = ExperimentRunner(
-        experiment_classes=experiment_classes,
+    runner_kwargs = dict(
         data_path=DATA_PATHS,
         base_path=EDOXABAN_PATH,
-        simulator=simulator,
-        absolute_tolerance=1e-10,
-        relative_tolerance=1e-10,
+        **get_solver_settings(profile),
     )
-    results = runner.run_experiments(
+    run_kwargs = dict(
         output_path=output_path,
         show_figures=True,
         save_results=save_results,
@@ -45,12 +68,71 @@ def run_experiments(
         reduced_selections=True,
     )
 
-    report_results = ReportResults()
-    for exp_result in results:
-        report_results.add_experiment_result(exp_result=exp_result)
+    store: Optional[ResultStore] = None
+    if result_store:
+        store = ResultStore(output_path / "results.zarr")
+        store.create()
+
+    if n_workers > 1 and len(experiment_classes) > 1:
+        report_results, timings = run_experiments_pool(
+            experiment_classes=experiment_classes,
+            n_workers=n_workers,
+            runner_kwargs={
+                **runner_kwargs,
+                "model_path": MODEL_PATH,
+                "simulator_class": simulator_class(backend),
+                "cache": cache,
+                "result_store_path": store.path if store else None,
+            },
+            run_kwargs={**run_kwargs, "show_figures": False},
+        )
+    else:
+        if n_workers > 1:
+            simulator_cls = cached(SimulatorPool) if cache else SimulatorPool
+            simulator = simulator_cls(
+                model=MODEL_PATH,
+                n_workers=n_workers,
+                worker_class=simulator_class(backend),
+            )
+        else:
+            simulator_cls = simulator_class(backend)
+            if cache:
+                simulator_cls = cached(simulator_cls)
+            simulator = simulator_cls(model=MODEL_PATH)
+
+        report_results = ReportResults()
+        timings = []
+        renderer = (
+            rendering.FigureRenderer(n_workers=render_workers)
+            if render_workers > 0 else nullcontext()
+        )
+        with renderer:
+            for experiment_class in experiment_classes:
+                with instrumentation.experiment(experiment_class.__name__) as experiment_timings:
+                    runner = ExperimentRunner(
+                        experiment_classes=[experiment_class],
+                        simulator=simulator,
+                        **runner_kwargs,
+                    )
+                    results = runner.run_experiments(**run_kwargs)
+                    if store:
+                        for exp_result in results:
+                            store.write_experiment(exp_result.experiment)
+                timings.append(experiment_timings)
+
+                for exp_result in results:
+                    report_results.add_experiment_result(exp_result=exp_result)
+
+        if isinstance(simulator, SimulatorPool):
+            simulator.shutdown()
+
+    # timings of the experiments
+    instrumentation.write_timings(timings, path=output_path / "timings.json")
+    console.print(instrumentation.timings_table(timings).to_string(index=False))
 
     # create HTML report
     report = ExperimentReport(report_results, metadata=None)
     report.create_report(output_path, report_type=ExperimentReport.ReportType.HTML)
+    instrumentation.add_timings_to_report(output_path / "index.html", timings)
 
     console.print("Successfully executed simulation experiments", style="success")
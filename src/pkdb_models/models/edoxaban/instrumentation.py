@@ -0,0 +1,266 @@
+"""Per-stage timing instrumentation of simulation experiments.
+
+Wall time, CPU time and peak memory are recorded per experiment and stage:
+
+* `model_loading`: loading/compiling the model (see `model_cache`),
+* `dataset_loading`: `datasets()` of the experiment,
+* `simulation`: integration of the timecourses and scans,
+* `pk`: PK/PD post-processing (`calculate_edoxaban_pk/pd`),
+* `figures`: `figures()` and `figures_mpl()` of the experiment,
+* `serialization`: remaining time of the runner (writing results, figures).
+
+Stage times are exclusive, i.e. the time of nested stages (e.g. PK
+calculation within figure creation) is only counted for the inner stage.
+A stage nested in the same stage (e.g. a simulator calling the timed
+`_timecourses` of its base class) is recorded once.
+
+Peak memory is the maximal increase of the memory allocated by Python and
+NumPy (`tracemalloc`) over the start of the stage, including nested stages.
+Memory allocated by roadrunner is not traced.
+
+Experiments are recorded with the `experiment` context manager, stages with
+`stage` or the `timed` decorator. Timings are written as JSON next to the
+results and added as table to the HTML report.
+"""
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from enum import Enum
+from functools import wraps
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+import pandas as pd
+from sbmlsim.simulator.simulation_serial import SimulatorSerial
+from sbmlutils import log
+
+logger = log.get_logger(__name__)
+
+
+class Stage(str, Enum):
+    """Stage of a simulation experiment."""
+
+    MODEL_LOADING = "model_loading"
+    DATASET_LOADING = "dataset_loading"
+    SIMULATION = "simulation"
+    PK = "pk"
+    FIGURES = "figures"
+    SERIALIZATION = "serialization"
+
+
+@dataclass
+class StageTiming:
+    """Timing of a stage, accumulated over all calls."""
+
+    wall_time: float = 0.0  # [s]
+    cpu_time: float = 0.0  # [s]
+    peak_memory: float = 0.0  # [MB] increase over the start of the stage
+    calls: int = 0
+
+
+@dataclass
+class ExperimentTimings:
+    """Timings of a single experiment."""
+
+    experiment: str
+    wall_time: float = 0.0  # [s]
+    cpu_time: float = 0.0  # [s]
+    peak_memory: float = 0.0  # [MB]
+    stages: Dict[str, StageTiming] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, d: Dict) -> "ExperimentTimings":
+        return cls(
+            experiment=d["experiment"],
+            wall_time=d["wall_time"],
+            cpu_time=d["cpu_time"],
+            peak_memory=d["peak_memory"],
+            stages={k: StageTiming(**v) for k, v in d["stages"].items()},
+        )
+
+
+# timings of the running experiment and stack of open stages
+_current: Optional[ExperimentTimings] = None
+_stack: List["_Frame"] = []
+
+
+@dataclass
+class _Frame:
+    """Open stage."""
+
+    name: Optional[Stage]
+    wall_start: float = field(default_factory=time.perf_counter)
+    cpu_start: float = field(default_factory=time.process_time)
+    memory_start: int = 0  # [bytes] traced memory at the start
+    memory_peak: int = 0  # [bytes] traced peak of closed nested stages
+    wall_children: float = 0.0
+    cpu_children: float = 0.0
+
+
+def _open_frame(name: Optional[Stage]) -> _Frame:
+    """Open frame, the traced peak of the parent is saved before the reset."""
+    current, peak = tracemalloc.get_traced_memory()
+    if _stack:
+        _stack[-1].memory_peak = max(_stack[-1].memory_peak, peak)
+    tracemalloc.reset_peak()
+    frame = _Frame(name=name, memory_start=current, memory_peak=current)
+    _stack.append(frame)
+    return frame
+
+
+def _close_frame(frame: _Frame) -> float:
+    """Close frame and return its peak memory increase [MB]."""
+    _stack.pop()
+    peak = max(frame.memory_peak, tracemalloc.get_traced_memory()[1])
+    if _stack:
+        _stack[-1].memory_peak = max(_stack[-1].memory_peak, peak)
+    tracemalloc.reset_peak()
+    return (peak - frame.memory_start) / 1024**2
+
+
+@contextmanager
+def stage(name: Stage) -> Iterator[None]:
+    """Record stage of the running experiment (no-op outside experiments)."""
+    if _current is None or (_stack and _stack[-1].name == name):
+        yield
+        return
+
+    frame = _open_frame(name)
+    try:
+        yield
+    finally:
+        memory = _close_frame(frame)
+        wall = time.perf_counter() - frame.wall_start
+        cpu = time.process_time() - frame.cpu_start
+        if _stack:
+            _stack[-1].wall_children += wall
+            _stack[-1].cpu_children += cpu
+        if _current is not None:
+            timing = _current.stages.setdefault(name.value, StageTiming())
+            timing.wall_time += wall - frame.wall_children
+            timing.cpu_time += cpu - frame.cpu_children
+            timing.peak_memory = max(timing.peak_memory, memory)
+            timing.calls += 1
+
+
+def timed(name: Stage) -> Callable:
+    """Decorator recording the function as stage."""
+    def decorator(f: Callable) -> Callable:
+        if getattr(f, "__stage__", None) is not None:
+            return f
+
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return f(*args, **kwargs)
+
+        wrapper.__stage__ = name
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def experiment(name: str) -> Iterator[ExperimentTimings]:
+    """Record timings of the experiment.
+
+    Memory allocations are traced during the experiment (`tracemalloc`).
+    """
+    global _current
+    timings = ExperimentTimings(experiment=name)
+    _current = timings
+    _stack.clear()
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    frame = _open_frame(name=None)
+    try:
+        yield timings
+    finally:
+        timings.peak_memory = _close_frame(frame)
+        timings.wall_time = time.perf_counter() - frame.wall_start
+        timings.cpu_time = time.process_time() - frame.cpu_start
+        if not tracing:
+            tracemalloc.stop()
+        timings.stages[Stage.SERIALIZATION.value] = StageTiming(
+            wall_time=timings.wall_time - sum(s.wall_time for s in timings.stages.values()),
+            cpu_time=timings.cpu_time - sum(s.cpu_time for s in timings.stages.values()),
+            peak_memory=timings.peak_memory,
+            calls=1,
+        )
+        _current = None
+
+
+def instrument_experiment(experiment_class: type) -> None:
+    """Record datasets and figures of the experiment class as stages."""
+    for method, name in [
+        ("datasets", Stage.DATASET_LOADING),
+        ("figures", Stage.FIGURES),
+        ("figures_mpl", Stage.FIGURES),
+    ]:
+        if method in experiment_class.__dict__:
+            setattr(experiment_class, method, timed(name)(experiment_class.__dict__[method]))
+
+
+def install() -> None:
+    """Record the simulations of all simulators as stage."""
+    SimulatorSerial._timecourses = timed(Stage.SIMULATION)(SimulatorSerial._timecourses)
+
+
+def timings_table(timings: List[ExperimentTimings]) -> pd.DataFrame:
+    """Table of the timings with one row per experiment and stage."""
+    rows = []
+    for t in timings:
+        for stage_name in Stage:
+            timing = t.stages.get(stage_name.value)
+            if timing is None:
+                continue
+            rows.append({
+                "experiment": t.experiment,
+                "stage": stage_name.value,
+                "wall_time [s]": timing.wall_time,
+                "cpu_time [s]": timing.cpu_time,
+                "peak_memory [MB]": timing.peak_memory,
+                "calls": timing.calls,
+            })
+        rows.append({
+            "experiment": t.experiment,
+            "stage": "total",
+            "wall_time [s]": t.wall_time,
+            "cpu_time [s]": t.cpu_time,
+            "peak_memory [MB]": t.peak_memory,
+            "calls": 1,
+        })
+    return pd.DataFrame(rows)
+
+
+def write_timings(timings: List[ExperimentTimings], path: Path) -> None:
+    """Write timings as JSON."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f_json:
+        json.dump([asdict(t) for t in timings], f_json, indent=2)
+
+
+def read_timings(path: Path) -> List[ExperimentTimings]:
+    """Read timings from JSON."""
+    with open(path, "r") as f_json:
+        return [ExperimentTimings.from_dict(d) for d in json.load(f_json)]
+
+
+def add_timings_to_report(report_path: Path, timings: List[ExperimentTimings]) -> None:
+    """Add the timings table to the HTML report."""
+    if not report_path.exists():
+        logger.warning(f"No HTML report '{report_path}', timings not added.")
+        return
+
+    html = report_path.read_text(encoding="utf-8")
+    table = timings_table(timings).to_html(
+        index=False, float_format=lambda x: f"{x:.3f}", classes="table table-sm"
+    )
+    section = f'<div id="timings">\n<h2>Timings</h2>\n{table}\n</div>\n'
+    if "</body>" in html:
+        html = html.replace("</body>", f"{section}</body>", 1)
+    else:
+        html += section
+    report_path.write_text(html, encoding="utf-8")
@@ -0,0 +1,197 @@
+"""Memory-mapped scan results.
+
+Scan results hold all selections for all time points and scan points in
+memory. `run_scan_memmap` simulates the points of a scan in chunks and
+writes every chunk into `.npy` files as soon as it is simulated, the result
+is backed by read-only memory maps. The peak memory is therefore bounded by
+a chunk of timecourses, independent of the number of scan points. Slicing by
+scan dimension and selection (`xres[sid].sel({scandim: k})`) only pages in
+the accessed data, so the resident memory is bounded by the data in use and
+can be reclaimed by the operating system.
+
+Experiments stream their scans into memory maps with `memmap_scans = True`.
+Every run writes into its own directory (`run_path`), so that concurrent
+runs of the same experiment do not interfere.
+
+The files are described by `index.json`, so that results written by one
+process can be opened by another process without copying
+(`open_memmap_dataset`). `memmap_result` writes an existing `XResult`.
+"""
+import json
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+from sbmlsim.result import XResult
+from sbmlsim.simulation import ScanSim
+from sbmlsim.units import UnitsInformation
+from sbmlutils import log
+
+logger = log.get_logger(__name__)
+
+# number of scan points simulated before they are written to the memory maps
+scan_chunk_size: int = 256
+
+
+def run_path(path: Path) -> Path:
+    """Create new directory for the results of a run in `path`."""
+    path.mkdir(parents=True, exist_ok=True)
+    return Path(tempfile.mkdtemp(dir=path, prefix="run_"))
+
+
+def _units(uinfo: UnitsInformation, sid: str) -> str:
+    try:
+        return str(uinfo[sid])
+    except KeyError:
+        return ""
+
+
+def _write_index(path: Path, index: Dict) -> None:
+    with open(path / "index.json", "w") as f_json:
+        json.dump(index, f_json, indent=2)
+
+
+class MemmapScanWriter:
+    """Writes the timecourses of a scan into memory maps.
+
+    The memory maps are created with the first timecourse, which determines
+    the time points and selections.
+    """
+
+    def __init__(self, path: Path, scan: ScanSim):
+        self.path = path
+        self.dims: List[str] = ["_time"] + [dim.dimension for dim in scan.dimensions]
+        self.scan_shape: List[int] = [len(dim) for dim in scan.dimensions]
+        self.coords: Dict[str, List] = {
+            dim.dimension: np.asarray(dim.index).tolist() for dim in scan.dimensions
+        }
+        self._memmaps: Dict[str, np.memmap] = {}
+        path.mkdir(parents=True)
+
+    def write(self, index: Tuple[int, ...], df: pd.DataFrame) -> None:
+        """Write timecourse of the scan point `index`."""
+        if not self._memmaps:
+            self.coords = {"_time": df.time.values.tolist(), **self.coords}
+            for k, sid in enumerate(df.columns):
+                self._memmaps[sid] = np.lib.format.open_memmap(
+                    self.path / f"{k}.npy",
+                    mode="w+",
+                    dtype=float,
+                    shape=tuple([len(df)] + self.scan_shape),
+                )
+        for sid, mm in self._memmaps.items():
+            mm[(slice(None),) + tuple(index)] = df[sid].values
+
+    def close(self, uinfo: UnitsInformation) -> XResult:
+        """Flush memory maps and return result backed by memory maps."""
+        index = {"coords": self.coords, "data_vars": {}}
+        for k, (sid, mm) in enumerate(self._memmaps.items()):
+            mm.flush()
+            index["data_vars"][sid] = {
+                "file": f"{k}.npy",
+                "dims": self.dims,
+                "units": _units(uinfo, sid),
+            }
+        self._memmaps = {}
+        _write_index(self.path, index)
+
+        xres = XResult(xdataset=open_memmap_dataset(self.path), uinfo=uinfo)
+        xres.memmapped = True
+        return xres
+
+
+def run_scan_memmap(
+    simulator, scan: ScanSim, path: Path, chunk_size: int = scan_chunk_size
+) -> XResult:
+    """Simulate scan in chunks which are streamed into memory maps in `path`.
+
+    Equivalent to `simulator.run_scan(scan)`, the chunks are simulated with
+    `_timecourses` of the simulator (pooled, batched or cached).
+    """
+    scan.normalize(uinfo=simulator.uinfo)
+    indices, simulations = scan.to_simulations()
+    chunk_size = max(chunk_size, getattr(simulator, "n_workers", 1))
+
+    writer = MemmapScanWriter(path=path, scan=scan)
+    for start in range(0, len(simulations), chunk_size):
+        chunk = simulations[start:start + chunk_size]
+        for k, df in enumerate(simulator._timecourses(chunk), start=start):
+            writer.write(indices[k], df)
+
+    return writer.close(uinfo=simulator.uinfo)
+
+
+class MemmapScanSimulator:
+    """Simulator streaming the scans into memory maps in `path`.
+
+    All other attributes are the ones of the wrapped simulator.
+    """
+
+    def __init__(self, simulator, path: Path):
+        self.simulator = simulator
+        self.path = path
+        self._count = 0
+
+    def __getattr__(self, name: str):
+        return getattr(self.simulator, name)
+
+    def run_scan(self, scan: ScanSim) -> XResult:
+        self._count += 1
+        return run_scan_memmap(
+            self.simulator, scan, path=self.path / f"scan_{self._count}"
+        )
+
+
+def memmap_result(xres: XResult, path: Path) -> XResult:
+    """Write result to `path` and return result backed by memory maps.
+
+    The result is held in memory, use `run_scan_memmap` to bound the memory
+    of the simulation.
+    """
+    path.mkdir(parents=True)
+
+    xds: xr.Dataset = xres.xds
+    index = {
+        "coords": {name: np.asarray(c.values).tolist() for name, c in xds.coords.items()},
+        "data_vars": {},
+    }
+    for k, (sid, da) in enumerate(xds.data_vars.items()):
+        filename = f"{k}.npy"
+        mm = np.lib.format.open_memmap(
+            path / filename, mode="w+", dtype=da.dtype, shape=da.shape
+        )
+        mm[...] = da.values
+        mm.flush()
+        del mm
+        index["data_vars"][sid] = {
+            "file": filename,
+            "dims": list(da.dims),
+            "units": _units(xres.uinfo, sid),
+        }
+    _write_index(path, index)
+
+    xres_mmap = XResult(xdataset=open_memmap_dataset(path), uinfo=xres.uinfo)
+    xres_mmap.memmapped = True
+    return xres_mmap
+
+
+def open_memmap_dataset(path: Path) -> xr.Dataset:
+    """Open memory-mapped result (read-only, without copying)."""
+    with open(path / "index.json", "r") as f_json:
+        index = json.load(f_json)
+
+    data_vars = {}
+    for sid, info in index["data_vars"].items():
+        data = np.load(path / info["file"], mmap_mode="r")
+        data_vars[sid] = xr.Variable(
+            dims=info["dims"], data=data, attrs={"units": info["units"]}
+        )
+    return xr.Dataset(data_vars=data_vars, coords=index["coords"])
+
+
+def is_scan(xres: XResult) -> bool:
+    """Result has scan dimensions."""
+    return len(xres._redop_dims()) > 0 and xres.xds.sizes[xres._redop_dims()[0]] > 1
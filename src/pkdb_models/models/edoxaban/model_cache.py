@@ -0,0 +1,141 @@
+"""Persistent cache of compiled roadrunner models.
+
+Loading `edoxaban_body_flat.xml` requires parsing the SBML and JIT compiling
+the model, which happens for every experiment in every process. The compiled
+model is stored as roadrunner state in `CACHE_PATH_MODELS`, keyed by the
+content hash of the SBML and the roadrunner/sbmlsim versions. Loading the
+state instead of the SBML reduces the cold start to milliseconds.
+
+Entries of a regenerated SBML file have a new content hash and are not used
+anymore; stale entries are removed by `invalidate` (called by the factory).
+
+The cache is activated with `install`, which replaces the roadrunner loader
+of sbmlsim models for SBML files on disk. It supersedes the `.state` files of
+sbmlsim, which are written next to the SBML file and are not keyed by the
+sbmlsim version. If the cache can not be written (read-only installation),
+models are compiled without caching.
+"""
+import hashlib
+import os
+import tempfile
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import Dict, Optional
+
+import roadrunner
+from sbmlutils import log
+
+try:
+    from sbmlsim.model.rr_model import RoadrunnerSBMLModel
+except ImportError:
+    # released sbmlsim (0.3.0) names the module model_roadrunner
+    from sbmlsim.model.model_roadrunner import RoadrunnerSBMLModel
+
+from pkdb_models.models.edoxaban import CACHE_PATH_MODELS
+from pkdb_models.models.edoxaban.instrumentation import Stage, stage
+
+logger = log.get_logger(__name__)
+
+# content hashes of SBML files by (path, mtime, size)
+_hashes: Dict[tuple, str] = {}
+
+# original sbmlsim loader, set by install
+_load_roadrunner_model = None
+
+
+def _package_version(package: str) -> str:
+    try:
+        return version(package)
+    except PackageNotFoundError:
+        return "unknown"
+
+
+def sbml_hash(sbml_path: Path) -> str:
+    """SHA256 content hash of the SBML file."""
+    sbml_path = Path(sbml_path)
+    stat = sbml_path.stat()
+    key = (str(sbml_path.resolve()), stat.st_mtime_ns, stat.st_size)
+    if key not in _hashes:
+        _hashes[key] = hashlib.sha256(sbml_path.read_bytes()).hexdigest()
+    return _hashes[key]
+
+
+def cache_key(sbml_path: Path) -> str:
+    """Cache key of the compiled model: content hash and simulator versions."""
+    versions = f"rr{roadrunner.__version__}_sbmlsim{_package_version('sbmlsim')}"
+    digest = hashlib.sha256(
+        f"{sbml_hash(sbml_path)}|{versions}".encode("utf-8")
+    ).hexdigest()
+    return f"{Path(sbml_path).stem}_{digest[:16]}"
+
+
+def state_path(sbml_path: Path, cache_path: Path = CACHE_PATH_MODELS) -> Path:
+    """Path of the cached roadrunner state for the SBML file."""
+    return cache_path / f"{cache_key(sbml_path)}.rr"
+
+
+def load_roadrunner(
+    sbml_path: Path, cache_path: Path = CACHE_PATH_MODELS
+) -> roadrunner.RoadRunner:
+    """Load compiled model from cache, compiles and stores it on a miss."""
+    path = state_path(sbml_path, cache_path=cache_path)
+    if path.exists():
+        r = roadrunner.RoadRunner()
+        try:
+            r.loadState(str(path))
+            return r
+        except RuntimeError as err:
+            logger.warning(f"Corrupt model cache entry '{path}', recompiling: {err}")
+            path.unlink(missing_ok=True)
+
+    r = roadrunner.RoadRunner(str(sbml_path))
+
+    # atomic write, concurrent processes can populate the cache
+    try:
+        cache_path.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=cache_path, suffix=".tmp")
+    except OSError as err:
+        logger.warning(f"Model cache '{cache_path}' not writable, model not cached: {err}")
+        return r
+    os.close(fd)
+    try:
+        r.saveState(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    logger.info(f"Compiled model cached: '{path}'")
+    return r
+
+
+def invalidate(sbml_path: Path, cache_path: Path = CACHE_PATH_MODELS) -> int:
+    """Remove all cache entries of the SBML file.
+
+    :return: number of removed entries
+    """
+    if not cache_path.exists():
+        return 0
+    count = 0
+    for path in cache_path.glob(f"{Path(sbml_path).stem}_*.rr"):
+        path.unlink(missing_ok=True)
+        count += 1
+    return count
+
+
+def _cached_load_roadrunner_model(cls, source, *args, **kwargs) -> roadrunner.RoadRunner:
+    """Loader for sbmlsim models using the model cache for SBML files."""
+    path: Optional[Path] = getattr(source, "path", None)
+    with stage(Stage.MODEL_LOADING):
+        if path is not None and Path(path).suffix == ".xml" and Path(path).exists():
+            return load_roadrunner(Path(path))
+        return _load_roadrunner_model(source, *args, **kwargs)
+
+
+def install() -> None:
+    """Use the model cache for all sbmlsim models of this process."""
+    global _load_roadrunner_model
+    if _load_roadrunner_model is None:
+        _load_roadrunner_model = RoadrunnerSBMLModel.load_roadrunner_model
+        RoadrunnerSBMLModel.load_roadrunner_model = classmethod(
+            _cached_load_roadrunner_model
+        )
@@ -0,0 +1,97 @@
+"""Comparison of the reduced quasi-steady-state model with the full model.
+
+The reduced model (`MODEL_PATH_QSS`, see `models.reduction`) replaces the fast
+equilibration between liver plasma and liver tissue by algebraic relations.
+The reduced model is validated against the full model (`validate_qss_model`)
+before the comparison. The comparison reports per study the maximal relative
+deviation of all trajectories and of the PK/PD parameters of the reduced from
+the full model together with the speedup. The reduced model gives no
+measurable speedup (see `models.reduction`). Experiments opt into the reduced
+model via
+
+    class MyStudy(EdoxabanSimulationExperiment):
+        model_path = MODEL_PATH_QSS
+
+Usage:
+
+    run_edoxaban --action compare_qss
+"""
+from pathlib import Path
+from typing import List, Type
+
+import pandas as pd
+from sbmlsim.experiment import SimulationExperiment
+from sbmlutils import log
+from sbmlutils.console import console
+
+from pkdb_models.models.edoxaban import MODEL_PATH, MODEL_PATH_QSS
+from pkdb_models.models.edoxaban.backends import Backend
+from pkdb_models.models.edoxaban.models.reduction import validate_qss_model
+from pkdb_models.models.edoxaban.solver_profiles import (
+    SolverProfile,
+    max_relative_error,
+    pk_parameters,
+    simulate_experiments,
+)
+
+logger = log.get_logger(__name__)
+
+
+def compare_qss_model(
+    experiment_classes: List[Type[SimulationExperiment]],
+    profile: SolverProfile = SolverProfile.PRODUCTION,
+    backend: Backend = Backend.ROADRUNNER,
+    model_path_qss: Path = MODEL_PATH_QSS,
+    atol: float = 1e-12,
+) -> pd.DataFrame:
+    """Deviation of the reduced model from the full model.
+
+    :return: DataFrame with max trajectory/PK errors and speedup per experiment
+    """
+    if not model_path_qss.exists():
+        raise IOError(
+            f"Reduced model '{model_path_qss}' does not exist, "
+            f"create models with 'run_edoxaban --action factory'."
+        )
+    validate_qss_model(MODEL_PATH, sbml_qss_path=model_path_qss)
+    results_full = simulate_experiments(
+        experiment_classes=experiment_classes,
+        profile=profile,
+        backend=backend,
+        model_path=MODEL_PATH,
+    )
+    results_qss = simulate_experiments(
+        experiment_classes=experiment_classes,
+        profile=profile,
+        backend=backend,
+        model_path=model_path_qss,
+    )
+
+    rows = []
+    for sid, full in results_full.items():
+        qss = results_qss[sid]
+        rows.append({
+            "experiment": sid,
+            "trajectory_error": max_relative_error(
+                qss["trajectories"], full["trajectories"], atol=atol
+            ),
+            "pk_error": max_relative_error(
+                pk_parameters(qss["trajectories"]),
+                pk_parameters(full["trajectories"]),
+                atol=atol,
+            ),
+            "time_full": full["time"],
+            "time_qss": qss["time"],
+            "speedup": full["time"] / qss["time"],
+        })
+
+    df = pd.DataFrame(rows)
+    total = df[["time_full", "time_qss"]].sum()
+    console.rule("Reduced (quasi-steady state) vs full model", style="white")
+    console.print(df.to_string(index=False))
+    console.print(
+        f"max trajectory error: {df.trajectory_error.max():.3e}, "
+        f"max pk/pd error: {df.pk_error.max():.3e}, "
+        f"speedup: {total.time_full / total.time_qss:.2f}"
+    )
+    return df
@@ -0,0 +1,378 @@
+"""Code generation of a NumPy ODE module from the flattened model.
+
+The generated module only depends on NumPy and contains
+
+* the layout of the state vector `x_ids` (species amounts, rate rule
+  variables) and parameter vector `p_ids` with defaults `p0`,
+* `initial_state(p)`: initial amounts for the parameters,
+* `rhs(t, x, p)`: right-hand side of the ODE system,
+* `jacobian(t, x, p)`: Jacobian of `rhs` with respect to `x`,
+* `assignments(t, x, p)`: values of all assignment rules,
+* `outputs(t, x, p)`: selections in roadrunner notation (`S` amount,
+  `[S]` concentration, parameters, assignment rules).
+
+All functions are vectorized: `x` and `p` are arrays of shape (n,) or
+(n, batch), real or complex. The Jacobian is calculated by complex-step
+differentiation of `rhs`, which is exact up to rounding for the arithmetic
+of the model (also used for parameter sensitivities, see `ode_simulator`).
+
+Supported are models with species, compartments, parameters, reactions,
+assignment rules and rate rules (no events, algebraic rules, delays or
+function definitions).
+"""
+from pathlib import Path
+from typing import Dict, List, Set
+
+import libsbml
+from sbmlutils import log
+
+logger = log.get_logger(__name__)
+
+_binary_operators = {
+    libsbml.AST_PLUS: "+",
+    libsbml.AST_MINUS: "-",
+    libsbml.AST_TIMES: "*",
+    libsbml.AST_DIVIDE: "/",
+    libsbml.AST_POWER: "**",
+    libsbml.AST_FUNCTION_POWER: "**",
+}
+_relational_operators = {
+    libsbml.AST_RELATIONAL_EQ: "==",
+    libsbml.AST_RELATIONAL_NEQ: "!=",
+    libsbml.AST_RELATIONAL_GT: ">",
+    libsbml.AST_RELATIONAL_GEQ: ">=",
+    libsbml.AST_RELATIONAL_LT: "<",
+    libsbml.AST_RELATIONAL_LEQ: "<=",
+}
+_functions = {
+    libsbml.AST_FUNCTION_EXP: "np.exp",
+    libsbml.AST_FUNCTION_LN: "np.log",
+    libsbml.AST_FUNCTION_ABS: "np.abs",
+    libsbml.AST_FUNCTION_FLOOR: "np.floor",
+    libsbml.AST_FUNCTION_CEILING: "np.ceil",
+    libsbml.AST_FUNCTION_SIN: "np.sin",
+    libsbml.AST_FUNCTION_COS: "np.cos",
+    libsbml.AST_FUNCTION_TAN: "np.tan",
+}
+
+
+def _number(value: float) -> str:
+    """Python code of a number (NaN and infinity via numpy)."""
+    value = float(value)
+    if value != value:
+        return "np.nan"
+    if value in (float("inf"), float("-inf")):
+        return "np.inf" if value > 0 else "(-np.inf)"
+    return repr(value)
+
+
+class OdeCodeGenerator:
+    """Generates the NumPy ODE module of an SBML model."""
+
+    def __init__(self, sbml_path: Path):
+        doc: libsbml.SBMLDocument = libsbml.readSBMLFromFile(str(sbml_path))
+        if doc.getNumErrors(libsbml.LIBSBML_SEV_ERROR) > 0:
+            raise ValueError(f"Invalid SBML '{sbml_path}': {doc.getErrorLog().toString()}")
+        self.sbml_path = Path(sbml_path)
+        self.model: libsbml.Model = doc.getModel()
+        m = self.model
+        for name, n in [
+            ("events", m.getNumEvents()),
+            ("function definitions", m.getNumFunctionDefinitions()),
+            ("initial assignments", m.getNumInitialAssignments()),
+            ("constraints", m.getNumConstraints()),
+        ]:
+            if n:
+                raise NotImplementedError(f"Code generation does not support {name}.")
+
+        self.assignment_rules: Dict[str, libsbml.ASTNode] = {}
+        self.rate_rules: Dict[str, libsbml.ASTNode] = {}
+        for rule in m.getListOfRules():
+            if rule.isAssignment():
+                self.assignment_rules[rule.getVariable()] = rule.getMath()
+            elif rule.isRate():
+                self.rate_rules[rule.getVariable()] = rule.getMath()
+            else:
+                raise NotImplementedError("Code generation does not support algebraic rules.")
+
+        # state vector: species amounts and rate rule variables
+        self.x_ids: List[str] = [
+            s.getId() for s in m.getListOfSpecies()
+            if s.getId() not in self.assignment_rules
+        ] + list(self.rate_rules)
+
+        # parameter vector: constant compartments and parameters
+        self.p_ids: List[str] = [
+            obj.getId()
+            for obj in list(m.getListOfCompartments()) + list(m.getListOfParameters())
+            if obj.getId() not in self.assignment_rules and obj.getId() not in self.rate_rules
+        ]
+        self.reaction_ids = [r.getId() for r in m.getListOfReactions()]
+        for r in m.getListOfReactions():
+            if r.getKineticLaw().getNumLocalParameters():
+                raise NotImplementedError("Code generation does not support local parameters.")
+        self.computed_order = self._computed_order()
+
+    # --- symbols ---
+    def _species_concentration(self, sid: str) -> bool:
+        s: libsbml.Species = self.model.getSpecies(sid)
+        return s is not None and not s.getHasOnlySubstanceUnits()
+
+    def symbol(self, sid: str) -> str:
+        """Code of a symbol in math (species in concentration or amount)."""
+        if sid in self.assignment_rules or sid in self.reaction_ids:
+            return f"v_{sid}"
+        if sid in self.x_ids:
+            code = f"x[{self.x_ids.index(sid)}]"
+            if self._species_concentration(sid):
+                compartment = self.model.getSpecies(sid).getCompartment()
+                code = f"({code} / {self.symbol(compartment)})"
+            return code
+        if sid in self.p_ids:
+            return f"p[{self.p_ids.index(sid)}]"
+        raise ValueError(f"Unknown symbol '{sid}'")
+
+    def _dependencies(self, ast: libsbml.ASTNode) -> Set[str]:
+        deps = set()
+        if ast.getType() == libsbml.AST_NAME:
+            deps.add(ast.getName())
+        for k in range(ast.getNumChildren()):
+            deps.update(self._dependencies(ast.getChild(k)))
+        return deps
+
+    def _computed_math(self, sid: str) -> libsbml.ASTNode:
+        if sid in self.assignment_rules:
+            return self.assignment_rules[sid]
+        return self.model.getReaction(sid).getKineticLaw().getMath()
+
+    def _computed_order(self) -> List[str]:
+        """Assignment rules and reaction rates in dependency order."""
+        computed = list(self.assignment_rules) + self.reaction_ids
+        deps = {}
+        for sid in computed:
+            d = self._dependencies(self._computed_math(sid))
+            # species concentrations depend on the compartment size
+            for dep in list(d):
+                if self._species_concentration(dep) and dep in self.x_ids:
+                    d.add(self.model.getSpecies(dep).getCompartment())
+            deps[sid] = {dep for dep in d if dep in computed}
+
+        order: List[str] = []
+        done: Set[str] = set()
+        visiting: Set[str] = set()
+
+        def visit(sid: str) -> None:
+            if sid in done:
+                return
+            if sid in visiting:
+                raise ValueError(f"Cyclic assignment rules: '{sid}'")
+            visiting.add(sid)
+            for dep in sorted(deps[sid]):
+                visit(dep)
+            visiting.remove(sid)
+            done.add(sid)
+            order.append(sid)
+
+        for sid in computed:
+            visit(sid)
+        return order
+
+    # --- math ---
+    def code(self, ast: libsbml.ASTNode) -> str:
+        """Python code of the math."""
+        t = ast.getType()
+        children = [self.code(ast.getChild(k)) for k in range(ast.getNumChildren())]
+
+        if t == libsbml.AST_INTEGER:
+            return _number(ast.getInteger())
+        if t in (libsbml.AST_REAL, libsbml.AST_REAL_E, libsbml.AST_RATIONAL):
+            return _number(ast.getReal())
+        if t == libsbml.AST_NAME:
+            return self.symbol(ast.getName())
+        if t == libsbml.AST_NAME_TIME:
+            return "t"
+        if t == libsbml.AST_NAME_AVOGADRO:
+            return "6.02214076e+23"
+        if t == libsbml.AST_CONSTANT_PI:
+            return "np.pi"
+        if t == libsbml.AST_CONSTANT_E:
+            return "np.e"
+        if t == libsbml.AST_CONSTANT_TRUE:
+            return "1.0"
+        if t == libsbml.AST_CONSTANT_FALSE:
+            return "0.0"
+        if t == libsbml.AST_MINUS and len(children) == 1:
+            return f"(-{children[0]})"
+        if t in (libsbml.AST_PLUS, libsbml.AST_TIMES) and len(children) == 0:
+            return "0.0" if t == libsbml.AST_PLUS else "1.0"
+        if t in _binary_operators:
+            return "(" + f" {_binary_operators[t]} ".join(children) + ")"
+        if t in _relational_operators:
+            return f"({children[0]} {_relational_operators[t]} {children[1]})"
+        if t == libsbml.AST_LOGICAL_AND:
+            return "np.logical_and(" + ", ".join(children) + ")"
+        if t == libsbml.AST_LOGICAL_OR:
+            return "np.logical_or(" + ", ".join(children) + ")"
+        if t == libsbml.AST_LOGICAL_NOT:
+            return f"np.logical_not({children[0]})"
+        if t in _functions:
+            return f"{_functions[t]}({children[0]})"
+        if t == libsbml.AST_FUNCTION_LOG:
+            if len(children) == 1:
+                return f"np.log10({children[0]})"
+            return f"(np.log({children[1]}) / np.log({children[0]}))"
+        if t == libsbml.AST_FUNCTION_ROOT:
+            if len(children) == 1:
+                return f"np.sqrt({children[0]})"
+            return f"({children[1]} ** (1.0 / {children[0]}))"
+        if t == libsbml.AST_FUNCTION_MAX:
+            return "np.maximum(" + ", ".join(children) + ")"
+        if t == libsbml.AST_FUNCTION_MIN:
+            return "np.minimum(" + ", ".join(children) + ")"
+        if t == libsbml.AST_FUNCTION_PIECEWISE:
+            code = children[-1] if len(children) % 2 == 1 else "np.nan"
+            pairs = children[: len(children) - len(children) % 2]
+            for k in range(len(pairs) - 2, -1, -2):
+                code = f"np.where({pairs[k + 1]}, {pairs[k]}, {code})"
+            return code
+        raise NotImplementedError(
+            f"Unsupported math in code generation: '{libsbml.formulaToL3String(ast)}'"
+        )
+
+    # --- module ---
+    def _initial_amount(self, s: libsbml.Species) -> str:
+        if s.isSetInitialAmount():
+            return _number(s.getInitialAmount())
+        concentration = s.getInitialConcentration() if s.isSetInitialConcentration() else 0.0
+        return f"{_number(concentration)} * {self.symbol(s.getCompartment())}"
+
+    def _computed_lines(self) -> List[str]:
+        return [
+            f"    v_{sid} = {self.code(self._computed_math(sid))}"
+            for sid in self.computed_order
+        ]
+
+    def _derivatives(self) -> Dict[str, List[str]]:
+        terms: Dict[str, List[str]] = {sid: [] for sid in self.x_ids}
+        for r in self.model.getListOfReactions():
+            for reference, sign in [
+                *[(ref, "-") for ref in r.getListOfReactants()],
+                *[(ref, "+") for ref in r.getListOfProducts()],
+            ]:
+                sid = reference.getSpecies()
+                if sid not in terms or self.model.getSpecies(sid).getBoundaryCondition():
+                    continue
+                stoichiometry = reference.getStoichiometry()
+                factor = "" if stoichiometry == 1.0 else f"{stoichiometry!r} * "
+                terms[sid].append(f"{sign} {factor}v_{r.getId()}")
+        for sid, ast in self.rate_rules.items():
+            terms[sid].append(f"+ {self.code(ast)}")
+        return terms
+
+    def module_code(self) -> str:
+        m = self.model
+        p0 = []
+        for sid in self.p_ids:
+            obj = m.getCompartment(sid) or m.getParameter(sid)
+            value = obj.getSize() if isinstance(obj, libsbml.Compartment) else obj.getValue()
+            p0.append(_number(value))
+
+        concentration_ids = [sid for sid in self.x_ids if self._species_concentration(sid)]
+        compartments = {
+            sid: m.getSpecies(sid).getCompartment() for sid in concentration_ids
+        }
+
+        initial = []
+        for sid in self.x_ids:
+            s = m.getSpecies(sid)
+            if s is not None:
+                initial.append(self._initial_amount(s))
+            else:
+                initial.append(_number(m.getParameter(sid).getValue()))
+
+        lines = [
+            f'"""ODE system of \'{self.sbml_path.name}\'.',
+            "",
+            "Generated by pkdb_models.models.edoxaban.models.codegen, do not edit.",
+            '"""',
+            "import numpy as np",
+            "",
+            f"x_ids = {self.x_ids!r}",
+            f"p_ids = {self.p_ids!r}",
+            f"y_ids = {list(self.assignment_rules)!r}",
+            "# species in concentration (selections `[S]`)",
+            f"concentration_ids = {concentration_ids!r}",
+            "# compartments of the species in concentration",
+            f"compartments = {compartments!r}",
+            "",
+            "p0 = np.array([",
+            *[f"    {value},  # {sid}" for sid, value in zip(self.p_ids, p0)],
+            "])",
+            "",
+            "",
+            "def initial_state(p=p0):",
+            '    """Initial state (amounts) for the parameters."""',
+            "    x = np.zeros((len(x_ids),) + np.shape(p[0]), dtype=np.result_type(p[0], float))",
+            *self._computed_lines(),
+            *[f"    x[{k}] = {code}" for k, code in enumerate(initial)],
+            "    return x",
+            "",
+            "",
+            "def rhs(t, x, p):",
+            '    """Right-hand side dx/dt (amounts per time)."""',
+            *self._computed_lines(),
+            "    dx = np.zeros_like(x)",
+        ]
+        for k, (sid, terms) in enumerate(self._derivatives().items()):
+            if terms:
+                lines.append(f"    dx[{k}] = " + " ".join(terms).lstrip("+ "))
+        lines += [
+            "    return dx",
+            "",
+            "",
+            "def jacobian(t, x, p, h=1e-30):",
+            '    """Jacobian d(rhs)/dx by complex-step differentiation (x of shape (n,))."""',
+            "    n = len(x)",
+            "    X = x[:, np.newaxis] + 1j * h * np.eye(n)",
+            "    P = np.broadcast_to(p[:, np.newaxis], (len(p), n))",
+            "    return rhs(t, X, P).imag / h",
+            "",
+            "",
+            "def assignments(t, x, p):",
+            '    """Values of the assignment rules (y_ids)."""',
+            *self._computed_lines(),
+            "    return np.array([",
+            *[f"        v_{sid} + 0 * x[0]," for sid in self.assignment_rules],
+            "    ])",
+            "",
+            "",
+            "def outputs(t, x, p):",
+            '    """Selections in roadrunner notation."""',
+            "    y = assignments(t, x, p)",
+            "    values = {\"time\": t + 0 * x[0]}",
+            "    for k, sid in enumerate(p_ids):",
+            "        values[sid] = p[k] + 0 * x[0]",
+            "    for k, sid in enumerate(y_ids):",
+            "        values[sid] = y[k]",
+            "    for k, sid in enumerate(x_ids):",
+            "        values[sid] = x[k]",
+            "    for sid in concentration_ids:",
+            "        values[f\"[{sid}]\"] = values[sid] / values[compartments[sid]]",
+            "    return values",
+            "",
+        ]
+        return "\n".join(lines)
+
+
+def create_ode_module(sbml_path: Path, module_path: Path) -> Path:
+    """Write the NumPy ODE module of the SBML model."""
+    generator = OdeCodeGenerator(sbml_path)
+    code = generator.module_code()
+    compile(code, str(module_path), "exec")
+    with open(module_path, "w") as f:
+        f.write(code)
+    logger.info(
+        f"ODE module: {len(generator.x_ids)} states, {len(generator.p_ids)} parameters "
+        f"-> '{module_path}'"
+    )
+    return module_path
@@ -9,6 +9,12 @@ from pkdb_models.models.edoxaban.models.model_liver import model_liver
 from pkdb_models.models.edoxaban.models.model_intestine import model_intestine
 from pkdb_models.models.edoxaban.models.model_body import model_body
 from pkdb_models.models.edoxaban.models.model_coagulation import model_coagulation
+from pkdb_models.models.edoxaban.models.codegen import create_ode_module
+from pkdb_models.models.edoxaban.models.reduction import (
+    create_qss_model,
+    validate_qss_model,
+)
+from pkdb_models.models.edoxaban import model_cache
 
 model_coagulation.species = [s for s in model_coagulation.species if s.sid != "Cve_edo"]
 
@@ -99,6 +105,7 @@ def create_models(
     sbml_path = results["edoxaban_body"]["path"]
     sbml_path_flat = model_output_dir / f"{model_body.sid}_flat.xml"
     flatten_sbml(sbml_path, sbml_flat_path=sbml_path_flat)
+    model_cache.invalidate(sbml_path_flat)
 
     results["edoxaban_body_flat"] = {
         "path": sbml_path_flat,
@@ -122,6 +129,18 @@ def create_models(
         ),
     }
 
+    # create NumPy ODE module (see ode_simulator)
+    create_ode_module(
+        sbml_path_flat, module_path=model_output_dir / f"{model_body.sid}_flat_ode.py"
+    )
+
+    # create reduced whole-body model (fast equilibration in quasi-steady state),
+    # a derived model variant which is not part of the omex
+    sbml_path_qss = model_output_dir / f"{model_body.sid}_qss_flat.xml"
+    create_qss_model(sbml_path_flat, sbml_qss_path=sbml_path_qss)
+    validate_qss_model(sbml_path_flat, sbml_qss_path=sbml_path_qss)
+    model_cache.invalidate(sbml_path_qss)
+
     # create omex
     omex = Omex()
     for info in results.values():
@@ -0,0 +1,197 @@
+"""Quasi-steady-state reduction of the flattened whole-body model.
+
+The transport of edoxaban and metabolites between liver plasma and liver
+tissue (EDOIM, M4EX, M6EX, MXEX) is modelled with `Vmax = 1000 /min`
+assuming fast equilibration. These fast reactions make the flattened model
+stiff without changing the pharmacokinetics.
+
+In the reduced model every fast exchange `plasma <-> tissue` is replaced by
+the algebraic relation `tissue = plasma` (rapid equilibrium lumping):
+
+* the fast transport reaction is removed,
+* the plasma species is moved into the lumped compartment with the volume
+  of plasma and tissue, so the plasma species holds the total amount,
+* all other reactions of the tissue species act on the plasma species,
+* the tissue species is calculated by an assignment rule.
+
+The initial concentrations of plasma and tissue species must be equilibrated.
+
+`validate_qss_model` compares the reduced with the full model for oral and
+intravenous dosing; the factory only writes reduced models which pass it.
+
+The reduced model is accurate (maximal relative deviation 6.6e-4) but not
+faster: CVODE integrates the stiff exchanges implicitly, and the 24 hr
+simulation of an oral dose takes the same time as with the full model
+(1.3 ms vs 1.3 ms for 100 and 3.7 ms vs 3.8 ms for 1000 output points,
+roadrunner, tolerances 1e-8/1e-10, best of 50). 37 of the 58 eigenvalues
+of the Jacobian are faster than 1/min (blood flows of all organs), removing
+the four fastest ones does not change the step size control noticeably.
+"""
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List
+
+import libsbml
+import numpy as np
+import roadrunner
+from sbmlutils import log
+
+logger = log.get_logger(__name__)
+
+
+@dataclass(frozen=True)
+class FastExchange:
+    """Fast equilibrating transport between plasma and tissue species."""
+
+    reaction: str
+    plasma: str
+    tissue: str
+
+
+fast_exchanges: List[FastExchange] = [
+    FastExchange(reaction="LI__EDOIM", plasma="Cli_plasma_edo", tissue="LI__edo"),
+    FastExchange(reaction="LI__M4EX", plasma="Cli_plasma_m4", tissue="LI__m4"),
+    FastExchange(reaction="LI__M6EX", plasma="Cli_plasma_m6", tissue="LI__m6"),
+    FastExchange(reaction="LI__MXEX", plasma="Cli_plasma_mx", tissue="LI__mx"),
+]
+
+
+def _lumped_compartment(
+    model: libsbml.Model, plasma_cid: str, tissue_cid: str
+) -> str:
+    """Create (or get) the lumped compartment of plasma and tissue."""
+    cid = f"{plasma_cid}_{tissue_cid}"
+    if model.getCompartment(cid) is None:
+        plasma_c: libsbml.Compartment = model.getCompartment(plasma_cid)
+        c: libsbml.Compartment = model.createCompartment()
+        c.setId(cid)
+        c.setName(f"{plasma_c.getName()} and tissue (equilibrated)")
+        c.setSpatialDimensions(plasma_c.getSpatialDimensions())
+        c.setUnits(plasma_c.getUnits())
+        c.setSize(plasma_c.getSize() + model.getCompartment(tissue_cid).getSize())
+        c.setConstant(False)
+
+        rule: libsbml.AssignmentRule = model.createAssignmentRule()
+        rule.setVariable(cid)
+        rule.setMath(libsbml.parseL3Formula(f"{plasma_cid} + {tissue_cid}"))
+
+    return cid
+
+
+def _reduce_exchange(model: libsbml.Model, exchange: FastExchange) -> None:
+    """Replace the fast exchange by the equilibrium tissue = plasma."""
+    plasma: libsbml.Species = model.getSpecies(exchange.plasma)
+    tissue: libsbml.Species = model.getSpecies(exchange.tissue)
+    if plasma is None or tissue is None or model.getReaction(exchange.reaction) is None:
+        raise ValueError(f"Fast exchange not in model: {exchange}")
+
+    plasma.setCompartment(
+        _lumped_compartment(model, plasma.getCompartment(), tissue.getCompartment())
+    )
+    model.removeReaction(exchange.reaction)
+
+    # `Reaction.renameSIdRefs` does not rename the species of species references
+    for reaction in model.getListOfReactions():
+        for reference in (
+            list(reaction.getListOfReactants())
+            + list(reaction.getListOfProducts())
+            + list(reaction.getListOfModifiers())
+        ):
+            if reference.getSpecies() == exchange.tissue:
+                reference.setSpecies(exchange.plasma)
+        if reaction.isSetKineticLaw() and reaction.getKineticLaw().isSetMath():
+            math: libsbml.ASTNode = reaction.getKineticLaw().getMath().deepCopy()
+            math.renameSIdRefs(exchange.tissue, exchange.plasma)
+            reaction.getKineticLaw().setMath(math)
+
+    tissue.unsetInitialConcentration()
+    rule: libsbml.AssignmentRule = model.createAssignmentRule()
+    rule.setVariable(exchange.tissue)
+    rule.setMath(libsbml.parseL3Formula(exchange.plasma))
+
+
+def create_qss_model(
+    sbml_path: Path,
+    sbml_qss_path: Path,
+    exchanges: List[FastExchange] = fast_exchanges,
+) -> Path:
+    """Create reduced model with fast exchanges in quasi-steady state."""
+    doc: libsbml.SBMLDocument = libsbml.readSBMLFromFile(str(sbml_path))
+    model: libsbml.Model = doc.getModel()
+
+    for exchange in exchanges:
+        _reduce_exchange(model, exchange)
+
+    model.setId(f"{model.getId()}_qss")
+    model.setName(f"{model.getName()} (quasi-steady state)")
+
+    doc.checkInternalConsistency()
+    if doc.getNumErrors(libsbml.LIBSBML_SEV_ERROR) > 0:
+        raise ValueError(
+            f"Invalid reduced model '{sbml_qss_path}':\n{doc.getErrorLog().toString()}"
+        )
+
+    libsbml.writeSBMLToFile(doc, str(sbml_qss_path))
+    logger.info(f"Reduced model created: '{sbml_qss_path}'")
+    return sbml_qss_path
+
+
+validation_selections: List[str] = [
+    "time",
+    "[Cve_edo]",
+    "[Cve_m4]",
+    "[Cve_m6]",
+    "Aurine_edo",
+    "Aurine_m4",
+    "Afeces_edo",
+    "PT",
+    "aPTT",
+]
+validation_changes: List[Dict[str, float]] = [
+    {"PODOSE_edo": 60.0},
+    {"IVDOSE_edo": 30.0},
+]
+
+
+def validate_qss_model(
+    sbml_path: Path,
+    sbml_qss_path: Path,
+    rtol: float = 1e-3,
+    atol: float = 1e-8,
+) -> float:
+    """Check that the reduced model reproduces the full model.
+
+    Oral and intravenous doses are simulated over 24 hr with both models.
+    Deviations are measured relative to the maximum of every output.
+
+    :return: maximal relative deviation
+    :raises ValueError: if the deviation exceeds rtol
+    """
+    r_full = roadrunner.RoadRunner(str(sbml_path))
+    r_qss = roadrunner.RoadRunner(str(sbml_qss_path))
+
+    error = 0.0
+    for changes in validation_changes:
+        results = []
+        for r in [r_full, r_qss]:
+            r.resetAll()
+            integrator = r.getIntegrator()
+            integrator.setValue("relative_tolerance", 1e-10)
+            integrator.setValue("absolute_tolerance", 1e-14)
+            for key, value in changes.items():
+                r.setValue(key, value)
+            r.timeCourseSelections = validation_selections
+            results.append(np.asarray(r.simulate(start=0, end=24 * 60, steps=480)))
+
+        full, qss = results
+        scale = np.max(np.abs(full), axis=0) + atol
+        deviation = float(np.max(np.abs(qss - full) / scale))
+        logger.debug(f"Reduced model deviation {changes}: {deviation:.3e}")
+        error = max(error, deviation)
+
+    if not error <= rtol:
+        raise ValueError(
+            f"Reduced model '{sbml_qss_path}' deviates from '{sbml_path}': "
+            f"{error:.3e} > {rtol:.1e}"
+        )
+    return error
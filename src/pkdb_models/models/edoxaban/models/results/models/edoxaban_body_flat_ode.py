@@ -0,0 +1,664 @@
+"""ODE system of 'edoxaban_body_flat.xml'.
+
+Generated by pkdb_models.models.edoxaban.models.codegen, do not edit.
+"""
+import numpy as np
+
+x_ids = ['Cki_plasma_edo', 'Cli_plasma_edo', 'Clu_plasma_edo', 'Cgu_plasma_edo', 'Cre_plasma_edo', 'Car_edo', 'Cve_edo', 'Cpo_edo', 'Chv_edo', 'Aurine_edo', 'Afeces_edo', 'Cki_plasma_m4', 'Cli_plasma_m4', 'Clu_plasma_m4', 'Cgu_plasma_m4', 'Cre_plasma_m4', 'Car_m4', 'Cve_m4', 'Cpo_m4', 'Chv_m4', 'Aurine_m4', 'Afeces_m4', 'Cki_plasma_m6', 'Cli_plasma_m6', 'Clu_plasma_m6', 'Cgu_plasma_m6', 'Cre_plasma_m6', 'Car_m6', 'Cve_m6', 'Cpo_m6', 'Chv_m6', 'Aurine_m6', 'Afeces_m6', 'Cki_plasma_mx', 'Cli_plasma_mx', 'Clu_plasma_mx', 'Cgu_plasma_mx', 'Cre_plasma_mx', 'Car_mx', 'Cve_mx', 'Cpo_mx', 'Chv_mx', 'Aurine_mx', 'Afeces_mx', 'Cgu_m4', 'Cgu_m6', 'Cgu_mx', 'LI__edo', 'LI__m4', 'LI__m4_bi', 'LI__m6', 'LI__m6_bi', 'LI__mx', 'LI__mx_bi', 'GU__edo_stomach', 'GU__edo_lumen', 'IVDOSE_edo', 'PODOSE_edo']
+p_ids = ['Vplasma', 'Vurine', 'Vfeces', 'Vstomach', 'LI__Vmem', 'LI__Vbi', 'GU__Vstomach', 'GU__Vapical', 'PT_ref', 'aPTT_ref', 'Emax_PT', 'EC50_edo_PT', 'Emax_aPTT', 'EC50_edo_aPTT', 'Emax_Xa', 'EC50_edo_Xa', 'BW', 'HEIGHT', 'COBW', 'f_cardiac_function', 'Fblood', 'HCT', 'FVgu', 'FVki', 'FVli', 'FVlu', 'FVve', 'FVar', 'FVpo', 'FVhv', 'FQgu', 'FQki', 'FQh', 'FQlu', 'f_cirrhosis', 'Mr_edo', 'ti_edo', 'Ri_edo', 'Mr_m4', 'Mr_m6', 'Mr_mx', 'KI__BSA', 'KI__f_renal_function', 'KI__egfr_healthy', 'KI__EDOEX_k', 'KI__M4EX_k', 'KI__M6EX_k', 'KI__MXEX_k', 'LI__MXEXBI_k', 'LI__EDOIM_Vmax', 'LI__EDO2M4_Vmax', 'LI__EDO2M6_f', 'LI__EDO2MX_f', 'LI__M4EX_Vmax', 'LI__M6EX_Vmax', 'LI__MXEX_Vmax', 'GU__F_edo_abs', 'GU__EDOABS_k', 'GU__f_absorption', 'GU__Ka_dis_edo', 'GU__Mr_edo', 'GU__M4EXC_k', 'GU__M6EXC_k', 'GU__MXEXC_k']
+y_ids = ['PT_change', 'PT_ratio', 'aPTT_change', 'aPTT_ratio', 'PT', 'aPTT', 'Xa_inhibition', 'f_shunts', 'f_tissue_loss', 'FVre', 'FQre', 'BSA', 'CO', 'QC', 'Vgu', 'Vki', 'Vli', 'Vlu', 'Vre', 'Vve', 'Var', 'Vpo', 'Vhv', 'Qgu', 'Qki', 'Qh', 'Qha', 'Qlu', 'Qre', 'Qpo', 'Vki_plasma', 'Vki_tissue', 'Vli_plasma', 'Vli_tissue', 'Vlu_plasma', 'Vlu_tissue', 'Vgu_plasma', 'Vgu_tissue', 'Vre_plasma', 'Vre_tissue', 'Ki_edo', 'Cve_edo_total', 'Afeces_edo_total', 'Aurine_edo_total', 'KI__egfr', 'KI__crcl', 'GU__absorption_edo']
+# species in concentration (selections `[S]`)
+concentration_ids = ['Cki_plasma_edo', 'Cli_plasma_edo', 'Clu_plasma_edo', 'Cgu_plasma_edo', 'Cre_plasma_edo', 'Car_edo', 'Cve_edo', 'Cpo_edo', 'Chv_edo', 'Cki_plasma_m4', 'Cli_plasma_m4', 'Clu_plasma_m4', 'Cgu_plasma_m4', 'Cre_plasma_m4', 'Car_m4', 'Cve_m4', 'Cpo_m4', 'Chv_m4', 'Cki_plasma_m6', 'Cli_plasma_m6', 'Clu_plasma_m6', 'Cgu_plasma_m6', 'Cre_plasma_m6', 'Car_m6', 'Cve_m6', 'Cpo_m6', 'Chv_m6', 'Cki_plasma_mx', 'Cli_plasma_mx', 'Clu_plasma_mx', 'Cgu_plasma_mx', 'Cre_plasma_mx', 'Car_mx', 'Cve_mx', 'Cpo_mx', 'Chv_mx', 'Cgu_m4', 'Cgu_m6', 'Cgu_mx', 'LI__edo', 'LI__m4', 'LI__m6', 'LI__mx', 'GU__edo_lumen']
+# compartments of the species in concentration
+compartments = {'Cki_plasma_edo': 'Vki_plasma', 'Cli_plasma_edo': 'Vli_plasma', 'Clu_plasma_edo': 'Vlu_plasma', 'Cgu_plasma_edo': 'Vgu_plasma', 'Cre_plasma_edo': 'Vre_plasma', 'Car_edo': 'Var', 'Cve_edo': 'Vve', 'Cpo_edo': 'Vpo', 'Chv_edo': 'Vhv', 'Cki_plasma_m4': 'Vki_plasma', 'Cli_plasma_m4': 'Vli_plasma', 'Clu_plasma_m4': 'Vlu_plasma', 'Cgu_plasma_m4': 'Vgu_plasma', 'Cre_plasma_m4': 'Vre_plasma', 'Car_m4': 'Var', 'Cve_m4': 'Vve', 'Cpo_m4': 'Vpo', 'Chv_m4': 'Vhv', 'Cki_plasma_m6': 'Vki_plasma', 'Cli_plasma_m6': 'Vli_plasma', 'Clu_plasma_m6': 'Vlu_plasma', 'Cgu_plasma_m6': 'Vgu_plasma', 'Cre_plasma_m6': 'Vre_plasma', 'Car_m6': 'Var', 'Cve_m6': 'Vve', 'Cpo_m6': 'Vpo', 'Chv_m6': 'Vhv', 'Cki_plasma_mx': 'Vki_plasma', 'Cli_plasma_mx': 'Vli_plasma', 'Clu_plasma_mx': 'Vlu_plasma', 'Cgu_plasma_mx': 'Vgu_plasma', 'Cre_plasma_mx': 'Vre_plasma', 'Car_mx': 'Var', 'Cve_mx': 'Vve', 'Cpo_mx': 'Vpo', 'Chv_mx': 'Vhv', 'Cgu_m4': 'Vgu', 'Cgu_m6': 'Vgu', 'Cgu_mx': 'Vgu', 'LI__edo': 'Vli_tissue', 'LI__m4': 'Vli_tissue', 'LI__m6': 'Vli_tissue', 'LI__mx': 'Vli_tissue', 'GU__edo_lumen': 'Vgu'}
+
+p0 = np.array([
+    5.0,  # Vplasma
+    1.0,  # Vurine
+    1.0,  # Vfeces
+    1.0,  # Vstomach
+    np.nan,  # LI__Vmem
+    1.0,  # LI__Vbi
+    1.0,  # GU__Vstomach
+    np.nan,  # GU__Vapical
+    12.5,  # PT_ref
+    28.4,  # aPTT_ref
+    3.55309,  # Emax_PT
+    0.00358,  # EC50_edo_PT
+    0.950019,  # Emax_aPTT
+    0.0004089,  # EC50_edo_aPTT
+    0.686093,  # Emax_Xa
+    0.0002959,  # EC50_edo_Xa
+    75.0,  # BW
+    170.0,  # HEIGHT
+    1.548,  # COBW
+    1.0,  # f_cardiac_function
+    0.02,  # Fblood
+    0.51,  # HCT
+    0.0171,  # FVgu
+    0.0044,  # FVki
+    0.021,  # FVli
+    0.0076,  # FVlu
+    0.0514,  # FVve
+    0.0257,  # FVar
+    0.001,  # FVpo
+    0.001,  # FVhv
+    0.18,  # FQgu
+    0.19,  # FQki
+    0.215,  # FQh
+    1.0,  # FQlu
+    0.0,  # f_cirrhosis
+    548.058,  # Mr_edo
+    10.0,  # ti_edo
+    0.0,  # Ri_edo
+    521.0,  # Mr_m4
+    534.0,  # Mr_m6
+    521.0,  # Mr_mx
+    1.73,  # KI__BSA
+    1.0,  # KI__f_renal_function
+    100.0,  # KI__egfr_healthy
+    0.16,  # KI__EDOEX_k
+    0.15,  # KI__M4EX_k
+    0.15,  # KI__M6EX_k
+    0.15,  # KI__MXEX_k
+    9.99999999999998e-05,  # LI__MXEXBI_k
+    1000.0,  # LI__EDOIM_Vmax
+    0.1,  # LI__EDO2M4_Vmax
+    0.378694158075601,  # LI__EDO2M6_f
+    5.50143266475645,  # LI__EDO2MX_f
+    1000.0,  # LI__M4EX_Vmax
+    1000.0,  # LI__M6EX_Vmax
+    1000.0,  # LI__MXEX_Vmax
+    0.82,  # GU__F_edo_abs
+    0.05,  # GU__EDOABS_k
+    1.0,  # GU__f_absorption
+    0.15,  # GU__Ka_dis_edo
+    548.058,  # GU__Mr_edo
+    0.1,  # GU__M4EXC_k
+    0.1,  # GU__M6EXC_k
+    0.1,  # GU__MXEXC_k
+])
+
+
+def initial_state(p=p0):
+    """Initial state (amounts) for the parameters."""
+    x = np.zeros((len(x_ids),) + np.shape(p[0]), dtype=np.result_type(p[0], float))
+    v_Vve = ((p[16] * p[26]) - ((((p[26] / (p[27] + p[26])) * p[16]) * p[20]) * ((1.0 - p[26]) - p[27])))
+    v_PT = (p[8] * (1.0 + ((p[10] * (x[6] / v_Vve)) / ((x[6] / v_Vve) + p[11]))))
+    v_PT_change = (v_PT - p[8])
+    v_PT_ratio = (v_PT / p[8])
+    v_aPTT = (p[9] * (1.0 + ((p[12] * (x[6] / v_Vve)) / ((x[6] / v_Vve) + p[13]))))
+    v_aPTT_change = (v_aPTT - p[9])
+    v_aPTT_ratio = (v_aPTT / p[9])
+    v_Xa_inhibition = ((p[14] * (x[6] / v_Vve)) / ((x[6] / v_Vve) + p[15]))
+    v_f_shunts = p[34]
+    v_f_tissue_loss = p[34]
+    v_FVre = (1.0 - (((((p[22] + p[23]) + p[24]) + p[25]) + p[26]) + p[27]))
+    v_FQre = (1.0 - (p[31] + p[32]))
+    v_BSA = ((0.024265 * ((p[16] / 1.0) ** 0.5378)) * ((p[17] / 1.0) ** 0.3964))
+    v_CO = ((p[19] * p[16]) * p[18])
+    v_QC = ((v_CO / 1000.0) * 60.0)
+    v_Vgu = (p[16] * p[22])
+    v_Vki = (p[16] * p[23])
+    v_Vli = (p[16] * p[24])
+    v_Vlu = (p[16] * p[25])
+    v_Vre = (p[16] * v_FVre)
+    v_Var = ((p[16] * p[27]) - ((((p[27] / (p[27] + p[26])) * p[16]) * p[20]) * ((1.0 - p[26]) - p[27])))
+    v_Vpo = ((1.0 - p[21]) * ((p[16] * p[28]) - ((((p[28] / (((p[27] + p[26]) + p[28]) + p[29])) * p[16]) * p[20]) * (1.0 - (((p[27] + p[26]) + p[28]) + p[29])))))
+    v_Vhv = ((1.0 - p[21]) * ((p[16] * p[29]) - ((((p[29] / (((p[27] + p[26]) + p[28]) + p[29])) * p[16]) * p[20]) * (1.0 - (((p[27] + p[26]) + p[28]) + p[29])))))
+    v_Qgu = (v_QC * p[30])
+    v_Qki = (v_QC * p[31])
+    v_Qh = (v_QC * p[32])
+    v_Qha = (v_Qh - v_Qgu)
+    v_Qlu = (v_QC * p[33])
+    v_Qre = (v_QC * v_FQre)
+    v_Qpo = v_Qgu
+    v_Vki_plasma = ((v_Vki * p[20]) * (1.0 - p[21]))
+    v_Vki_tissue = (v_Vki * (1.0 - p[20]))
+    v_Vli_plasma = ((v_Vli * p[20]) * (1.0 - p[21]))
+    v_Vli_tissue = ((v_Vli * (1.0 - v_f_tissue_loss)) * (1.0 - p[20]))
+    v_Vlu_plasma = ((v_Vlu * p[20]) * (1.0 - p[21]))
+    v_Vlu_tissue = (v_Vlu * (1.0 - p[20]))
+    v_Vgu_plasma = ((v_Vgu * p[20]) * (1.0 - p[21]))
+    v_Vgu_tissue = (v_Vgu * (1.0 - p[20]))
+    v_Vre_plasma = ((v_Vre * p[20]) * (1.0 - p[21]))
+    v_Vre_tissue = (v_Vre * (1.0 - p[20]))
+    v_Ki_edo = ((0.693 / p[36]) * 60.0)
+    v_Cve_edo_total = ((((x[6] / v_Vve) + (x[17] / v_Vve)) + (x[28] / v_Vve)) + (x[39] / v_Vve))
+    v_Afeces_edo_total = (((x[10] + x[21]) + x[32]) + x[43])
+    v_Aurine_edo_total = (((x[9] + x[20]) + x[31]) + x[42])
+    v_KI__egfr = (p[42] * p[43])
+    v_KI__crcl = (((v_KI__egfr * p[41]) / 1.73) * 1.1)
+    v_GU__absorption_edo = (((p[58] * p[57]) * v_Vgu) * (x[55] / v_Vgu))
+    v_iv_edo = ((v_Ki_edo * x[56]) / p[35])
+    v_Flow_ar_ki_edo = (v_Qki * (x[5] / v_Var))
+    v_Flow_ki_ve_edo = (v_Qki * (x[0] / v_Vki_plasma))
+    v_Flow_arli_li_edo = (((1.0 - v_f_shunts) * v_Qha) * (x[5] / v_Var))
+    v_Flow_arli_hv_edo = ((v_f_shunts * v_Qha) * (x[5] / v_Var))
+    v_Flow_po_li_edo = (((1.0 - v_f_shunts) * v_Qpo) * (x[7] / v_Vpo))
+    v_Flow_po_hv_edo = ((v_f_shunts * v_Qpo) * (x[7] / v_Vpo))
+    v_Flow_li_hv_edo = (((1.0 - v_f_shunts) * (v_Qpo + v_Qha)) * (x[1] / v_Vli_plasma))
+    v_Flow_hv_ve_edo = (v_Qh * (x[8] / v_Vhv))
+    v_Flow_ve_lu_edo = (v_Qlu * (x[6] / v_Vve))
+    v_Flow_lu_ar_edo = (v_Qlu * (x[2] / v_Vlu_plasma))
+    v_Flow_ar_gu_edo = (v_Qgu * (x[5] / v_Var))
+    v_Flow_gu_po_edo = (v_Qgu * (x[3] / v_Vgu_plasma))
+    v_Flow_ar_re_edo = (v_Qre * (x[5] / v_Var))
+    v_Flow_re_ve_edo = (v_Qre * (x[4] / v_Vre_plasma))
+    v_Flow_ar_ki_m4 = (v_Qki * (x[16] / v_Var))
+    v_Flow_ki_ve_m4 = (v_Qki * (x[11] / v_Vki_plasma))
+    v_Flow_arli_li_m4 = (((1.0 - v_f_shunts) * v_Qha) * (x[16] / v_Var))
+    v_Flow_arli_hv_m4 = ((v_f_shunts * v_Qha) * (x[16] / v_Var))
+    v_Flow_po_li_m4 = (((1.0 - v_f_shunts) * v_Qpo) * (x[18] / v_Vpo))
+    v_Flow_po_hv_m4 = ((v_f_shunts * v_Qpo) * (x[18] / v_Vpo))
+    v_Flow_li_hv_m4 = (((1.0 - v_f_shunts) * (v_Qpo + v_Qha)) * (x[12] / v_Vli_plasma))
+    v_Flow_hv_ve_m4 = (v_Qh * (x[19] / v_Vhv))
+    v_Flow_ve_lu_m4 = (v_Qlu * (x[17] / v_Vve))
+    v_Flow_lu_ar_m4 = (v_Qlu * (x[13] / v_Vlu_plasma))
+    v_Flow_ar_gu_m4 = (v_Qgu * (x[16] / v_Var))
+    v_Flow_gu_po_m4 = (v_Qgu * (x[14] / v_Vgu_plasma))
+    v_Flow_ar_re_m4 = (v_Qre * (x[16] / v_Var))
+    v_Flow_re_ve_m4 = (v_Qre * (x[15] / v_Vre_plasma))
+    v_Flow_ar_ki_m6 = (v_Qki * (x[27] / v_Var))
+    v_Flow_ki_ve_m6 = (v_Qki * (x[22] / v_Vki_plasma))
+    v_Flow_arli_li_m6 = (((1.0 - v_f_shunts) * v_Qha) * (x[27] / v_Var))
+    v_Flow_arli_hv_m6 = ((v_f_shunts * v_Qha) * (x[27] / v_Var))
+    v_Flow_po_li_m6 = (((1.0 - v_f_shunts) * v_Qpo) * (x[29] / v_Vpo))
+    v_Flow_po_hv_m6 = ((v_f_shunts * v_Qpo) * (x[29] / v_Vpo))
+    v_Flow_li_hv_m6 = (((1.0 - v_f_shunts) * (v_Qpo + v_Qha)) * (x[23] / v_Vli_plasma))
+    v_Flow_hv_ve_m6 = (v_Qh * (x[30] / v_Vhv))
+    v_Flow_ve_lu_m6 = (v_Qlu * (x[28] / v_Vve))
+    v_Flow_lu_ar_m6 = (v_Qlu * (x[24] / v_Vlu_plasma))
+    v_Flow_ar_gu_m6 = (v_Qgu * (x[27] / v_Var))
+    v_Flow_gu_po_m6 = (v_Qgu * (x[25] / v_Vgu_plasma))
+    v_Flow_ar_re_m6 = (v_Qre * (x[27] / v_Var))
+    v_Flow_re_ve_m6 = (v_Qre * (x[26] / v_Vre_plasma))
+    v_Flow_ar_ki_mx = (v_Qki * (x[38] / v_Var))
+    v_Flow_ki_ve_mx = (v_Qki * (x[33] / v_Vki_plasma))
+    v_Flow_arli_li_mx = (((1.0 - v_f_shunts) * v_Qha) * (x[38] / v_Var))
+    v_Flow_arli_hv_mx = ((v_f_shunts * v_Qha) * (x[38] / v_Var))
+    v_Flow_po_li_mx = (((1.0 - v_f_shunts) * v_Qpo) * (x[40] / v_Vpo))
+    v_Flow_po_hv_mx = ((v_f_shunts * v_Qpo) * (x[40] / v_Vpo))
+    v_Flow_li_hv_mx = (((1.0 - v_f_shunts) * (v_Qpo + v_Qha)) * (x[34] / v_Vli_plasma))
+    v_Flow_hv_ve_mx = (v_Qh * (x[41] / v_Vhv))
+    v_Flow_ve_lu_mx = (v_Qlu * (x[39] / v_Vve))
+    v_Flow_lu_ar_mx = (v_Qlu * (x[35] / v_Vlu_plasma))
+    v_Flow_ar_gu_mx = (v_Qgu * (x[38] / v_Var))
+    v_Flow_gu_po_mx = (v_Qgu * (x[36] / v_Vgu_plasma))
+    v_Flow_ar_re_mx = (v_Qre * (x[38] / v_Var))
+    v_Flow_re_ve_mx = (v_Qre * (x[37] / v_Vre_plasma))
+    v_KI__EDOEX = (((p[42] * v_Vki_tissue) * p[44]) * (x[0] / v_Vki_plasma))
+    v_KI__M4EX = (((p[42] * v_Vki_tissue) * p[45]) * (x[11] / v_Vki_plasma))
+    v_KI__M6EX = (((p[42] * v_Vki_tissue) * p[46]) * (x[22] / v_Vki_plasma))
+    v_KI__MXEX = (((p[42] * v_Vki_tissue) * p[47]) * (x[33] / v_Vki_plasma))
+    v_LI__EDOIM = ((p[49] * v_Vli_tissue) * ((x[1] / v_Vli_plasma) - (x[47] / v_Vli_tissue)))
+    v_LI__EDO2M4 = ((p[50] * v_Vli_tissue) * (x[47] / v_Vli_tissue))
+    v_LI__EDO2M6 = (((p[51] * p[50]) * v_Vli_tissue) * (x[47] / v_Vli_tissue))
+    v_LI__EDO2MX = (((p[52] * p[50]) * v_Vli_tissue) * (x[47] / v_Vli_tissue))
+    v_LI__M4EX = ((p[53] * v_Vli_tissue) * ((x[48] / v_Vli_tissue) - (x[12] / v_Vli_plasma)))
+    v_LI__M6EX = ((p[54] * v_Vli_tissue) * ((x[50] / v_Vli_tissue) - (x[23] / v_Vli_plasma)))
+    v_LI__MXEX = ((p[55] * v_Vli_tissue) * ((x[52] / v_Vli_tissue) - (x[34] / v_Vli_plasma)))
+    v_LI__M4EXBI = ((p[48] * v_Vli_tissue) * (x[48] / v_Vli_tissue))
+    v_LI__M4EXEHC = v_LI__M4EXBI
+    v_LI__M6EXBI = ((p[48] * v_Vli_tissue) * (x[50] / v_Vli_tissue))
+    v_LI__M6EXEHC = v_LI__M6EXBI
+    v_LI__MXEXBI = ((p[48] * v_Vli_tissue) * (x[52] / v_Vli_tissue))
+    v_LI__MXEXEHC = v_LI__MXEXBI
+    v_GU__EDOABS = (p[56] * v_GU__absorption_edo)
+    v_GU__EDOEXC = ((1.0 - p[56]) * v_GU__absorption_edo)
+    v_GU__M4EXC = (((p[58] * p[61]) * v_Vgu) * (x[44] / v_Vgu))
+    v_GU__M6EXC = (((p[58] * p[62]) * v_Vgu) * (x[45] / v_Vgu))
+    v_GU__MXEXC = (((p[58] * p[63]) * v_Vgu) * (x[46] / v_Vgu))
+    v_GU__dissolution_edo = (((p[59] / 60.0) * x[57]) / p[60])
+    x[0] = 0.0 * v_Vki_plasma
+    x[1] = 0.0 * v_Vli_plasma
+    x[2] = 0.0 * v_Vlu_plasma
+    x[3] = 0.0 * v_Vgu_plasma
+    x[4] = 0.0 * v_Vre_plasma
+    x[5] = 0.0 * v_Var
+    x[6] = 0.0 * v_Vve
+    x[7] = 0.0 * v_Vpo
+    x[8] = 0.0 * v_Vhv
+    x[9] = 0.0 * p[1]
+    x[10] = 0.0 * p[2]
+    x[11] = 0.0 * v_Vki_plasma
+    x[12] = 0.0 * v_Vli_plasma
+    x[13] = 0.0 * v_Vlu_plasma
+    x[14] = 0.0 * v_Vgu_plasma
+    x[15] = 0.0 * v_Vre_plasma
+    x[16] = 0.0 * v_Var
+    x[17] = 0.0 * v_Vve
+    x[18] = 0.0 * v_Vpo
+    x[19] = 0.0 * v_Vhv
+    x[20] = 0.0 * p[1]
+    x[21] = 0.0 * p[2]
+    x[22] = 0.0 * v_Vki_plasma
+    x[23] = 0.0 * v_Vli_plasma
+    x[24] = 0.0 * v_Vlu_plasma
+    x[25] = 0.0 * v_Vgu_plasma
+    x[26] = 0.0 * v_Vre_plasma
+    x[27] = 0.0 * v_Var
+    x[28] = 0.0 * v_Vve
+    x[29] = 0.0 * v_Vpo
+    x[30] = 0.0 * v_Vhv
+    x[31] = 0.0 * p[1]
+    x[32] = 0.0 * p[2]
+    x[33] = 0.0 * v_Vki_plasma
+    x[34] = 0.0 * v_Vli_plasma
+    x[35] = 0.0 * v_Vlu_plasma
+    x[36] = 0.0 * v_Vgu_plasma
+    x[37] = 0.0 * v_Vre_plasma
+    x[38] = 0.0 * v_Var
+    x[39] = 0.0 * v_Vve
+    x[40] = 0.0 * v_Vpo
+    x[41] = 0.0 * v_Vhv
+    x[42] = 0.0 * p[1]
+    x[43] = 0.0 * p[2]
+    x[44] = 0.0 * v_Vgu
+    x[45] = 0.0 * v_Vgu
+    x[46] = 0.0 * v_Vgu
+    x[47] = 0.0 * v_Vli_tissue
+    x[48] = 0.0 * v_Vli_tissue
+    x[49] = 0.0 * p[5]
+    x[50] = 0.0 * v_Vli_tissue
+    x[51] = 0.0 * p[5]
+    x[52] = 0.0 * v_Vli_tissue
+    x[53] = 0.0 * p[5]
+    x[54] = 0.0 * p[6]
+    x[55] = 0.0 * v_Vgu
+    x[56] = 0.0
+    x[57] = 0.0
+    return x
+
+
+def rhs(t, x, p):
+    """Right-hand side dx/dt (amounts per time)."""
+    v_Vve = ((p[16] * p[26]) - ((((p[26] / (p[27] + p[26])) * p[16]) * p[20]) * ((1.0 - p[26]) - p[27])))
+    v_PT = (p[8] * (1.0 + ((p[10] * (x[6] / v_Vve)) / ((x[6] / v_Vve) + p[11]))))
+    v_PT_change = (v_PT - p[8])
+    v_PT_ratio = (v_PT / p[8])
+    v_aPTT = (p[9] * (1.0 + ((p[12] * (x[6] / v_Vve)) / ((x[6] / v_Vve) + p[13]))))
+    v_aPTT_change = (v_aPTT - p[9])
+    v_aPTT_ratio = (v_aPTT / p[9])
+    v_Xa_inhibition = ((p[14] * (x[6] / v_Vve)) / ((x[6] / v_Vve) + p[15]))
+    v_f_shunts = p[34]
+    v_f_tissue_loss = p[34]
+    v_FVre = (1.0 - (((((p[22] + p[23]) + p[24]) + p[25]) + p[26]) + p[27]))
+    v_FQre = (1.0 - (p[31] + p[32]))
+    v_BSA = ((0.024265 * ((p[16] / 1.0) ** 0.5378)) * ((p[17] / 1.0) ** 0.3964))
+    v_CO = ((p[19] * p[16]) * p[18])
+    v_QC = ((v_CO / 1000.0) * 60.0)
+    v_Vgu = (p[16] * p[22])
+    v_Vki = (p[16] * p[23])
+    v_Vli = (p[16] * p[24])
+    v_Vlu = (p[16] * p[25])
+    v_Vre = (p[16] * v_FVre)
+    v_Var = ((p[16] * p[27]) - ((((p[27] / (p[27] + p[26])) * p[16]) * p[20]) * ((1.0 - p[26]) - p[27])))
+    v_Vpo = ((1.0 - p[21]) * ((p[16] * p[28]) - ((((p[28] / (((p[27] + p[26]) + p[28]) + p[29])) * p[16]) * p[20]) * (1.0 - (((p[27] + p[26]) + p[28]) + p[29])))))
+    v_Vhv = ((1.0 - p[21]) * ((p[16] * p[29]) - ((((p[29] / (((p[27] + p[26]) + p[28]) + p[29])) * p[16]) * p[20]) * (1.0 - (((p[27] + p[26]) + p[28]) + p[29])))))
+    v_Qgu = (v_QC * p[30])
+    v_Qki = (v_QC * p[31])
+    v_Qh = (v_QC * p[32])
+    v_Qha = (v_Qh - v_Qgu)
+    v_Qlu = (v_QC * p[33])
+    v_Qre = (v_QC * v_FQre)
+    v_Qpo = v_Qgu
+    v_Vki_plasma = ((v_Vki * p[20]) * (1.0 - p[21]))
+    v_Vki_tissue = (v_Vki * (1.0 - p[20]))
+    v_Vli_plasma = ((v_Vli * p[20]) * (1.0 - p[21]))
+    v_Vli_tissue = ((v_Vli * (1.0 - v_f_tissue_loss)) * (1.0 - p[20]))
+    v_Vlu_plasma = ((v_Vlu * p[20]) * (1.0 - p[21]))
+    v_Vlu_tissue = (v_Vlu * (1.0 - p[20]))
+    v_Vgu_plasma = ((v_Vgu * p[20]) * (1.0 - p[21]))
+    v_Vgu_tissue = (v_Vgu * (1.0 - p[20]))
+    v_Vre_plasma = ((v_Vre * p[20]) * (1.0 - p[21]))
+    v_Vre_tissue = (v_Vre * (1.0 - p[20]))
+    v_Ki_edo = ((0.693 / p[36]) * 60.0)
+    v_Cve_edo_total = ((((x[6] / v_Vve) + (x[17] / v_Vve)) + (x[28] / v_Vve)) + (x[39] / v_Vve))
+    v_Afeces_edo_total = (((x[10] + x[21]) + x[32]) + x[43])
+    v_Aurine_edo_total = (((x[9] + x[20]) + x[31]) + x[42])
+    v_KI__egfr = (p[42] * p[43])
+    v_KI__crcl = (((v_KI__egfr * p[41]) / 1.73) * 1.1)
+    v_GU__absorption_edo = (((p[58] * p[57]) * v_Vgu) * (x[55] / v_Vgu))
+    v_iv_edo = ((v_Ki_edo * x[56]) / p[35])
+    v_Flow_ar_ki_edo = (v_Qki * (x[5] / v_Var))
+    v_Flow_ki_ve_edo = (v_Qki * (x[0] / v_Vki_plasma))
+    v_Flow_arli_li_edo = (((1.0 - v_f_shunts) * v_Qha) * (x[5] / v_Var))
+    v_Flow_arli_hv_edo = ((v_f_shunts * v_Qha) * (x[5] / v_Var))
+    v_Flow_po_li_edo = (((1.0 - v_f_shunts) * v_Qpo) * (x[7] / v_Vpo))
+    v_Flow_po_hv_edo = ((v_f_shunts * v_Qpo) * (x[7] / v_Vpo))
+    v_Flow_li_hv_edo = (((1.0 - v_f_shunts) * (v_Qpo + v_Qha)) * (x[1] / v_Vli_plasma))
+    v_Flow_hv_ve_edo = (v_Qh * (x[8] / v_Vhv))
+    v_Flow_ve_lu_edo = (v_Qlu * (x[6] / v_Vve))
+    v_Flow_lu_ar_edo = (v_Qlu * (x[2] / v_Vlu_plasma))
+    v_Flow_ar_gu_edo = (v_Qgu * (x[5] / v_Var))
+    v_Flow_gu_po_edo = (v_Qgu * (x[3] / v_Vgu_plasma))
+    v_Flow_ar_re_edo = (v_Qre * (x[5] / v_Var))
+    v_Flow_re_ve_edo = (v_Qre * (x[4] / v_Vre_plasma))
+    v_Flow_ar_ki_m4 = (v_Qki * (x[16] / v_Var))
+    v_Flow_ki_ve_m4 = (v_Qki * (x[11] / v_Vki_plasma))
+    v_Flow_arli_li_m4 = (((1.0 - v_f_shunts) * v_Qha) * (x[16] / v_Var))
+    v_Flow_arli_hv_m4 = ((v_f_shunts * v_Qha) * (x[16] / v_Var))
+    v_Flow_po_li_m4 = (((1.0 - v_f_shunts) * v_Qpo) * (x[18] / v_Vpo))
+    v_Flow_po_hv_m4 = ((v_f_shunts * v_Qpo) * (x[18] / v_Vpo))
+    v_Flow_li_hv_m4 = (((1.0 - v_f_shunts) * (v_Qpo + v_Qha)) * (x[12] / v_Vli_plasma))
+    v_Flow_hv_ve_m4 = (v_Qh * (x[19] / v_Vhv))
+    v_Flow_ve_lu_m4 = (v_Qlu * (x[17] / v_Vve))
+    v_Flow_lu_ar_m4 = (v_Qlu * (x[13] / v_Vlu_plasma))
+    v_Flow_ar_gu_m4 = (v_Qgu * (x[16] / v_Var))
+    v_Flow_gu_po_m4 = (v_Qgu * (x[14] / v_Vgu_plasma))
+    v_Flow_ar_re_m4 = (v_Qre * (x[16] / v_Var))
+    v_Flow_re_ve_m4 = (v_Qre * (x[15] / v_Vre_plasma))
+    v_Flow_ar_ki_m6 = (v_Qki * (x[27] / v_Var))
+    v_Flow_ki_ve_m6 = (v_Qki * (x[22] / v_Vki_plasma))
+    v_Flow_arli_li_m6 = (((1.0 - v_f_shunts) * v_Qha) * (x[27] / v_Var))
+    v_Flow_arli_hv_m6 = ((v_f_shunts * v_Qha) * (x[27] / v_Var))
+    v_Flow_po_li_m6 = (((1.0 - v_f_shunts) * v_Qpo) * (x[29] / v_Vpo))
+    v_Flow_po_hv_m6 = ((v_f_shunts * v_Qpo) * (x[29] / v_Vpo))
+    v_Flow_li_hv_m6 = (((1.0 - v_f_shunts) * (v_Qpo + v_Qha)) * (x[23] / v_Vli_plasma))
+    v_Flow_hv_ve_m6 = (v_Qh * (x[30] / v_Vhv))
+    v_Flow_ve_lu_m6 = (v_Qlu * (x[28] / v_Vve))
+    v_Flow_lu_ar_m6 = (v_Qlu * (x[24] / v_Vlu_plasma))
+    v_Flow_ar_gu_m6 = (v_Qgu * (x[27] / v_Var))
+    v_Flow_gu_po_m6 = (v_Qgu * (x[25] / v_Vgu_plasma))
+    v_Flow_ar_re_m6 = (v_Qre * (x[27] / v_Var))
+    v_Flow_re_ve_m6 = (v_Qre * (x[26] / v_Vre_plasma))
+    v_Flow_ar_ki_mx = (v_Qki * (x[38] / v_Var))
+    v_Flow_ki_ve_mx = (v_Qki * (x[33] / v_Vki_plasma))
+    v_Flow_arli_li_mx = (((1.0 - v_f_shunts) * v_Qha) * (x[38] / v_Var))
+    v_Flow_arli_hv_mx = ((v_f_shunts * v_Qha) * (x[38] / v_Var))
+    v_Flow_po_li_mx = (((1.0 - v_f_shunts) * v_Qpo) * (x[40] / v_Vpo))
+    v_Flow_po_hv_mx = ((v_f_shunts * v_Qpo) * (x[40] / v_Vpo))
+    v_Flow_li_hv_mx = (((1.0 - v_f_shunts) * (v_Qpo + v_Qha)) * (x[34] / v_Vli_plasma))
+    v_Flow_hv_ve_mx = (v_Qh * (x[41] / v_Vhv))
+    v_Flow_ve_lu_mx = (v_Qlu * (x[39] / v_Vve))
+    v_Flow_lu_ar_mx = (v_Qlu * (x[35] / v_Vlu_plasma))
+    v_Flow_ar_gu_mx = (v_Qgu * (x[38] / v_Var))
+    v_Flow_gu_po_mx = (v_Qgu * (x[36] / v_Vgu_plasma))
+    v_Flow_ar_re_mx = (v_Qre * (x[38] / v_Var))
+    v_Flow_re_ve_mx = (v_Qre * (x[37] / v_Vre_plasma))
+    v_KI__EDOEX = (((p[42] * v_Vki_tissue) * p[44]) * (x[0] / v_Vki_plasma))
+    v_KI__M4EX = (((p[42] * v_Vki_tissue) * p[45]) * (x[11] / v_Vki_plasma))
+    v_KI__M6EX = (((p[42] * v_Vki_tissue) * p[46]) * (x[22] / v_Vki_plasma))
+    v_KI__MXEX = (((p[42] * v_Vki_tissue) * p[47]) * (x[33] / v_Vki_plasma))
+    v_LI__EDOIM = ((p[49] * v_Vli_tissue) * ((x[1] / v_Vli_plasma) - (x[47] / v_Vli_tissue)))
+    v_LI__EDO2M4 = ((p[50] * v_Vli_tissue) * (x[47] / v_Vli_tissue))
+    v_LI__EDO2M6 = (((p[51] * p[50]) * v_Vli_tissue) * (x[47] / v_Vli_tissue))
+    v_LI__EDO2MX = (((p[52] * p[50]) * v_Vli_tissue) * (x[47] / v_Vli_tissue))
+    v_LI__M4EX = ((p[53] * v_Vli_tissue) * ((x[48] / v_Vli_tissue) - (x[12] / v_Vli_plasma)))
+    v_LI__M6EX = ((p[54] * v_Vli_tissue) * ((x[50] / v_Vli_tissue) - (x[23] / v_Vli_plasma)))
+    v_LI__MXEX = ((p[55] * v_Vli_tissue) * ((x[52] / v_Vli_tissue) - (x[34] / v_Vli_plasma)))
+    v_LI__M4EXBI = ((p[48] * v_Vli_tissue) * (x[48] / v_Vli_tissue))
+    v_LI__M4EXEHC = v_LI__M4EXBI
+    v_LI__M6EXBI = ((p[48] * v_Vli_tissue) * (x[50] / v_Vli_tissue))
+    v_LI__M6EXEHC = v_LI__M6EXBI
+    v_LI__MXEXBI = ((p[48] * v_Vli_tissue) * (x[52] / v_Vli_tissue))
+    v_LI__MXEXEHC = v_LI__MXEXBI
+    v_GU__EDOABS = (p[56] * v_GU__absorption_edo)
+    v_GU__EDOEXC = ((1.0 - p[56]) * v_GU__absorption_edo)
+    v_GU__M4EXC = (((p[58] * p[61]) * v_Vgu) * (x[44] / v_Vgu))
+    v_GU__M6EXC = (((p[58] * p[62]) * v_Vgu) * (x[45] / v_Vgu))
+    v_GU__MXEXC = (((p[58] * p[63]) * v_Vgu) * (x[46] / v_Vgu))
+    v_GU__dissolution_edo = (((p[59] / 60.0) * x[57]) / p[60])
+    dx = np.zeros_like(x)
+    dx[0] = v_Flow_ar_ki_edo - v_Flow_ki_ve_edo - v_KI__EDOEX
+    dx[1] = v_Flow_arli_li_edo + v_Flow_po_li_edo - v_Flow_li_hv_edo - v_LI__EDOIM
+    dx[2] = v_Flow_ve_lu_edo - v_Flow_lu_ar_edo
+    dx[3] = v_Flow_ar_gu_edo - v_Flow_gu_po_edo + v_GU__EDOABS
+    dx[4] = v_Flow_ar_re_edo - v_Flow_re_ve_edo
+    dx[5] = - v_Flow_ar_ki_edo - v_Flow_arli_li_edo - v_Flow_arli_hv_edo + v_Flow_lu_ar_edo - v_Flow_ar_gu_edo - v_Flow_ar_re_edo
+    dx[6] = v_iv_edo + v_Flow_ki_ve_edo + v_Flow_hv_ve_edo - v_Flow_ve_lu_edo + v_Flow_re_ve_edo
+    dx[7] = - v_Flow_po_li_edo - v_Flow_po_hv_edo + v_Flow_gu_po_edo
+    dx[8] = v_Flow_arli_hv_edo + v_Flow_po_hv_edo + v_Flow_li_hv_edo - v_Flow_hv_ve_edo
+    dx[9] = v_KI__EDOEX
+    dx[10] = v_GU__EDOEXC
+    dx[11] = v_Flow_ar_ki_m4 - v_Flow_ki_ve_m4 - v_KI__M4EX
+    dx[12] = v_Flow_arli_li_m4 + v_Flow_po_li_m4 - v_Flow_li_hv_m4 + v_LI__M4EX
+    dx[13] = v_Flow_ve_lu_m4 - v_Flow_lu_ar_m4
+    dx[14] = v_Flow_ar_gu_m4 - v_Flow_gu_po_m4
+    dx[15] = v_Flow_ar_re_m4 - v_Flow_re_ve_m4
+    dx[16] = - v_Flow_ar_ki_m4 - v_Flow_arli_li_m4 - v_Flow_arli_hv_m4 + v_Flow_lu_ar_m4 - v_Flow_ar_gu_m4 - v_Flow_ar_re_m4
+    dx[17] = v_Flow_ki_ve_m4 + v_Flow_hv_ve_m4 - v_Flow_ve_lu_m4 + v_Flow_re_ve_m4
+    dx[18] = - v_Flow_po_li_m4 - v_Flow_po_hv_m4 + v_Flow_gu_po_m4
+    dx[19] = v_Flow_arli_hv_m4 + v_Flow_po_hv_m4 + v_Flow_li_hv_m4 - v_Flow_hv_ve_m4
+    dx[20] = v_KI__M4EX
+    dx[21] = v_GU__M4EXC
+    dx[22] = v_Flow_ar_ki_m6 - v_Flow_ki_ve_m6 - v_KI__M6EX
+    dx[23] = v_Flow_arli_li_m6 + v_Flow_po_li_m6 - v_Flow_li_hv_m6 + v_LI__M6EX
+    dx[24] = v_Flow_ve_lu_m6 - v_Flow_lu_ar_m6
+    dx[25] = v_Flow_ar_gu_m6 - v_Flow_gu_po_m6
+    dx[26] = v_Flow_ar_re_m6 - v_Flow_re_ve_m6
+    dx[27] = - v_Flow_ar_ki_m6 - v_Flow_arli_li_m6 - v_Flow_arli_hv_m6 + v_Flow_lu_ar_m6 - v_Flow_ar_gu_m6 - v_Flow_ar_re_m6
+    dx[28] = v_Flow_ki_ve_m6 + v_Flow_hv_ve_m6 - v_Flow_ve_lu_m6 + v_Flow_re_ve_m6
+    dx[29] = - v_Flow_po_li_m6 - v_Flow_po_hv_m6 + v_Flow_gu_po_m6
+    dx[30] = v_Flow_arli_hv_m6 + v_Flow_po_hv_m6 + v_Flow_li_hv_m6 - v_Flow_hv_ve_m6
+    dx[31] = v_KI__M6EX
+    dx[32] = v_GU__M6EXC
+    dx[33] = v_Flow_ar_ki_mx - v_Flow_ki_ve_mx - v_KI__MXEX
+    dx[34] = v_Flow_arli_li_mx + v_Flow_po_li_mx - v_Flow_li_hv_mx + v_LI__MXEX
+    dx[35] = v_Flow_ve_lu_mx - v_Flow_lu_ar_mx
+    dx[36] = v_Flow_ar_gu_mx - v_Flow_gu_po_mx
+    dx[37] = v_Flow_ar_re_mx - v_Flow_re_ve_mx
+    dx[38] = - v_Flow_ar_ki_mx - v_Flow_arli_li_mx - v_Flow_arli_hv_mx + v_Flow_lu_ar_mx - v_Flow_ar_gu_mx - v_Flow_ar_re_mx
+    dx[39] = v_Flow_ki_ve_mx + v_Flow_hv_ve_mx - v_Flow_ve_lu_mx + v_Flow_re_ve_mx
+    dx[40] = - v_Flow_po_li_mx - v_Flow_po_hv_mx + v_Flow_gu_po_mx
+    dx[41] = v_Flow_arli_hv_mx + v_Flow_po_hv_mx + v_Flow_li_hv_mx - v_Flow_hv_ve_mx
+    dx[42] = v_KI__MXEX
+    dx[43] = v_GU__MXEXC
+    dx[44] = v_LI__M4EXEHC - v_GU__M4EXC
+    dx[45] = v_LI__M6EXEHC - v_GU__M6EXC
+    dx[46] = v_LI__MXEXEHC - v_GU__MXEXC
+    dx[47] = v_LI__EDOIM - v_LI__EDO2M4 - v_LI__EDO2M6 - v_LI__EDO2MX
+    dx[48] = v_LI__EDO2M4 - v_LI__M4EX - v_LI__M4EXBI
+    dx[49] = v_LI__M4EXBI - v_LI__M4EXEHC
+    dx[50] = v_LI__EDO2M6 - v_LI__M6EX - v_LI__M6EXBI
+    dx[51] = v_LI__M6EXBI - v_LI__M6EXEHC
+    dx[52] = v_LI__EDO2MX - v_LI__MXEX - v_LI__MXEXBI
+    dx[53] = v_LI__MXEXBI - v_LI__MXEXEHC
+    dx[55] = - v_GU__EDOABS - v_GU__EDOEXC + v_GU__dissolution_edo
+    dx[56] = (((-v_iv_edo) * p[35]) + p[37])
+    dx[57] = ((-v_GU__dissolution_edo) * p[60])
+    return dx
+
+
+def jacobian(t, x, p, h=1e-30):
+    """Jacobian d(rhs)/dx by complex-step differentiation (x of shape (n,))."""
+    n = len(x)
+    X = x[:, np.newaxis] + 1j * h * np.eye(n)
+    P = np.broadcast_to(p[:, np.newaxis], (len(p), n))
+    return rhs(t, X, P).imag / h
+
+
+def assignments(t, x, p):
+    """Values of the assignment rules (y_ids)."""
+    v_Vve = ((p[16] * p[26]) - ((((p[26] / (p[27] + p[26])) * p[16]) * p[20]) * ((1.0 - p[26]) - p[27])))
+    v_PT = (p[8] * (1.0 + ((p[10] * (x[6] / v_Vve)) / ((x[6] / v_Vve) + p[11]))))
+    v_PT_change = (v_PT - p[8])
+    v_PT_ratio = (v_PT / p[8])
+    v_aPTT = (p[9] * (1.0 + ((p[12] * (x[6] / v_Vve)) / ((x[6] / v_Vve) + p[13]))))
+    v_aPTT_change = (v_aPTT - p[9])
+    v_aPTT_ratio = (v_aPTT / p[9])
+    v_Xa_inhibition = ((p[14] * (x[6] / v_Vve)) / ((x[6] / v_Vve) + p[15]))
+    v_f_shunts = p[34]
+    v_f_tissue_loss = p[34]
+    v_FVre = (1.0 - (((((p[22] + p[23]) + p[24]) + p[25]) + p[26]) + p[27]))
+    v_FQre = (1.0 - (p[31] + p[32]))
+    v_BSA = ((0.024265 * ((p[16] / 1.0) ** 0.5378)) * ((p[17] / 1.0) ** 0.3964))
+    v_CO = ((p[19] * p[16]) * p[18])
+    v_QC = ((v_CO / 1000.0) * 60.0)
+    v_Vgu = (p[16] * p[22])
+    v_Vki = (p[16] * p[23])
+    v_Vli = (p[16] * p[24])
+    v_Vlu = (p[16] * p[25])
+    v_Vre = (p[16] * v_FVre)
+    v_Var = ((p[16] * p[27]) - ((((p[27] / (p[27] + p[26])) * p[16]) * p[20]) * ((1.0 - p[26]) - p[27])))
+    v_Vpo = ((1.0 - p[21]) * ((p[16] * p[28]) - ((((p[28] / (((p[27] + p[26]) + p[28]) + p[29])) * p[16]) * p[20]) * (1.0 - (((p[27] + p[26]) + p[28]) + p[29])))))
+    v_Vhv = ((1.0 - p[21]) * ((p[16] * p[29]) - ((((p[29] / (((p[27] + p[26]) + p[28]) + p[29])) * p[16]) * p[20]) * (1.0 - (((p[27] + p[26]) + p[28]) + p[29])))))
+    v_Qgu = (v_QC * p[30])
+    v_Qki = (v_QC * p[31])
+    v_Qh = (v_QC * p[32])
+    v_Qha = (v_Qh - v_Qgu)
+    v_Qlu = (v_QC * p[33])
+    v_Qre = (v_QC * v_FQre)
+    v_Qpo = v_Qgu
+    v_Vki_plasma = ((v_Vki * p[20]) * (1.0 - p[21]))
+    v_Vki_tissue = (v_Vki * (1.0 - p[20]))
+    v_Vli_plasma = ((v_Vli * p[20]) * (1.0 - p[21]))
+    v_Vli_tissue = ((v_Vli * (1.0 - v_f_tissue_loss)) * (1.0 - p[20]))
+    v_Vlu_plasma = ((v_Vlu * p[20]) * (1.0 - p[21]))
+    v_Vlu_tissue = (v_Vlu * (1.0 - p[20]))
+    v_Vgu_plasma = ((v_Vgu * p[20]) * (1.0 - p[21]))
+    v_Vgu_tissue = (v_Vgu * (1.0 - p[20]))
+    v_Vre_plasma = ((v_Vre * p[20]) * (1.0 - p[21]))
+    v_Vre_tissue = (v_Vre * (1.0 - p[20]))
+    v_Ki_edo = ((0.693 / p[36]) * 60.0)
+    v_Cve_edo_total = ((((x[6] / v_Vve) + (x[17] / v_Vve)) + (x[28] / v_Vve)) + (x[39] / v_Vve))
+    v_Afeces_edo_total = (((x[10] + x[21]) + x[32]) + x[43])
+    v_Aurine_edo_total = (((x[9] + x[20]) + x[31]) + x[42])
+    v_KI__egfr = (p[42] * p[43])
+    v_KI__crcl = (((v_KI__egfr * p[41]) / 1.73) * 1.1)
+    v_GU__absorption_edo = (((p[58] * p[57]) * v_Vgu) * (x[55] / v_Vgu))
+    v_iv_edo = ((v_Ki_edo * x[56]) / p[35])
+    v_Flow_ar_ki_edo = (v_Qki * (x[5] / v_Var))
+    v_Flow_ki_ve_edo = (v_Qki * (x[0] / v_Vki_plasma))
+    v_Flow_arli_li_edo = (((1.0 - v_f_shunts) * v_Qha) * (x[5] / v_Var))
+    v_Flow_arli_hv_edo = ((v_f_shunts * v_Qha) * (x[5] / v_Var))
+    v_Flow_po_li_edo = (((1.0 - v_f_shunts) * v_Qpo) * (x[7] / v_Vpo))
+    v_Flow_po_hv_edo = ((v_f_shunts * v_Qpo) * (x[7] / v_Vpo))
+    v_Flow_li_hv_edo = (((1.0 - v_f_shunts) * (v_Qpo + v_Qha)) * (x[1] / v_Vli_plasma))
+    v_Flow_hv_ve_edo = (v_Qh * (x[8] / v_Vhv))
+    v_Flow_ve_lu_edo = (v_Qlu * (x[6] / v_Vve))
+    v_Flow_lu_ar_edo = (v_Qlu * (x[2] / v_Vlu_plasma))
+    v_Flow_ar_gu_edo = (v_Qgu * (x[5] / v_Var))
+    v_Flow_gu_po_edo = (v_Qgu * (x[3] / v_Vgu_plasma))
+    v_Flow_ar_re_edo = (v_Qre * (x[5] / v_Var))
+    v_Flow_re_ve_edo = (v_Qre * (x[4] / v_Vre_plasma))
+    v_Flow_ar_ki_m4 = (v_Qki * (x[16] / v_Var))
+    v_Flow_ki_ve_m4 = (v_Qki * (x[11] / v_Vki_plasma))
+    v_Flow_arli_li_m4 = (((1.0 - v_f_shunts) * v_Qha) * (x[16] / v_Var))
+    v_Flow_arli_hv_m4 = ((v_f_shunts * v_Qha) * (x[16] / v_Var))
+    v_Flow_po_li_m4 = (((1.0 - v_f_shunts) * v_Qpo) * (x[18] / v_Vpo))
+    v_Flow_po_hv_m4 = ((v_f_shunts * v_Qpo) * (x[18] / v_Vpo))
+    v_Flow_li_hv_m4 = (((1.0 - v_f_shunts) * (v_Qpo + v_Qha)) * (x[12] / v_Vli_plasma))
+    v_Flow_hv_ve_m4 = (v_Qh * (x[19] / v_Vhv))
+    v_Flow_ve_lu_m4 = (v_Qlu * (x[17] / v_Vve))
+    v_Flow_lu_ar_m4 = (v_Qlu * (x[13] / v_Vlu_plasma))
+    v_Flow_ar_gu_m4 = (v_Qgu * (x[16] / v_Var))
+    v_Flow_gu_po_m4 = (v_Qgu * (x[14] / v_Vgu_plasma))
+    v_Flow_ar_re_m4 = (v_Qre * (x[16] / v_Var))
+    v_Flow_re_ve_m4 = (v_Qre * (x[15] / v_Vre_plasma))
+    v_Flow_ar_ki_m6 = (v_Qki * (x[27] / v_Var))
+    v_Flow_ki_ve_m6 = (v_Qki * (x[22] / v_Vki_plasma))
+    v_Flow_arli_li_m6 = (((1.0 - v_f_shunts) * v_Qha) * (x[27] / v_Var))
+    v_Flow_arli_hv_m6 = ((v_f_shunts * v_Qha) * (x[27] / v_Var))
+    v_Flow_po_li_m6 = (((1.0 - v_f_shunts) * v_Qpo) * (x[29] / v_Vpo))
+    v_Flow_po_hv_m6 = ((v_f_shunts * v_Qpo) * (x[29] / v_Vpo))
+    v_Flow_li_hv_m6 = (((1.0 - v_f_shunts) * (v_Qpo + v_Qha)) * (x[23] / v_Vli_plasma))
+    v_Flow_hv_ve_m6 = (v_Qh * (x[30] / v_Vhv))
+    v_Flow_ve_lu_m6 = (v_Qlu * (x[28] / v_Vve))
+    v_Flow_lu_ar_m6 = (v_Qlu * (x[24] / v_Vlu_plasma))
+    v_Flow_ar_gu_m6 = (v_Qgu * (x[27] / v_Var))
+    v_Flow_gu_po_m6 = (v_Qgu * (x[25] / v_Vgu_plasma))
+    v_Flow_ar_re_m6 = (v_Qre * (x[27] / v_Var))
+    v_Flow_re_ve_m6 = (v_Qre * (x[26] / v_Vre_plasma))
+    v_Flow_ar_ki_mx = (v_Qki * (x[38] / v_Var))
+    v_Flow_ki_ve_mx = (v_Qki * (x[33] / v_Vki_plasma))
+    v_Flow_arli_li_mx = (((1.0 - v_f_shunts) * v_Qha) * (x[38] / v_Var))
+    v_Flow_arli_hv_mx = ((v_f_shunts * v_Qha) * (x[38] / v_Var))
+    v_Flow_po_li_mx = (((1.0 - v_f_shunts) * v_Qpo) * (x[40] / v_Vpo))
+    v_Flow_po_hv_mx = ((v_f_shunts * v_Qpo) * (x[40] / v_Vpo))
+    v_Flow_li_hv_mx = (((1.0 - v_f_shunts) * (v_Qpo + v_Qha)) * (x[34] / v_Vli_plasma))
+    v_Flow_hv_ve_mx = (v_Qh * (x[41] / v_Vhv))
+    v_Flow_ve_lu_mx = (v_Qlu * (x[39] / v_Vve))
+    v_Flow_lu_ar_mx = (v_Qlu * (x[35] / v_Vlu_plasma))
+    v_Flow_ar_gu_mx = (v_Qgu * (x[38] / v_Var))
+    v_Flow_gu_po_mx = (v_Qgu * (x[36] / v_Vgu_plasma))
+    v_Flow_ar_re_mx = (v_Qre * (x[38] / v_Var))
+    v_Flow_re_ve_mx = (v_Qre * (x[37] / v_Vre_plasma))
+    v_KI__EDOEX = (((p[42] * v_Vki_tissue) * p[44]) * (x[0] / v_Vki_plasma))
+    v_KI__M4EX = (((p[42] * v_Vki_tissue) * p[45]) * (x[11] / v_Vki_plasma))
+    v_KI__M6EX = (((p[42] * v_Vki_tissue) * p[46]) * (x[22] / v_Vki_plasma))
+    v_KI__MXEX = (((p[42] * v_Vki_tissue) * p[47]) * (x[33] / v_Vki_plasma))
+    v_LI__EDOIM = ((p[49] * v_Vli_tissue) * ((x[1] / v_Vli_plasma) - (x[47] / v_Vli_tissue)))
+    v_LI__EDO2M4 = ((p[50] * v_Vli_tissue) * (x[47] / v_Vli_tissue))
+    v_LI__EDO2M6 = (((p[51] * p[50]) * v_Vli_tissue) * (x[47] / v_Vli_tissue))
+    v_LI__EDO2MX = (((p[52] * p[50]) * v_Vli_tissue) * (x[47] / v_Vli_tissue))
+    v_LI__M4EX = ((p[53] * v_Vli_tissue) * ((x[48] / v_Vli_tissue) - (x[12] / v_Vli_plasma)))
+    v_LI__M6EX = ((p[54] * v_Vli_tissue) * ((x[50] / v_Vli_tissue) - (x[23] / v_Vli_plasma)))
+    v_LI__MXEX = ((p[55] * v_Vli_tissue) * ((x[52] / v_Vli_tissue) - (x[34] / v_Vli_plasma)))
+    v_LI__M4EXBI = ((p[48] * v_Vli_tissue) * (x[48] / v_Vli_tissue))
+    v_LI__M4EXEHC = v_LI__M4EXBI
+    v_LI__M6EXBI = ((p[48] * v_Vli_tissue) * (x[50] / v_Vli_tissue))
+    v_LI__M6EXEHC = v_LI__M6EXBI
+    v_LI__MXEXBI = ((p[48] * v_Vli_tissue) * (x[52] / v_Vli_tissue))
+    v_LI__MXEXEHC = v_LI__MXEXBI
+    v_GU__EDOABS = (p[56] * v_GU__absorption_edo)
+    v_GU__EDOEXC = ((1.0 - p[56]) * v_GU__absorption_edo)
+    v_GU__M4EXC = (((p[58] * p[61]) * v_Vgu) * (x[44] / v_Vgu))
+    v_GU__M6EXC = (((p[58] * p[62]) * v_Vgu) * (x[45] / v_Vgu))
+    v_GU__MXEXC = (((p[58] * p[63]) * v_Vgu) * (x[46] / v_Vgu))
+    v_GU__dissolution_edo = (((p[59] / 60.0) * x[57]) / p[60])
+    return np.array([
+        v_PT_change + 0 * x[0],
+        v_PT_ratio + 0 * x[0],
+        v_aPTT_change + 0 * x[0],
+        v_aPTT_ratio + 0 * x[0],
+        v_PT + 0 * x[0],
+        v_aPTT + 0 * x[0],
+        v_Xa_inhibition + 0 * x[0],
+        v_f_shunts + 0 * x[0],
+        v_f_tissue_loss + 0 * x[0],
+        v_FVre + 0 * x[0],
+        v_FQre + 0 * x[0],
+        v_BSA + 0 * x[0],
+        v_CO + 0 * x[0],
+        v_QC + 0 * x[0],
+        v_Vgu + 0 * x[0],
+        v_Vki + 0 * x[0],
+        v_Vli + 0 * x[0],
+        v_Vlu + 0 * x[0],
+        v_Vre + 0 * x[0],
+        v_Vve + 0 * x[0],
+        v_Var + 0 * x[0],
+        v_Vpo + 0 * x[0],
+        v_Vhv + 0 * x[0],
+        v_Qgu + 0 * x[0],
+        v_Qki + 0 * x[0],
+        v_Qh + 0 * x[0],
+        v_Qha + 0 * x[0],
+        v_Qlu + 0 * x[0],
+        v_Qre + 0 * x[0],
+        v_Qpo + 0 * x[0],
+        v_Vki_plasma + 0 * x[0],
+        v_Vki_tissue + 0 * x[0],
+        v_Vli_plasma + 0 * x[0],
+        v_Vli_tissue + 0 * x[0],
+        v_Vlu_plasma + 0 * x[0],
+        v_Vlu_tissue + 0 * x[0],
+        v_Vgu_plasma + 0 * x[0],
+        v_Vgu_tissue + 0 * x[0],
+        v_Vre_plasma + 0 * x[0],
+        v_Vre_tissue + 0 * x[0],
+        v_Ki_edo + 0 * x[0],
+        v_Cve_edo_total + 0 * x[0],
+        v_Afeces_edo_total + 0 * x[0],
+        v_Aurine_edo_total + 0 * x[0],
+        v_KI__egfr + 0 * x[0],
+        v_KI__crcl + 0 * x[0],
+        v_GU__absorption_edo + 0 * x[0],
+    ])
+
+
+def outputs(t, x, p):
+    """Selections in roadrunner notation."""
+    y = assignments(t, x, p)
+    values = {"time": t + 0 * x[0]}
+    for k, sid in enumerate(p_ids):
+        values[sid] = p[k] + 0 * x[0]
+    for k, sid in enumerate(y_ids):
+        values[sid] = y[k]
+    for k, sid in enumerate(x_ids):
+        values[sid] = x[k]
+    for sid in concentration_ids:
+        values[f"[{sid}]"] = values[sid] / values[compartments[sid]]
+    return values
@@ -0,0 +1,246 @@
+"""Lightweight simulator of the generated ODE module.
+
+Simulates the NumPy ODE module written by the model factory
+(`MODEL_ODE_PATH`, see `models.codegen`) with SciPy, without the SBML
+toolchain (libsbml, roadrunner, sbmlsim). Only numpy and scipy are required.
+The semantics follow roadrunner: `reset` restores the initial state,
+changes of parameters (`BW`), amounts (`PODOSE_edo`) and concentrations
+(`[Cve_edo]`) are applied to the current state, and selections use the
+roadrunner notation:
+
+    simulator = OdeSimulator(relative_tolerance=1e-10, absolute_tolerance=1e-10)
+    simulator.reset(changes={"BW": 60.0, "PODOSE_edo": 60.0})
+    result = simulator.simulate(start=0, end=24 * 60, steps=500)
+    result["[Cve_edo]"]
+
+All values are in model units (time in min).
+
+Forward sensitivities of the selections with respect to parameters are
+integrated together with the states if parameters are given on reset:
+
+    simulator.reset(changes={"PODOSE_edo": 60.0}, parameters=["GU__EDOABS_k"])
+    values, sensitivities = simulator.simulate_sensitivities(
+        start=0, end=24 * 60, times=times, selections=["[Cve_edo]"]
+    )
+    sensitivities["[Cve_edo]"]  # d[Cve_edo]/dGU__EDOABS_k, shape (len(times), 1)
+
+The sensitivity equations dS/dt = df/dx S + df/dp and the derivatives of the
+outputs are evaluated by complex-step differentiation of the generated module.
+"""
+import importlib.util
+from functools import lru_cache
+from pathlib import Path
+from types import ModuleType
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from scipy import sparse
+from scipy.integrate import solve_ivp
+
+from pkdb_models.models.edoxaban import MODEL_ODE_PATH
+
+
+# step of the complex-step differentiation
+_H = 1e-30
+
+
+@lru_cache(maxsize=None)
+def load_ode_module(module_path: Path = MODEL_ODE_PATH) -> ModuleType:
+    """Import the generated ODE module."""
+    module_path = Path(module_path)
+    if not module_path.exists():
+        raise FileNotFoundError(
+            f"ODE module '{module_path}' does not exist, run the model factory."
+        )
+    spec = importlib.util.spec_from_file_location(module_path.stem, module_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class OdeSimulator:
+    """SciPy integration of the generated ODE module."""
+
+    def __init__(
+        self,
+        module: Optional[ModuleType] = None,
+        method: str = "LSODA",
+        relative_tolerance: float = 1e-8,
+        absolute_tolerance: float = 1e-10,
+        **kwargs,
+    ):
+        """
+        :param method: integration method of `scipy.integrate.solve_ivp`
+        :param kwargs: further integrator settings are ignored (roadrunner settings)
+        """
+        self.ode = module if module is not None else load_ode_module()
+        self.method = method
+        self.rtol = relative_tolerance
+        self.atol = absolute_tolerance
+        self._p_index = {sid: k for k, sid in enumerate(self.ode.p_ids)}
+        self._x_index = {sid: k for k, sid in enumerate(self.ode.x_ids)}
+        self.rhs = self.ode.rhs
+        self.p: np.ndarray = self.ode.p0.copy()
+        self.x: np.ndarray = self.ode.initial_state(self.p)
+        self.t: float = 0.0
+        # sensitivities dx/dp of the parameters, shape (n_x, n_parameters)
+        self.parameters: List[str] = []
+        self.S: Optional[np.ndarray] = None
+
+    def reset(
+        self,
+        changes: Optional[Dict[str, float]] = None,
+        parameters: Optional[List[str]] = None,
+    ) -> None:
+        """Restore the initial state and apply changes.
+
+        Parameter changes are applied before the initial state is calculated.
+
+        :param parameters: parameters of the forward sensitivities (optional)
+        """
+        changes = changes or {}
+        self.p = self.ode.p0.copy()
+        self.t = 0.0
+        for sid, value in changes.items():
+            if sid in self._p_index:
+                self.p[self._p_index[sid]] = value
+        self.x = self.ode.initial_state(self.p)
+
+        self.parameters = list(parameters) if parameters else []
+        for pid in self.parameters:
+            if pid not in self._p_index:
+                raise KeyError(f"Sensitivities require parameters, '{pid}' is not a parameter.")
+        self.S = None
+        if self.parameters:
+            self.S = self.ode.initial_state(self._p_complex()).imag / _H
+
+        self.set({sid: v for sid, v in changes.items() if sid not in self._p_index})
+
+    def _p_complex(self) -> np.ndarray:
+        """Parameters perturbed in the imaginary direction, shape (n_p, n_parameters)."""
+        P = np.repeat(self.p[:, np.newaxis], len(self.parameters), axis=1).astype(complex)
+        for j, pid in enumerate(self.parameters):
+            P[self._p_index[pid], j] += 1j * _H
+        return P
+
+    def set(self, changes: Dict[str, float]) -> None:
+        """Change parameters, amounts or concentrations of the current state."""
+        for sid, value in changes.items():
+            if sid in self._p_index:
+                self.p[self._p_index[sid]] = value
+            elif sid in self._x_index:
+                self.x[self._x_index[sid]] = value
+                if self.S is not None:
+                    self.S[self._x_index[sid]] = 0.0
+            elif sid.startswith("[") and sid[1:-1] in self.ode.compartments:
+                species = sid[1:-1]
+                compartment = self.ode.compartments[species]
+                volume = self.ode.outputs(self.t, self.x, self.p)[compartment]
+                self.x[self._x_index[species]] = value * volume
+                if self.S is not None:
+                    dvolume = self.ode.outputs(
+                        self.t, self.x[:, np.newaxis] + 1j * _H * self.S, self._p_complex()
+                    )[compartment].imag / _H
+                    self.S[self._x_index[species]] = value * dvolume
+            else:
+                raise KeyError(f"'{sid}' can not be changed.")
+
+    def simulate(
+        self,
+        start: float,
+        end: float,
+        steps: int,
+        selections: Optional[List[str]] = None,
+    ) -> Dict[str, np.ndarray]:
+        """Integrate from the current state on [start, end] with steps intervals.
+
+        The final state is kept, so that timecourses can be continued.
+        """
+        times = np.linspace(start, end, num=steps + 1)
+        if self.S is not None:
+            values, _ = self.simulate_sensitivities(start, end, times, selections)
+            return values
+
+        p = self.p
+        solution = solve_ivp(
+            fun=lambda t, x: self.rhs(t, x, p),
+            t_span=(start, end),
+            y0=self.x,
+            method=self.method,
+            t_eval=times,
+            rtol=self.rtol,
+            atol=self.atol,
+            jac=lambda t, x: self.ode.jacobian(t, x, p),
+        )
+        if not solution.success:
+            raise RuntimeError(f"Integration failed: {solution.message}")
+
+        X = solution.y
+        self.x = X[:, -1].copy()
+        self.t = end
+        values = self.ode.outputs(times, X, p[:, np.newaxis])
+        if selections is None:
+            return values
+        return {sid: values[sid] for sid in selections}
+
+    def simulate_sensitivities(
+        self,
+        start: float,
+        end: float,
+        times: np.ndarray,
+        selections: Optional[List[str]] = None,
+    ) -> Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]]:
+        """Integrate states and sensitivities from the current state on [start, end].
+
+        Requires sensitivity parameters (see `reset`). The final state and
+        sensitivities are kept, so that timecourses can be continued.
+
+        :param times: output times in [start, end]
+        :return: values (shape (n_t,)) and sensitivities d/dp (shape (n_t, n_parameters))
+            of the selections
+        """
+        if self.S is None:
+            raise ValueError("No sensitivity parameters, see 'reset'.")
+        times = np.asarray(times, dtype=float)
+        t_eval = np.union1d(times, [end])
+        n, m = len(self.x), len(self.parameters)
+        p = self.p
+        P = self._p_complex()
+
+        def rhs(t, z):
+            X = z[:n, np.newaxis] + 1j * _H * z[n:].reshape(n, m)
+            F = self.ode.rhs(t, X, P)
+            return np.concatenate([F[:, 0].real, (F.imag / _H).ravel()])
+
+        def jacobian(t, z):
+            # block diagonal approximation (staggered corrector of the sensitivities)
+            J = self.ode.jacobian(t, z[:n], p)
+            blocks = sparse.block_diag([J, sparse.kron(J, sparse.identity(m))])
+            return blocks if self.method in {"BDF", "Radau"} else blocks.toarray()
+
+        solution = solve_ivp(
+            fun=rhs,
+            t_span=(start, end),
+            y0=np.concatenate([self.x, self.S.ravel()]),
+            method=self.method,
+            t_eval=t_eval,
+            rtol=self.rtol,
+            atol=self.atol,
+            jac=jacobian,
+        )
+        if not solution.success:
+            raise RuntimeError(f"Integration failed: {solution.message}")
+
+        Z = solution.y[:, np.searchsorted(t_eval, times)]
+        self.x = solution.y[:n, -1].copy()
+        self.S = solution.y[n:, -1].reshape(n, m).copy()
+        self.t = end
+
+        # outputs with complex states and parameters, shape (m, n_t)
+        X = Z[:n, np.newaxis, :] + 1j * _H * Z[n:].reshape(n, m, len(times))
+        outputs = self.ode.outputs(times, X, P[:, :, np.newaxis])
+        if selections is None:
+            selections = list(outputs)
+        values = {sid: np.real(outputs[sid][0]) for sid in selections}
+        sensitivities = {sid: (np.imag(outputs[sid]) / _H).T for sid in selections}
+        return values, sensitivities
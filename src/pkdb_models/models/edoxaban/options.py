@@ -0,0 +1,23 @@
+"""Options of the command line tools.
+
+Only depends on the standard library, so that arguments are validated
+without importing the simulation stack.
+"""
+from enum import Enum
+
+
+class Backend(str, Enum):
+    """Backend for the numerical solution of the model."""
+
+    ROADRUNNER = "roadrunner"  # numerical integration (CVODE)
+    LINEAR = "linear"  # matrix exponential of the linear system
+    BATCH = "batch"  # vectorized scans with the matrix exponential
+
+
+class SolverProfile(str, Enum):
+    """Accuracy/speed profile of the integrator."""
+
+    REFERENCE = "reference"
+    PRODUCTION = "production"
+    FIT = "fit"
+    PREVIEW = "preview"
@@ -0,0 +1,294 @@
+"""Process-pool execution of simulation experiments.
+
+Two levels of parallelism are supported:
+
+* experiments are distributed over a pool of worker processes, every worker
+  runs a complete experiment (simulation, figures, serialization),
+* within a single experiment the tasks and the timecourses of a task (e.g.
+  the points of a `ScanSim`) are distributed over a pool of simulators via
+  `SimulatorPool`. The timecourses of all tasks are announced before the
+  tasks are run (`submit`), so that experiments consisting of many single
+  timecourses (e.g. `DoseDependencyExperiment`) are simulated concurrently.
+
+Results are always collected in submission order so that outputs and reports
+are identical to the serial execution.
+"""
+from concurrent.futures import Future, ProcessPoolExecutor
+from copy import deepcopy
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+import pandas as pd
+from sbmlsim.experiment import ExperimentRunner, SimulationExperiment
+from sbmlsim.plot import Figure
+from sbmlsim.report.experiment_report import ReportResults
+from sbmlsim.simulation import TimecourseSim
+from sbmlsim.simulator.simulation_serial import SimulatorSerial
+from sbmlutils import log
+
+from pkdb_models.models.edoxaban import instrumentation, model_cache, rendering
+from pkdb_models.models.edoxaban.experiments.base_experiment import EdoxabanSimulationExperiment
+from pkdb_models.models.edoxaban.instrumentation import ExperimentTimings, Stage, timed
+from pkdb_models.models.edoxaban.result_cache import cached, simulation_key
+from pkdb_models.models.edoxaban.result_store import ResultStore
+
+logger = log.get_logger(__name__)
+
+# simulator of the worker process, created once in the pool initializer
+_SIMULATOR: Optional[SimulatorSerial] = None
+
+
+def _init_simulator_worker(
+    worker_class: Type[SimulatorSerial],
+    model_path: Path,
+    integrator_settings: Dict[str, Any],
+) -> None:
+    """Load the model once per worker process."""
+    global _SIMULATOR
+    model_cache.install()
+    instrumentation.install()
+    _SIMULATOR = worker_class(model=model_path, **integrator_settings)
+
+
+def _run_timecourses(
+    selections: Optional[List[str]], simulations: List[TimecourseSim]
+) -> List[pd.DataFrame]:
+    """Simulate a chunk of timecourses in the worker process."""
+    if selections is not None:
+        _SIMULATOR.set_timecourse_selections(selections)
+    return _SIMULATOR._timecourses(simulations)
+
+
+def _strip_units(simulation: TimecourseSim) -> TimecourseSim:
+    """Copy of the normalized simulation without units (picklable for workers)."""
+    simulation = deepcopy(simulation)
+    for tc in simulation.timecourses:
+        tc.changes = {k: getattr(v, "magnitude", v) for k, v in tc.changes.items()}
+        tc.model_changes = {
+            k: getattr(v, "magnitude", v) for k, v in tc.model_changes.items()
+        }
+    return simulation
+
+
+def _chunks(items: List[Any], n: int) -> List[List[Any]]:
+    """Split items in at most n contiguous chunks of similar size."""
+    n = max(1, min(n, len(items)))
+    size, rest = divmod(len(items), n)
+    chunks = []
+    start = 0
+    for k in range(n):
+        end = start + size + (1 if k < rest else 0)
+        chunks.append(items[start:end])
+        start = end
+    return chunks
+
+
+class SimulatorPool(SimulatorSerial):
+    """Serial simulator which distributes timecourses over processes.
+
+    Timecourses announced with `submit` are simulated by the workers as soon
+    as the model and selections are set, the results are collected when the
+    timecourses are run. Other lists of timecourses (scans) are split in
+    contiguous chunks over `n_workers` processes, single timecourses are
+    executed in the main process. The order of the returned results is
+    identical to the serial simulator. The workers use simulators of type
+    `worker_class`.
+    """
+
+    def __init__(
+        self,
+        model=None,
+        n_workers: int = 1,
+        worker_class: Type[SimulatorSerial] = SimulatorSerial,
+        **kwargs,
+    ):
+        self.n_workers = n_workers
+        self.worker_class = worker_class
+        self._model_path = model
+        self._integrator_settings: Dict[str, Any] = dict(kwargs)
+        self._selections: Optional[List[str]] = None
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # announced timecourses and results of the submitted timecourses
+        self._pending: List[Tuple[TimecourseSim, Dict]] = []
+        self._futures: Dict[str, Future] = {}
+        super().__init__(model=model, **kwargs)
+
+    def set_integrator_settings(self, **kwargs) -> None:
+        """Set integrator settings, workers are restarted with the new settings."""
+        self._integrator_settings.update(kwargs)
+        self.shutdown()
+        super().set_integrator_settings(**kwargs)
+
+    def set_timecourse_selections(self, selections) -> None:
+        """Set timecourse selections (forwarded to the workers per chunk)."""
+        self._selections = list(selections) if selections is not None else None
+        self._futures = {}
+        super().set_timecourse_selections(selections)
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        """Pool of the worker processes (started on first use)."""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.n_workers,
+                initializer=_init_simulator_worker,
+                initargs=(
+                    self.worker_class, self._model_path, self._integrator_settings
+                ),
+            )
+        return self._executor
+
+    def submit(self, simulations: List[Tuple[TimecourseSim, Dict]]) -> None:
+        """Announce the timecourses of the next tasks with their model changes.
+
+        The timecourses are submitted to the workers on the next call of
+        `_timecourses`, i.e. after sbmlsim has set model and selections.
+        """
+        if self.n_workers > 1:
+            self._pending = [(deepcopy(sim), changes) for sim, changes in simulations]
+
+    def clear(self) -> None:
+        """Discard announced and submitted timecourses."""
+        self._pending = []
+        self._futures = {}
+
+    def _key(self, simulation: TimecourseSim) -> str:
+        return simulation_key(repr(self._selections), simulation)
+
+    def _requires_simulation(self, simulation: TimecourseSim) -> bool:
+        """Timecourse must be simulated (see `CachedSimulatorMixin`)."""
+        return True
+
+    def _submit_pending(self) -> None:
+        """Submit the announced timecourses to the workers."""
+        pending, self._pending = self._pending, []
+        for sim, model_changes in pending:
+            # as in sbmlsim: normalized simulation with model changes
+            sim.normalize(uinfo=self.uinfo)
+            sim.add_model_changes(model_changes)
+            if not sim.reset or not self._requires_simulation(sim):
+                # depends on the state of the previous simulation or is cached
+                continue
+            key = self._key(sim)
+            if key not in self._futures:
+                self._futures[key] = self.executor.submit(
+                    _run_timecourses, self._selections, [_strip_units(sim)]
+                )
+
+    @timed(Stage.SIMULATION)
+    def _timecourses(self, simulations: List[TimecourseSim]) -> List[pd.DataFrame]:
+        if self.n_workers <= 1:
+            return super()._timecourses(simulations)
+
+        self._submit_pending()
+        dfs: List[Optional[pd.DataFrame]] = [None] * len(simulations)
+        if self._futures:
+            for k, sim in enumerate(simulations):
+                future = self._futures.get(self._key(sim)) if sim.reset else None
+                if future is not None:
+                    dfs[k] = future.result()[0]
+
+        missing = [k for k, df in enumerate(dfs) if df is None]
+        if len(missing) == 1:
+            dfs[missing[0]] = super()._timecourses([simulations[missing[0]]])[0]
+        elif missing:
+            chunks = _chunks(
+                [_strip_units(simulations[k]) for k in missing], self.n_workers
+            )
+            missing_dfs: List[pd.DataFrame] = []
+            for chunk_dfs in self.executor.map(
+                _run_timecourses, [self._selections] * len(chunks), chunks
+            ):
+                missing_dfs.extend(chunk_dfs)
+            for k, df in zip(missing, missing_dfs):
+                dfs[k] = df
+        return dfs
+
+    def shutdown(self) -> None:
+        """Stop the worker processes."""
+        self._futures = {}
+        executor = getattr(self, "_executor", None)
+        if executor is not None:
+            executor.shutdown(wait=True)
+            self._executor = None
+
+
+def _init_experiment_worker(
+    fig_dpi: int, legend_fontsize: int, debug_selections: bool = False
+) -> None:
+    """Transfer global figure settings to the worker process."""
+    model_cache.install()
+    instrumentation.install()
+    rendering.install()
+    Figure.fig_dpi = fig_dpi
+    Figure.legend_fontsize = legend_fontsize
+    EdoxabanSimulationExperiment.debug_selections = debug_selections
+
+
+def _run_experiment(
+    experiment_class: Type[SimulationExperiment],
+    runner_kwargs: Dict[str, Any],
+    run_kwargs: Dict[str, Any],
+) -> Tuple[Dict[str, Dict], ExperimentTimings]:
+    """Run a single experiment in the worker process.
+
+    Returns the report entries and timings of the experiment, the experiment
+    results themselves are written to disk by the runner.
+    """
+    with instrumentation.experiment(experiment_class.__name__) as timings:
+        simulator_class = runner_kwargs.pop("simulator_class")
+        result_store_path: Optional[Path] = runner_kwargs.pop("result_store_path", None)
+        if runner_kwargs.pop("cache", False):
+            simulator_class = cached(simulator_class)
+        simulator = simulator_class(model=runner_kwargs.pop("model_path"))
+        runner = ExperimentRunner(
+            experiment_classes=[experiment_class],
+            simulator=simulator,
+            **runner_kwargs,
+        )
+        results = runner.run_experiments(**run_kwargs)
+        if result_store_path is not None:
+            store = ResultStore(result_store_path)
+            for exp_result in results:
+                store.write_experiment(exp_result.experiment)
+
+    report_results = ReportResults()
+    for exp_result in results:
+        report_results.add_experiment_result(exp_result=exp_result)
+    return report_results.data, timings
+
+
+def run_experiments_pool(
+    experiment_classes: List[Type[SimulationExperiment]],
+    n_workers: int,
+    runner_kwargs: Dict[str, Any],
+    run_kwargs: Dict[str, Any],
+) -> Tuple[ReportResults, List[ExperimentTimings]]:
+    """Run experiments on a process pool and collect the report results.
+
+    Report entries and timings are added in the order of `experiment_classes`.
+    """
+    report_results = ReportResults()
+    timings: List[ExperimentTimings] = []
+    with ProcessPoolExecutor(
+        max_workers=min(n_workers, len(experiment_classes)),
+        initializer=_init_experiment_worker,
+        initargs=(
+            Figure.fig_dpi,
+            Figure.legend_fontsize,
+            EdoxabanSimulationExperiment.debug_selections,
+        ),
+    ) as executor:
+        futures = [
+            executor.submit(
+                _run_experiment, experiment_class, dict(runner_kwargs), run_kwargs
+            )
+            for experiment_class in experiment_classes
+        ]
+        for experiment_class, future in zip(experiment_classes, futures):
+            logger.info(f"Collect results: {experiment_class.__name__}")
+            data, experiment_timings = future.result()
+            report_results.data.update(data)
+            timings.append(experiment_timings)
+
+    return report_results, timings
@@ -0,0 +1,317 @@
+"""Superposition engine for dosing regimens.
+
+The edoxaban PBPK model is linear in the dose. The response to an arbitrary
+dosing regimen (doses, dosing times, mixed PO/IV) is therefore the sum of
+time-shifted and scaled unit-dose responses
+
+    y(t) = y0(t) + sum_i D_i * u_route(i)(t - t_i)
+
+with the zero-dose baseline y0 and the unit-dose response u of the route.
+Unit responses are simulated once per route and parameter set on the regimen
+time grid, so regimens over weeks cost roughly a single-dose simulation
+instead of restarting the integrator at every dose.
+
+Outputs which are not linear in the dose (the coagulation effects PT, aPTT
+and Xa_inhibition) are calculated from the superposed venous edoxaban
+concentration by evaluating the assignment rules of the simulated model
+(see `model_coagulation`), so that the effects can not diverge from the
+model.
+Amounts in urine and feces are cumulative over the complete regimen.
+
+Example:
+
+    simulator = SimulatorLinear(model=MODEL_PATH)
+    engine = RegimenSimulator(
+        simulator=simulator,
+        changes=EdoxabanSimulationExperiment._default_changes(Q_),
+        selections=["time", "[Cve_edo]", "Aurine_edo", "PT"],
+    )
+    regimen = Regimen.multiple(dose=60, interval=24 * 60, n_doses=14)
+    df = engine.simulate(regimen, tend=15 * 24 * 60, steps=15 * 500)
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+from types import CodeType
+from typing import Dict, List, Optional, Tuple
+
+import libsbml
+import numpy as np
+import pandas as pd
+from sbmlsim.simulation import Timecourse, TimecourseSim
+from sbmlsim.simulator.simulation_serial import SimulatorSerial
+from sbmlutils import log
+
+from pkdb_models.models.edoxaban.experiments.metadata import Route
+
+logger = log.get_logger(__name__)
+
+dose_keys: Dict[Route, str] = {
+    Route.PO: "PODOSE_edo",
+    Route.IV: "IVDOSE_edo",
+}
+
+coagulation_outputs = [
+    "PT",
+    "PT_change",
+    "PT_ratio",
+    "aPTT",
+    "aPTT_change",
+    "aPTT_ratio",
+    "Xa_inhibition",
+]
+
+
+
+@dataclass(frozen=True)
+class Dose:
+    """Single edoxaban dose."""
+
+    time: float  # [min]
+    dose: float  # [mg]
+    route: Route = Route.PO
+
+
+@dataclass
+class Regimen:
+    """Dosing regimen consisting of single doses."""
+
+    doses: List[Dose]
+
+    @classmethod
+    def multiple(
+        cls,
+        dose: float,
+        interval: float,
+        n_doses: int,
+        route: Route = Route.PO,
+        start: float = 0.0,
+    ) -> "Regimen":
+        """Regimen of n_doses identical doses [mg] every interval [min]."""
+        return cls(
+            doses=[
+                Dose(time=start + k * interval, dose=dose, route=route)
+                for k in range(n_doses)
+            ]
+        )
+
+    def __add__(self, other: "Regimen") -> "Regimen":
+        return Regimen(doses=sorted(self.doses + other.doses, key=lambda d: d.time))
+
+    @property
+    def routes(self) -> List[Route]:
+        return sorted({d.route for d in self.doses}, key=lambda r: r.value)
+
+
+class CoagulationEffects:
+    """Coagulation effects from the assignment rules of the model.
+
+    The rules of `coagulation_outputs` are functions of the venous edoxaban
+    concentration `Cve_edo` and of parameters (`parameters`), they are
+    evaluated vectorized for arrays of concentrations.
+    """
+
+    # functions of the formula syntax
+    functions = {"exp": np.exp, "ln": np.log, "log10": np.log10, "pow": np.power,
+                 "sqrt": np.sqrt, "abs": np.abs}
+
+    def __init__(self, sbml: str):
+        doc: libsbml.SBMLDocument = libsbml.readSBMLFromString(sbml)
+        model: libsbml.Model = doc.getModel()
+        rules: Dict[str, CodeType] = {}
+        for rule in model.getListOfRules():
+            if rule.isAssignment() and rule.getVariable() in coagulation_outputs:
+                formula = libsbml.formulaToString(rule.getMath()).replace("^", "**")
+                rules[rule.getVariable()] = compile(
+                    formula, filename=rule.getVariable(), mode="eval"
+                )
+
+        self.parameters: List[str] = []
+        for code in rules.values():
+            for sid in code.co_names:
+                if sid in rules or sid in self.functions or sid in self.parameters:
+                    continue
+                if sid == "Cve_edo":
+                    continue
+                if model.getSpecies(sid) is not None:
+                    raise ValueError(
+                        f"Coagulation effect depends on species '{sid}', only "
+                        f"'Cve_edo' is supported."
+                    )
+                self.parameters.append(sid)
+
+        # rules in dependency order
+        self._rules: Dict[str, CodeType] = {}
+        pending = dict(rules)
+        while pending:
+            for sid, code in list(pending.items()):
+                if not set(code.co_names) & set(pending):
+                    self._rules[sid] = code
+                    del pending[sid]
+                    break
+            else:
+                raise ValueError(f"Cyclic coagulation rules: {sorted(pending)}")
+
+    def __call__(
+        self, cve_edo: np.ndarray, parameters: Dict[str, np.ndarray]
+    ) -> Dict[str, np.ndarray]:
+        """Coagulation effects of venous edoxaban [mmol/l]."""
+        namespace = {**self.functions, **parameters, "Cve_edo": cve_edo}
+        effects: Dict[str, np.ndarray] = {}
+        for sid, code in self._rules.items():
+            effects[sid] = namespace[sid] = eval(code, {"__builtins__": {}}, namespace)
+        return effects
+
+
+@lru_cache(maxsize=8)
+def coagulation_effects(sbml: str) -> CoagulationEffects:
+    """Coagulation effects of the model (cached per SBML)."""
+    return CoagulationEffects(sbml)
+
+
+class RegimenSimulator:
+    """Simulates dosing regimens by superposition of unit-dose responses.
+
+    Unit responses are cached per route and time grid; changes (parameters,
+    covariates) are fixed for the lifetime of the engine.
+    """
+
+    # relative tolerance of the dose linearity check
+    linearity_rtol: float = 1e-6
+
+    def __init__(
+        self,
+        simulator: SimulatorSerial,
+        changes: Dict,
+        selections: List[str],
+    ):
+        self.simulator = simulator
+        self.changes = {
+            k: v for k, v in changes.items() if k not in dose_keys.values()
+        }
+        self.selections = list(selections)
+        if "time" not in self.selections:
+            self.selections.insert(0, "time")
+        self._responses: Dict[Tuple, Tuple[pd.DataFrame, pd.DataFrame]] = {}
+        self._parameters: Optional[Dict[str, float]] = None
+
+    def _simulate_dose(
+        self, route: Route, dose: float, tend: float, steps: int
+    ) -> pd.DataFrame:
+        """Single dose simulation on the regimen grid."""
+        Q_ = self.simulator.uinfo.ureg.Quantity
+        tcsim = TimecourseSim(
+            Timecourse(
+                start=0,
+                end=tend,
+                steps=steps,
+                changes={
+                    **self.changes,
+                    dose_keys[route]: Q_(dose, "mg"),
+                },
+            )
+        )
+        tcsim.normalize(uinfo=self.simulator.uinfo)
+        self.simulator.set_timecourse_selections(self.selections)
+        df = self.simulator._timecourses([tcsim])[0]
+        return df.reset_index(drop=True)
+
+    def _effect_parameters(self) -> Dict[str, float]:
+        """Parameters of the coagulation effect model after applying changes."""
+        if self._parameters is None:
+            r = self.simulator.r
+            self._parameters = {
+                pid: r.getValue(pid) for pid in self._effects().parameters
+            }
+        return self._parameters
+
+    def _effects(self) -> CoagulationEffects:
+        return coagulation_effects(self.simulator.r.getSBML())
+
+    def unit_response(
+        self, route: Route, tend: float, steps: int
+    ) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Zero-dose baseline and unit-dose (1 mg) response for route."""
+        key = (route, tend, steps)
+        if key not in self._responses:
+            baseline = self._simulate_dose(route, dose=0.0, tend=tend, steps=steps)
+            unit = self._simulate_dose(route, dose=1.0, tend=tend, steps=steps)
+            double = self._simulate_dose(route, dose=2.0, tend=tend, steps=steps)
+            self._effect_parameters()
+
+            response = unit - baseline
+            response["time"] = unit["time"]
+            linear_columns = self.linear_columns()
+            nonlinear = np.abs(
+                double[linear_columns] - baseline[linear_columns] - 2 * response[linear_columns]
+            ) > self.linearity_rtol * np.abs(double[linear_columns]).max().clip(lower=1e-300)
+            if nonlinear.to_numpy().any():
+                columns = list(nonlinear.columns[nonlinear.any()])
+                raise ValueError(
+                    f"Outputs are not linear in the dose, superposition not "
+                    f"applicable: {columns}"
+                )
+            self._responses[key] = (baseline, response)
+
+        return self._responses[key]
+
+    def linear_columns(self) -> List[str]:
+        """Outputs calculated by superposition."""
+        return [
+            sid for sid in self.selections
+            if sid != "time" and sid not in coagulation_outputs
+        ]
+
+    def simulate(self, regimen: Regimen, tend: float, steps: int) -> pd.DataFrame:
+        """Simulate regimen on the grid [0, tend] with steps intervals.
+
+        Dosing times must lie on the time grid.
+        """
+        dt = tend / steps
+        times = np.linspace(0, tend, num=steps + 1)
+        linear_columns = self.linear_columns()
+
+        Y = None
+        for route in regimen.routes:
+            baseline, response = self.unit_response(route, tend=tend, steps=steps)
+            if Y is None:
+                Y = baseline[linear_columns].to_numpy(copy=True)
+            U = response[linear_columns].to_numpy()
+
+            for dose in regimen.doses:
+                if dose.route != route or dose.dose == 0.0:
+                    continue
+                k = int(round(dose.time / dt))
+                if not np.isclose(k * dt, dose.time) or k > steps:
+                    raise ValueError(
+                        f"Dosing time '{dose.time}' is not on the time grid "
+                        f"(dt={dt}, tend={tend})."
+                    )
+                Y[k:] += dose.dose * U[: steps + 1 - k]
+
+        if Y is None:
+            raise ValueError("Regimen without doses.")
+
+        df = pd.DataFrame(Y, columns=linear_columns)
+        df.insert(0, "time", times)
+
+        coagulation_columns = [sid for sid in self.selections if sid in coagulation_outputs]
+        if coagulation_columns:
+            effects = self._effects()(
+                cve_edo=df["[Cve_edo]"].to_numpy()
+                if "[Cve_edo]" in df.columns
+                else self._venous_edoxaban(regimen, tend=tend, steps=steps),
+                parameters=self._effect_parameters(),
+            )
+            for sid in coagulation_columns:
+                df[sid] = effects[sid]
+
+        return df[self.selections]
+
+    def _venous_edoxaban(self, regimen: Regimen, tend: float, steps: int) -> np.ndarray:
+        """Venous edoxaban for the coagulation effects if not selected."""
+        engine = RegimenSimulator(
+            simulator=self.simulator,
+            changes=self.changes,
+            selections=["time", "[Cve_edo]"],
+        )
+        return engine.simulate(regimen, tend=tend, steps=steps)["[Cve_edo]"].to_numpy()
@@ -0,0 +1,155 @@
+"""Lazy registry of the simulation experiments.
+
+Experiments and groups are registered by class name and module, so that
+listing and validating experiments does not import sbmlsim, matplotlib or
+the study modules. An experiment class is only imported when it is used:
+
+    EXPERIMENTS.names("studies")  # names, no imports
+    EXPERIMENTS["studies"]  # list of experiment classes (imported)
+
+This module must only depend on the standard library.
+"""
+import importlib
+from typing import Callable, Dict, Iterator, List, Mapping, Tuple, Type
+
+EXPERIMENTS_PACKAGE = "pkdb_models.models.edoxaban.experiments"
+
+# experiment class name -> module
+experiment_modules: Dict[str, str] = {
+    "Bathala2012": "studies.bathala2012",
+    "Brown2015": "studies.brown2015",
+    "Chen2017a": "studies.chen2017a",
+    "Chen2017b": "studies.chen2017b",
+    "Lenard2024": "studies.lenard2024",
+    "Lenard2025": "studies.lenard2025",
+    "Liu2022": "studies.liu2022",
+    "Matsushima2013": "studies.matsushima2013",
+    "Mendell2011": "studies.mendell2011",
+    "Mendell2015": "studies.mendell2015",
+    "Mendell2015a": "studies.mendell2015a",
+    "Ogata2010": "studies.ogata2010",
+    "Parasrampuria2016": "studies.parasrampuria2016",
+    "Parasrampuria2016b": "studies.parasrampuria2016b",
+    "Rohr2024": "studies.rohr2024",
+    "DoseDependencyExperiment": "misc.dose_dependency",
+    "EdoxabanParameterScan": "scans.scan_parameters",
+}
+
+groups: Dict[str, List[str]] = {
+    "studies": [
+        "Bathala2012",
+        "Brown2015",
+        "Chen2017a",
+        "Chen2017b",
+        "Lenard2024",
+        "Lenard2025",
+        "Liu2022",
+        "Matsushima2013",
+        "Mendell2011",
+        "Mendell2015",
+        "Mendell2015a",
+        "Ogata2010",
+        "Parasrampuria2016",
+        "Parasrampuria2016b",
+        "Rohr2024",
+    ],
+    "bodyweight": [
+    ],
+    "dose_dependency": [
+        "Brown2015",
+        "Chen2017b",
+        "Ogata2010",
+    ],
+    "iv": [
+        "Matsushima2013",
+    ],
+    "ddi": [
+        "Matsushima2013",
+        "Lenard2024",
+        "Lenard2025",
+        "Mendell2015a",
+    ],
+    "multi": [
+        "Chen2017a",
+        "Ogata2010",
+        "Parasrampuria2016b",
+    ],
+    "food": [
+        "Mendell2011",
+        "Liu2022",
+    ],
+    "hepatic_impairment": [
+        "Mendell2015",
+    ],
+    "renal_impairment": [
+    ],
+    "misc": [
+        "DoseDependencyExperiment",
+    ],
+    "scan": [
+        "EdoxabanParameterScan",
+    ],
+}
+groups["all"] = groups["studies"] + groups["misc"] + groups["scan"]
+
+
+def load_experiment(name: str) -> Type:
+    """Import the experiment class."""
+    module = importlib.import_module(f"{EXPERIMENTS_PACKAGE}.{experiment_modules[name]}")
+    return getattr(module, name)
+
+
+def lazy_experiments(package: str) -> Tuple[List[str], Callable[[str], Type]]:
+    """Names and module `__getattr__` of the experiments of a subpackage.
+
+    Subpackages of the experiments import their experiments on first access:
+
+        __all__, __getattr__ = lazy_experiments(__name__)
+    """
+    prefix = package[len(EXPERIMENTS_PACKAGE) + 1:] + "."
+    names = [
+        name for name, module in experiment_modules.items() if module.startswith(prefix)
+    ]
+
+    def __getattr__(name: str) -> Type:
+        if name not in names:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        return load_experiment(name)
+
+    return names, __getattr__
+
+
+class ExperimentRegistry(Mapping):
+    """Groups of experiments, classes are imported on access."""
+
+    def __getitem__(self, group: str) -> List[Type]:
+        return [load_experiment(name) for name in groups[group]]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(groups)
+
+    def __len__(self) -> int:
+        return len(groups)
+
+    def names(self, group: str) -> List[str]:
+        """Experiment names of the group (without import)."""
+        return list(groups[group])
+
+    def resolve(self, names: List[str]) -> Tuple[List[str], List[str]]:
+        """Resolve group and experiment names to experiment names.
+
+        :return: experiment names, names not found
+        """
+        experiment_names = []
+        not_found = []
+        for name in names:
+            if name in groups:
+                experiment_names.extend(groups[name])
+            elif name in experiment_modules:
+                experiment_names.append(name)
+            else:
+                not_found.append(name)
+        return experiment_names, not_found
+
+
+EXPERIMENTS = ExperimentRegistry()
@@ -0,0 +1,186 @@
+"""Parallel rendering of matplotlib figures.
+
+Serializing the figures (svg and png with high resolution) dominates the
+runtime of the simulation experiments. With an active `FigureRenderer` the
+experiments hand their figures to a pool of worker processes instead of
+saving them: the figures are pickled, closed in the main process and
+rendered concurrently by the workers, while the main process continues
+with the next experiment.
+
+Figures with unchanged inputs are not rendered again (see
+`figure_manifest`).
+
+The workers use the non-interactive `Agg` backend and are started with
+`spawn`, so rendering never touches a display (headless-safe).
+
+    rendering.install()
+    with FigureRenderer(n_workers=4):
+        runner.run_experiments(...)
+    # all figures are written
+"""
+import pickle
+from collections import defaultdict
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sbmlsim.experiment import SimulationExperiment
+from sbmlsim.plot import Figure
+from sbmlutils import log
+
+from pkdb_models.models.edoxaban.figure_manifest import (
+    FigureManifest,
+    experiment_fingerprint,
+    figure_fingerprint,
+)
+
+logger = log.get_logger(__name__)
+
+_renderer: Optional["FigureRenderer"] = None
+
+
+def _init_render_worker() -> None:
+    """Headless matplotlib in the worker process."""
+    import matplotlib
+
+    matplotlib.use("Agg")
+
+
+def _render(fig_pickle: bytes, paths: List[str], dpi: int) -> List[str]:
+    """Save the pickled figure in the given paths (formats from suffix)."""
+    from matplotlib import pyplot as plt
+
+    fig = pickle.loads(fig_pickle)
+    try:
+        for path in paths:
+            fig.savefig(path, dpi=dpi, bbox_inches="tight")
+    finally:
+        plt.close(fig)
+    return paths
+
+
+class FigureRenderer:
+    """Process pool rendering figures in the background."""
+
+    def __init__(self, n_workers: int = 2):
+        self.n_workers = n_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._futures: List[Tuple[Future, List[str], Optional[Callable]]] = []
+
+    def __enter__(self) -> "FigureRenderer":
+        global _renderer
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.n_workers,
+            mp_context=get_context("spawn"),
+            initializer=_init_render_worker,
+        )
+        _renderer = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        global _renderer
+        _renderer = None
+        try:
+            if exc_type is None:
+                self.wait()
+        finally:
+            self._executor.shutdown(wait=True, cancel_futures=exc_type is not None)
+            self._executor = None
+
+    def submit(
+        self, fig, paths: List[Path], dpi: int, on_done: Optional[Callable] = None
+    ) -> bool:
+        """Render figure in the background.
+
+        `on_done` is called in the main process after the figure was written.
+
+        :return: False if the figure can not be pickled (must be saved directly)
+        """
+        try:
+            fig_pickle = pickle.dumps(fig)
+        except Exception as err:
+            logger.warning(f"Figure can not be rendered in background: {err}")
+            return False
+        str_paths = [str(p) for p in paths]
+        future = self._executor.submit(_render, fig_pickle, str_paths, dpi)
+        self._futures.append((future, str_paths, on_done))
+        return True
+
+    def wait(self) -> None:
+        """Wait until all submitted figures are written, re-raises errors."""
+        errors = []
+        for future, paths, on_done in self._futures:
+            try:
+                future.result()
+            except Exception as err:
+                errors.append(err)
+                logger.error(f"Rendering failed: {paths}: {err}")
+                continue
+            if on_done is not None:
+                on_done()
+        self._futures = []
+        if errors:
+            raise errors[0]
+
+
+def active_renderer() -> Optional[FigureRenderer]:
+    """Renderer of the current run, None if figures are saved directly."""
+    return _renderer
+
+
+_save_mpl_figures = SimulationExperiment.save_mpl_figures
+
+
+def _save_mpl_figures_background(
+    self: SimulationExperiment,
+    results_path: Path,
+    mpl_figures: Dict,
+    figure_formats: Optional[List[str]] = None,
+) -> Dict[str, List[Path]]:
+    """Save changed figures, with the active renderer in the background.
+
+    Signature of `SimulationExperiment.save_mpl_figures`.
+    """
+    if not figure_formats:
+        # positional, the parameter names differ between sbmlsim versions
+        return _save_mpl_figures(self, results_path, mpl_figures, figure_formats)
+
+    renderer = active_renderer()
+    manifest = FigureManifest(results_path)
+    experiment_hash = experiment_fingerprint(self)
+    paths: Dict[str, List[Path]] = defaultdict(list)
+    n_skipped = 0
+    for fig_key, fig_mpl in mpl_figures.items():
+        changed: Dict[Path, str] = {}
+        for fig_format in figure_formats:
+            fig_path = results_path / f"{self.sid}_{fig_key}.{fig_format}"
+            paths[fig_format].append(fig_path)
+            fingerprint = figure_fingerprint(experiment_hash, fig_key, fig_format)
+            if manifest.unchanged(fig_path, fingerprint):
+                n_skipped += 1
+            else:
+                manifest.discard(fig_path)
+                changed[fig_path] = fingerprint
+        if not changed:
+            continue
+
+        def on_done(changed=changed) -> None:
+            for fig_path, fingerprint in changed.items():
+                manifest.update(fig_path, fingerprint)
+
+        if renderer is None or not renderer.submit(
+            fig_mpl, paths=list(changed), dpi=Figure.fig_dpi, on_done=on_done
+        ):
+            for fig_path in changed:
+                fig_mpl.savefig(fig_path, dpi=Figure.fig_dpi, bbox_inches="tight")
+            on_done()
+
+    if n_skipped:
+        logger.info(f"{self.sid}: {n_skipped} unchanged figure files skipped")
+    return paths
+
+
+def install() -> None:
+    """Save changed figures of all experiments with the active renderer."""
+    SimulationExperiment.save_mpl_figures = _save_mpl_figures_background
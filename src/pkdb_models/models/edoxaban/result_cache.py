@@ -0,0 +1,244 @@
+"""Persistent cache of simulation results.
+
+Timecourse simulations are cached on disk in `CACHE_PATH_SIMULATIONS`,
+keyed by a hash of
+
+* the content of the model file,
+* the resolved changes, model changes and time grid of every `Timecourse`,
+* the timecourse selections,
+* the integrator settings and the simulator class,
+* the roadrunner and sbmlsim versions.
+
+Unchanged simulations are loaded from the cache, so that changes to figures
+or post-processing do not require a re-simulation. The cache is limited in
+size, least recently used entries are evicted.
+
+The cache is opt-in (`run_edoxaban --cache`, `cache=True`) so that results
+are only reused on request. Caching is enabled for a simulator class with
+`cached`. Only simulations
+which reset the model are cached, other simulations depend on the state of
+the previous simulation. A cache hit does not simulate, the roadrunner
+state of the simulator is left unchanged and is not the final state of the
+cached timecourse. A following simulation with `reset=False` continues from
+the state before the hit.
+"""
+import hashlib
+import json
+import os
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, List, Optional, Type
+
+import numpy as np
+import pandas as pd
+import roadrunner
+import sbmlsim
+from sbmlsim.simulation import TimecourseSim
+from sbmlsim.simulator.simulation_serial import SimulatorSerial
+from sbmlutils import log
+
+from pkdb_models.models.edoxaban import CACHE_PATH_SIMULATIONS
+from pkdb_models.models.edoxaban.model_cache import sbml_hash
+
+logger = log.get_logger(__name__)
+
+
+class ResultCache:
+    """Size limited on-disk cache of simulation results with LRU eviction.
+
+    The access time of an entry is its modification time, which is updated
+    on every hit.
+    """
+
+    def __init__(
+        self, cache_path: Path = CACHE_PATH_SIMULATIONS, max_size: int = 2 * 1024**3
+    ):
+        self.cache_path = cache_path
+        self.max_size = max_size  # [bytes]
+        self._size: Optional[int] = None
+
+    def _path(self, key: str) -> Path:
+        return self.cache_path / f"{key}.pkl"
+
+    def _entries(self) -> List[Path]:
+        if not self.cache_path.exists():
+            return []
+        return list(self.cache_path.glob("*.pkl"))
+
+    @property
+    def size(self) -> int:
+        """Size of the cache [bytes]."""
+        if self._size is None:
+            self._size = sum(p.stat().st_size for p in self._entries())
+        return self._size
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        """Cached result or None."""
+        path = self._path(key)
+        try:
+            df = pd.read_pickle(path)
+        except FileNotFoundError:
+            return None
+        except Exception as err:
+            logger.warning(f"Corrupt result cache entry '{path}', removed: {err}")
+            path.unlink(missing_ok=True)
+            return None
+        os.utime(path)
+        return df
+
+    def contains(self, key: str) -> bool:
+        """Result is cached."""
+        return self._path(key).exists()
+
+    def put(self, key: str, df: pd.DataFrame) -> None:
+        """Store result, evicts least recently used entries if necessary."""
+        self.cache_path.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+
+        # atomic write, concurrent processes can populate the cache
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_path, suffix=".tmp")
+        os.close(fd)
+        try:
+            pd.to_pickle(df, tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        self._size = self.size + path.stat().st_size
+        if self._size > self.max_size:
+            self.evict()
+
+    def evict(self) -> int:
+        """Remove least recently used entries until the cache fits max_size.
+
+        :return: number of removed entries
+        """
+        entries = []
+        for path in self._entries():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+
+        size = sum(e[1] for e in entries)
+        count = 0
+        for _, entry_size, path in entries:
+            if size <= self.max_size:
+                break
+            path.unlink(missing_ok=True)
+            size -= entry_size
+            count += 1
+        self._size = size
+        if count:
+            logger.info(f"Result cache: {count} entries evicted")
+        return count
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        for path in self._entries():
+            path.unlink(missing_ok=True)
+        self._size = 0
+
+
+def _resolve(value: Any) -> Any:
+    """JSON serializable representation of a change value."""
+    magnitude = getattr(value, "magnitude", value)
+    return {
+        "value": np.asarray(magnitude).tolist(),
+        "units": str(getattr(value, "units", "")),
+    }
+
+
+def simulation_key(context: str, simulation: TimecourseSim) -> str:
+    """Hash of the simulation in the simulator context."""
+    data = {
+        "context": context,
+        "time_offset": simulation.time_offset,
+        "timecourses": [
+            {
+                "start": tc.start,
+                "end": tc.end,
+                "steps": tc.steps,
+                "discard": tc.discard,
+                "changes": {k: _resolve(v) for k, v in sorted(tc.changes.items())},
+                "model_changes": {
+                    k: _resolve(v) for k, v in sorted(tc.model_changes.items())
+                },
+            }
+            for tc in simulation.timecourses
+        ],
+    }
+    return hashlib.sha256(
+        json.dumps(data, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+
+
+class CachedSimulatorMixin:
+    """Loads unchanged timecourse simulations from the result cache."""
+
+    result_cache: ResultCache = ResultCache()
+    simulator_name: str = ""
+
+    def _cache_context(self) -> str:
+        """Model, selections, integrator settings, simulator and versions of the key."""
+        model = getattr(self, "model", None)
+        path = getattr(getattr(model, "source", None), "path", None)
+        if path is not None and Path(path).exists():
+            model_hash = sbml_hash(Path(path))
+        else:
+            model_hash = hashlib.sha256(
+                self.r.getCurrentSBML().encode("utf-8")
+            ).hexdigest()
+
+        integrator = self.r.getIntegrator()
+        settings = {
+            name: str(integrator.getValue(name)) for name in integrator.getSettings()
+        }
+        return json.dumps({
+            "model": model_hash,
+            "selections": list(self.r.timeCourseSelections),
+            "integrator": settings,
+            "simulator": self.simulator_name,
+            "roadrunner": roadrunner.__version__,
+            "sbmlsim": sbmlsim.__version__,
+        }, sort_keys=True)
+
+    def _requires_simulation(self, simulation: TimecourseSim) -> bool:
+        """Cached timecourses are not submitted to the workers of a pool."""
+        return not self.result_cache.contains(
+            simulation_key(self._cache_context(), simulation)
+        )
+
+    def _timecourses(self, simulations: List[TimecourseSim]) -> List[pd.DataFrame]:
+        """Timecourses from the cache, cache hits leave the model state unchanged."""
+        if not all(sim.reset for sim in simulations):
+            return super()._timecourses(simulations)
+
+        context = self._cache_context()
+        keys = [simulation_key(context, sim) for sim in simulations]
+        dfs: List[Optional[pd.DataFrame]] = [self.result_cache.get(key) for key in keys]
+        missing = [k for k, df in enumerate(dfs) if df is None]
+        if missing:
+            for k, df in zip(
+                missing, super()._timecourses([simulations[k] for k in missing])
+            ):
+                dfs[k] = df
+                self.result_cache.put(keys[k], df)
+        logger.debug(
+            f"Result cache: {len(simulations) - len(missing)}/{len(simulations)} hits"
+        )
+        return dfs
+
+
+@lru_cache(maxsize=None)
+def cached(simulator_class: Type[SimulatorSerial]) -> Type[SimulatorSerial]:
+    """Simulator class using the result cache."""
+    return type(
+        f"{simulator_class.__name__}Cached",
+        (CachedSimulatorMixin, simulator_class),
+        {"simulator_name": simulator_class.__name__},
+    )
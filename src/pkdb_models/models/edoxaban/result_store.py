@@ -0,0 +1,104 @@
+"""Columnar, compressed store of simulation results.
+
+The xarray results of all tasks of a run (including scan dimensions) are
+written to a single Zarr store (`results.zarr` in the output directory).
+Every task is a group `<experiment>/<task>` with one compressed array per
+selection. Arrays are chunked per scan point, so that single selections and
+scan points can be read without loading the complete results:
+
+    store = ResultStore(output_path / "results.zarr")
+    store.tasks()
+    ds = store.read(
+        "EdoxabanParameterScan/task_scan_po_renal_scan",
+        selections=["time", "[Cve_edo]"],
+        scan_index={"dim_scan": [0, 5]},
+    )
+
+Units of the selections are stored as attributes (`units`).
+Requires the optional dependency `zarr` (`pip install edoxaban-model[store]`).
+"""
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Union
+
+import xarray as xr
+from sbmlsim.experiment import SimulationExperiment
+from sbmlsim.result import XResult
+from sbmlutils import log
+
+logger = log.get_logger(__name__)
+
+# dimension of the time points
+TIME_DIM = "_time"
+
+
+def _zarr():
+    try:
+        import zarr
+    except ImportError as err:
+        raise ImportError(
+            "The result store requires 'zarr', install with "
+            "'pip install edoxaban-model[store]'."
+        ) from err
+    return zarr
+
+
+class ResultStore:
+    """Zarr store with the results of one run."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+
+    def create(self) -> None:
+        """Create empty store, existing results of the run are removed."""
+        _zarr().open_group(str(self.path), mode="w")
+
+    def write(self, key: str, xres: XResult) -> None:
+        """Write xarray result of a task as group `key`."""
+        xds: xr.Dataset = xres.xds.copy()
+        encoding = {}
+        for sid in xds.data_vars:
+            try:
+                xds[sid].attrs["units"] = str(xres.uinfo[sid])
+            except KeyError:
+                xds[sid].attrs["units"] = ""
+            # chunk per scan point, complete time course per chunk
+            encoding[sid] = {
+                "chunks": tuple(
+                    size if dim == TIME_DIM else 1
+                    for dim, size in zip(xds[sid].dims, xds[sid].shape)
+                )
+            }
+        xds.to_zarr(str(self.path), group=key, mode="w", encoding=encoding)
+
+    def write_experiment(self, experiment: SimulationExperiment) -> None:
+        """Write results of all tasks of the experiment."""
+        for task_key, xres in experiment.results.items():
+            self.write(f"{experiment.sid}/{task_key}", xres)
+        logger.info(f"Results stored: '{experiment.sid}' -> '{self.path}'")
+
+    def tasks(self) -> List[str]:
+        """Keys `<experiment>/<task>` of all stored tasks."""
+        root = _zarr().open_group(str(self.path), mode="r")
+        return sorted(
+            f"{experiment}/{task}"
+            for experiment, group in root.groups()
+            for task in group.group_keys()
+        )
+
+    def read(
+        self,
+        key: str,
+        selections: Optional[Sequence[str]] = None,
+        scan_index: Optional[Dict[str, Union[int, slice, Sequence[int]]]] = None,
+    ) -> xr.Dataset:
+        """Read selections and scan points of a task.
+
+        Only the chunks of the requested selections and scan points are read.
+        """
+        _zarr()
+        ds = xr.open_zarr(str(self.path), group=key, chunks=None)
+        if selections is not None:
+            ds = ds[list(selections)]
+        if scan_index:
+            ds = ds.isel(scan_index)
+        return ds.load()
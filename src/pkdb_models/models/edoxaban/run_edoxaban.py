@@ -7,15 +7,29 @@ from enum import Enum
 import optparse
 from pathlib import Path
 from pkdb_models.models.edoxaban import EDOXABAN_PATH
-from pkdb_models.models.edoxaban.simulations import run_simulation_experiments, EXPERIMENTS
+from pkdb_models.models.edoxaban.options import Backend, SolverProfile
+from pkdb_models.models.edoxaban.registry import EXPERIMENTS, load_experiment
 from sbmlutils.console import console
 
+# The simulation stack (sbmlsim, matplotlib, experiments) is imported in the
+# actions, so that listing experiments and validating arguments is fast.
+
 FACTORY_SCRIPT_PATH = EDOXABAN_PATH / "models" / "factory.py"
 
 class Action(str, Enum):
     # simulations
     SIMULATE = "simulate"
     LIST_EXPERIMENTS = "list_experiments"
+    # solver profiles
+    REFERENCE = "reference"
+    VALIDATE = "validate"
+    # reduced model
+    COMPARE_QSS = "compare_qss"
+    # simulation server
+    SERVE = "serve"
+    # benchmarks
+    BENCHMARK = "benchmark"
+    BENCHMARK_BASELINE = "benchmark_baseline"
     # factory
     FACTORY = "factory"
     # run all
@@ -60,10 +74,10 @@ def _list_available_experiments():
     console.print("\n[bold]Or these individual experiment names:[/bold]")
 
     for group_name in ["studies", "misc", "scan"]:
-        if group_name in EXPERIMENTS and EXPERIMENTS[group_name]:
+        if group_name in EXPERIMENTS and EXPERIMENTS.names(group_name):
             console.print(f"\n[yellow]{group_name}:[/yellow]")
-            for exp in EXPERIMENTS[group_name]:
-                console.print(f"  {exp.__name__}")
+            for name in EXPERIMENTS.names(group_name):
+                console.print(f"  {name}")
 
     console.print("\n[dim]Use '--experiments' with comma-separated names to run specific experiments.[/dim]")
     console.print('[dim]Example: run_edoxaban --action simulate --experiments "misc,LaCreta2016"[/dim]')
@@ -71,29 +85,9 @@ def _list_available_experiments():
 
 
 def _resolve_experiment_names(experiment_names: list) -> tuple:
-    """Resolve experiment names to experiment classes."""
-    # Build dictionary of all available experiments by name
-    all_available_exp = {}
-    for category, exp_list in EXPERIMENTS.items():
-        if category != "all":
-            for exp in exp_list:
-                all_available_exp[exp.__name__] = exp
-
-    # Validate and collect requested experiments
-    experiment_classes = []
-    not_found = []
-
-    for exp_name in experiment_names:
-        # Check if it's a group name
-        if exp_name in EXPERIMENTS:
-            experiment_classes.extend(EXPERIMENTS[exp_name])
-        # Check if it's an individual experiment
-        elif exp_name in all_available_exp:
-            experiment_classes.append(all_available_exp[exp_name])
-        else:
-            not_found.append(exp_name)
-
-    return experiment_classes, not_found
+    """Resolve experiment and group names to experiment names."""
+    names, not_found = EXPERIMENTS.resolve(experiment_names)
+    return list(dict.fromkeys(names)), not_found
 
 
 def main() -> None:
@@ -114,6 +108,70 @@ def main() -> None:
         help="Comma-separated list of simulation experiments and/or groups (for '--action simulate'). "
              "Use '--action list_experiments' to see all available options.",
     )
+    parser.add_option(
+        "-c", "--cores",
+        dest="cores",
+        default="1",
+        help="Optional: Number of worker processes for the simulations (default: 1)",
+    )
+    parser.add_option(
+        "-b", "--backend",
+        dest="backend",
+        default=Backend.ROADRUNNER.value,
+        help=f"Optional: Simulation backend. Choices: {[b.value for b in Backend]} "
+             f"(default: {Backend.ROADRUNNER.value})",
+    )
+    parser.add_option(
+        "-p", "--profile",
+        dest="profile",
+        default=SolverProfile.REFERENCE.value,
+        help=f"Optional: Solver profile. Choices: {[p.value for p in SolverProfile]} "
+             f"(default: {SolverProfile.REFERENCE.value})",
+    )
+
+    parser.add_option(
+        "--cache",
+        dest="cache",
+        action="store_true",
+        default=False,
+        help="Optional: Load unchanged simulations from the result cache instead of simulating",
+    )
+
+    parser.add_option(
+        "--result-store",
+        dest="result_store",
+        action="store_true",
+        default=False,
+        help="Optional: Write all task results to a compressed Zarr store (results.zarr)",
+    )
+
+    parser.add_option(
+        "--render-workers",
+        dest="render_workers",
+        default="2",
+        help="Optional: Number of processes rendering figures in the background, "
+             "0 renders figures directly (default: 2)",
+    )
+
+    parser.add_option(
+        "--port",
+        dest="port",
+        default="8765",
+        help="Optional: Port of the simulation server on localhost (default: 8765)",
+    )
+    parser.add_option(
+        "--socket",
+        dest="socket",
+        help="Optional: Unix socket of the simulation server (instead of the port)",
+    )
+
+    parser.add_option(
+        "--debug-selections",
+        dest="debug_selections",
+        action="store_true",
+        default=False,
+        help="Optional: Report the selections pruned from every experiment",
+    )
 
     console.rule("[bold cyan]PBPK/PD MODEL[/bold cyan]", style="cyan")
 
@@ -133,6 +191,30 @@ def main() -> None:
     except ValueError:
         _parser_message(f"Invalid action '{options.action}'. Please choose from {[a.value for a in Action]}.")
 
+    try:
+        n_workers = int(options.cores)
+    except ValueError:
+        _parser_message(f"Invalid number of cores '{options.cores}'.")
+    if n_workers < 1:
+        _parser_message("The number of cores must be at least 1.")
+
+    try:
+        render_workers = int(options.render_workers)
+    except ValueError:
+        _parser_message(f"Invalid number of render workers '{options.render_workers}'.")
+    if render_workers < 0:
+        _parser_message("The number of render workers must not be negative.")
+
+    try:
+        backend = Backend(options.backend.lower())
+    except ValueError:
+        _parser_message(f"Invalid backend '{options.backend}'. Please choose from {[b.value for b in Backend]}.")
+
+    try:
+        profile = SolverProfile(options.profile.lower())
+    except ValueError:
+        _parser_message(f"Invalid profile '{options.profile}'. Please choose from {[p.value for p in SolverProfile]}.")
+
     # Setup custom results directory if provided
     if options.results_dir:
         _setup_custom_results_paths(options.results_dir)
@@ -152,14 +234,14 @@ def main() -> None:
         _list_available_experiments()
 
     elif action == Action.SIMULATE:
-        if not options.EXPERIMENTS:
+        if not options.experiments:
             _parser_message("For '--action simulate', the '--experiments' argument is required.")
 
         # Parse experiment names
-        exp_list = [e.strip() for e in options.EXPERIMENTS.split(",")]
+        exp_list = [e.strip() for e in options.experiments.split(",")]
 
-        # Resolve names to experiment classes
-        experiment_classes, not_found = _resolve_experiment_names(exp_list)
+        # Resolve names to experiment names
+        experiment_names, not_found = _resolve_experiment_names(exp_list)
 
         # Report any experiments that weren't found
         if not_found:
@@ -167,23 +249,87 @@ def main() -> None:
             console.print(f"[red]Warning: The following experiments were not found: {', '.join(not_found)}[/red]")
             console.rule(style="red bold")
 
-        if not experiment_classes:
+        if not experiment_names:
             console.rule(style="red bold")
             console.print("[red]Error: No valid experiments to run![/red]")
             console.rule(style="red bold")
             return
 
         # Run the experiments
+        from pkdb_models.models.edoxaban.simulations import run_simulation_experiments
         results_path = _get_current_results_path()
         console.rule("[bold cyan]Running Simulations[/bold cyan]", style="cyan")
-        run_simulation_experiments(experiment_classes=experiment_classes)
+        run_simulation_experiments(
+            experiment_classes=[load_experiment(name) for name in experiment_names],
+            n_workers=n_workers,
+            backend=backend,
+            profile=profile,
+            cache=options.cache,
+            result_store=options.result_store,
+            render_workers=render_workers,
+            debug_selections=options.debug_selections,
+        )
         console.print("[bold green]Simulations finished.[/bold green]")
         console.print(f"[bold green]Results saved to: {results_path / 'simulation'}[/bold green]")
 
+    elif action == Action.REFERENCE:
+        from pkdb_models.models.edoxaban.solver_profiles import create_reference
+        console.rule("[bold cyan]Creating reference runs[/bold cyan]", style="cyan")
+        create_reference(experiment_classes=EXPERIMENTS["studies"])
+
+    elif action == Action.VALIDATE:
+        from pkdb_models.models.edoxaban.solver_profiles import validate_profile
+        console.rule(f"[bold cyan]Validating solver profile '{profile.value}'[/bold cyan]", style="cyan")
+        validate_profile(
+            profile=profile, experiment_classes=EXPERIMENTS["studies"], backend=backend
+        )
+
+    elif action == Action.COMPARE_QSS:
+        from pkdb_models.models.edoxaban.model_variants import compare_qss_model
+        console.rule("[bold cyan]Comparing reduced and full model[/bold cyan]", style="cyan")
+        compare_qss_model(
+            experiment_classes=EXPERIMENTS["studies"], profile=profile, backend=backend
+        )
+
+    elif action == Action.SERVE:
+        from pkdb_models.models.edoxaban.server import serve
+        try:
+            port = int(options.port)
+        except ValueError:
+            _parser_message(f"Invalid port '{options.port}'.")
+        console.rule("[bold cyan]Simulation server[/bold cyan]", style="cyan")
+        serve(
+            port=port,
+            socket_path=Path(options.socket) if options.socket else None,
+            n_workers=n_workers,
+            backend=backend,
+            profile=profile,
+        )
+
+    elif action == Action.BENCHMARK_BASELINE:
+        from pkdb_models.models.edoxaban.benchmarks import create_baseline
+        console.rule("[bold cyan]Creating benchmark baseline[/bold cyan]", style="cyan")
+        create_baseline()
+
+    elif action == Action.BENCHMARK:
+        from pkdb_models.models.edoxaban.benchmarks import compare_baseline
+        console.rule("[bold cyan]Running benchmarks[/bold cyan]", style="cyan")
+        compare_baseline()
+
     elif action == Action.ALL:
         console.rule("[bold cyan]Running: Factory and all simulations.[/bold cyan]", style="cyan")
         _run_factory()
-        run_simulation_experiments(selected="all")
+        from pkdb_models.models.edoxaban.simulations import run_simulation_experiments
+        run_simulation_experiments(
+            selected="all",
+            n_workers=n_workers,
+            backend=backend,
+            profile=profile,
+            cache=options.cache,
+            result_store=options.result_store,
+            render_workers=render_workers,
+            debug_selections=options.debug_selections,
+        )
         console.print("\n[bold green]All scripts completed successfully![/bold green]")
 
     console.rule(style="white")
@@ -212,7 +358,57 @@ if __name__ == "__main__":
        Run all experiments:
        $ run_edoxaban --action simulate --experiments all
 
-    5. Run Everything:
+       Run all experiments on 8 worker processes:
+       $ run_edoxaban --action simulate --experiments all --cores 8
+
+       Run the parameter scan with the matrix-exponential backend:
+       $ run_edoxaban --action simulate --experiments scan --backend linear
+
+       Run the parameter scan with all scan points integrated together:
+       $ run_edoxaban --action simulate --experiments scan --backend batch
+
+    4. Solver profiles:
+       Store reference runs of all studies:
+       $ run_edoxaban --action reference
+
+       Validate a solver profile against the reference runs:
+       $ run_edoxaban --action validate --profile production
+
+       Run simulations with a solver profile:
+       $ run_edoxaban --action simulate --experiments all --profile preview
+
+       Load unchanged simulations from the result cache:
+       $ run_edoxaban --action simulate --experiments all --cache
+
+       Store all task results in a compressed Zarr store:
+       $ run_edoxaban --action simulate --experiments scan --result-store
+
+       Render figures with 4 background processes:
+       $ run_edoxaban --action simulate --experiments all --render-workers 4
+
+       Report the selections pruned from the experiments:
+       $ run_edoxaban --action simulate --experiments all --debug-selections
+
+    5. Reduced model:
+       Compare the quasi-steady-state model with the full model on all studies:
+       $ run_edoxaban --action compare_qss
+
+    6. Simulation server:
+       Serve dosing questions with 4 warm simulators on http://127.0.0.1:8765:
+       $ run_edoxaban --action serve --cores 4 --backend linear
+       $ curl -X POST localhost:8765/simulate -d '{"dose": 60, "n_doses": 7, "BW": 60}'
+
+       Serve on a Unix socket:
+       $ run_edoxaban --action serve --socket /tmp/edoxaban.sock
+
+    7. Benchmarks:
+       Store benchmark baseline of the pipeline:
+       $ run_edoxaban --action benchmark_baseline
+
+       Compare benchmarks against the baseline:
+       $ run_edoxaban --action benchmark
+
+    8. Run Everything:
        Runs factory and all simulations.
        $ run_edoxaban --action all
        
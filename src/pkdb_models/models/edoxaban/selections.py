@@ -0,0 +1,86 @@
+"""Minimal selections of simulation experiments.
+
+Only selections which are used by an experiment are requested from the
+simulator. The used selections are derived from the source code of the
+experiment class (and its base classes up to the common base class):
+every string literal which is a candidate selection is used, e.g. in
+`figures()`, `figures_mpl()`, `fit_mappings()` or class attributes. F-strings
+with a literal prefix (f"[Cve_{substance}]") use all candidates with the
+prefix. Calls of the PK/PD post-processing add the selections required by
+`calculate_edoxaban_pk`/`calculate_edoxaban_pd`.
+
+If the source code is not available, all candidates are used.
+"""
+import ast
+import inspect
+import textwrap
+from functools import lru_cache
+from typing import List, Optional, Set, Tuple
+
+from sbmlutils import log
+from sbmlutils.console import console
+
+from pkdb_models.models.edoxaban.edoxaban_pk import pd_selections, pk_selections
+
+logger = log.get_logger(__name__)
+
+
+def _source_selections(
+    cls: type, candidates: Tuple[str, ...]
+) -> Optional[Set[str]]:
+    """Candidate selections used in the source code of the class."""
+    try:
+        source = textwrap.dedent(inspect.getsource(cls))
+    except (OSError, TypeError):
+        return None
+
+    used: Set[str] = set()
+    for node in ast.walk(ast.parse(source)):
+        if isinstance(node, ast.Constant) and isinstance(node.value, str):
+            if node.value in candidates:
+                used.add(node.value)
+        elif isinstance(node, ast.JoinedStr):
+            first = node.values[0] if node.values else None
+            if isinstance(first, ast.Constant) and isinstance(first.value, str):
+                used.update(c for c in candidates if c.startswith(first.value))
+        elif isinstance(node, (ast.Attribute, ast.Name)):
+            name = node.attr if isinstance(node, ast.Attribute) else node.id
+            if name == "calculate_edoxaban_pk":
+                used.update(pk_selections)
+            elif name == "calculate_edoxaban_pd":
+                used.update(pd_selections)
+    return used
+
+
+@lru_cache(maxsize=None)
+def minimal_selections(
+    experiment_class: type, base_class: type, candidates: Tuple[str, ...]
+) -> List[str]:
+    """Candidate selections used by the experiment class (in candidate order)."""
+    used = {"time"}
+    sources = 0
+    for cls in experiment_class.__mro__:
+        if cls is base_class or not issubclass(cls, base_class):
+            break
+        cls_used = _source_selections(cls, candidates)
+        if cls_used is None:
+            # e.g. dynamically created subclasses
+            continue
+        used.update(cls_used)
+        sources += 1
+
+    if sources == 0:
+        logger.warning(
+            f"No source code for '{experiment_class.__name__}', using all selections."
+        )
+        return list(candidates)
+    return [sid for sid in candidates if sid in used]
+
+
+def report_pruned(experiment_sid: str, candidates: Tuple[str, ...], selections: List[str]) -> None:
+    """Report the pruned selections of the experiment."""
+    pruned = [sid for sid in candidates if sid not in selections]
+    console.print(
+        f"[bold]{experiment_sid}[/bold]: {len(selections)}/{len(candidates)} selections, "
+        f"pruned: {', '.join(pruned) if pruned else '-'}"
+    )
@@ -0,0 +1,406 @@
+"""Local simulation server with warm models.
+
+The server keeps the compiled model in a pool of simulator instances and
+answers dosing questions without interpreter start, imports or model
+compilation. Requests are served via HTTP on localhost or a Unix socket:
+
+    run_edoxaban --action serve --port 8765 --cores 4
+
+    POST /simulate  single request (JSON object) or batch (JSON list)
+    GET  /metrics   latency metrics
+    GET  /health
+
+Request (all fields optional):
+
+    {
+        "dose": 60,              # [mg]
+        "route": "po",           # po | iv
+        "BW": 75,                # [kg]
+        "KI__f_renal_function": 1.0,
+        "f_cirrhosis": 0.0,
+        "GU__F_edo_abs": 0.62,
+        "interval": 24,          # [hr] dosing interval of the regimen
+        "n_doses": 1,
+        "doses": [{"time": 0, "dose": 60, "route": "po"}],  # explicit regimen [hr, mg]
+        "tend": 24,              # [hr], default: last dose + 24 hr
+        "dt": 5                  # [min] output step
+    }
+
+The response contains the trajectories (time [hr], plasma concentrations,
+PT, aPTT, Xa_inhibition), PK parameters of edoxaban and the latency of the
+request. Regimens are simulated by superposition of unit-dose responses
+(see `regimen`), the unit responses are cached per covariates, so that
+repeated and batched requests with identical covariates take milliseconds.
+Requests of a batch are grouped by covariates.
+"""
+import json
+import os
+import queue
+import socketserver
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import asdict, dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+from sbmlsim.simulator.simulation_serial import SimulatorSerial
+from sbmlutils import log
+from sbmlutils.console import console
+
+from pkdb_models.models.edoxaban import MODEL_PATH, model_cache
+from pkdb_models.models.edoxaban.backends import Backend, simulator_class
+from pkdb_models.models.edoxaban.experiments.base_experiment import EdoxabanSimulationExperiment
+from pkdb_models.models.edoxaban.experiments.metadata import Route
+from pkdb_models.models.edoxaban.regimen import Dose, Regimen, RegimenSimulator
+from pkdb_models.models.edoxaban.solver_profiles import SolverProfile, get_solver_settings
+
+logger = log.get_logger(__name__)
+
+selections = [
+    "time",
+    "[Cve_edo]",
+    "[Cve_m4]",
+    "[Cve_m6]",
+    "Aurine_edo",
+    "Afeces_edo",
+    "PT",
+    "aPTT",
+    "Xa_inhibition",
+]
+
+covariate_units: Dict[str, str] = {
+    "BW": "kg",
+    "KI__f_renal_function": "dimensionless",
+    "f_cirrhosis": "dimensionless",
+    "GU__F_edo_abs": "dimensionless",
+}
+
+
+def _route(value: Any) -> Route:
+    """Route of a request (case-insensitive)."""
+    if not isinstance(value, str):
+        raise ValueError(f"Invalid route: {value!r}")
+    return Route(value.lower())
+
+
+@dataclass
+class SimulationRequest:
+    """Dosing question."""
+
+    dose: float = 60.0  # [mg]
+    route: Route = Route.PO
+    BW: Optional[float] = None  # [kg]
+    KI__f_renal_function: Optional[float] = None
+    f_cirrhosis: Optional[float] = None
+    GU__F_edo_abs: Optional[float] = None
+    interval: float = 24.0  # [hr]
+    n_doses: int = 1
+    doses: Optional[List[Dose]] = None  # [min, mg]
+    tend: Optional[float] = None  # [hr]
+    dt: float = 5.0  # [min]
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "SimulationRequest":
+        unknown = set(d) - set(cls.__dataclass_fields__)
+        if unknown:
+            raise ValueError(f"Unknown request fields: {sorted(unknown)}")
+        d = dict(d)
+        if "route" in d:
+            d["route"] = _route(d["route"])
+        if d.get("doses") is not None:
+            d["doses"] = [
+                Dose(
+                    time=float(dose["time"]) * 60,
+                    dose=float(dose["dose"]),
+                    route=_route(dose.get("route", "po")),
+                )
+                for dose in d["doses"]
+            ]
+        request = cls(**d)
+        if request.dt <= 0 or request.n_doses < 1:
+            raise ValueError("'dt' must be positive and 'n_doses' at least 1.")
+        return request
+
+    def covariates(self) -> Tuple[Tuple[str, float], ...]:
+        """Covariates which are set (key of the regimen engines)."""
+        return tuple(
+            (key, float(getattr(self, key)))
+            for key in covariate_units
+            if getattr(self, key) is not None
+        )
+
+    def regimen(self) -> Regimen:
+        if self.doses is not None:
+            return Regimen(doses=sorted(self.doses, key=lambda d: d.time))
+        return Regimen.multiple(
+            dose=self.dose,
+            interval=self.interval * 60,
+            n_doses=self.n_doses,
+            route=self.route,
+        )
+
+    def grid(self, regimen: Regimen) -> Tuple[float, int]:
+        """End time [min] and steps of the output grid."""
+        if self.tend is not None:
+            tend = self.tend * 60
+        else:
+            tend = max(d.time for d in regimen.doses) + 24 * 60
+        steps = int(np.ceil(tend / self.dt))
+        return steps * self.dt, steps
+
+
+@dataclass
+class Latency:
+    """Latency of a request [ms]."""
+
+    queue: float = 0.0
+    simulation: float = 0.0
+    total: float = 0.0
+
+
+class Metrics:
+    """Latency metrics of the recent requests."""
+
+    def __init__(self, maxlen: int = 10000):
+        self._lock = threading.Lock()
+        self._latencies: Deque[Latency] = deque(maxlen=maxlen)
+        self.requests = 0
+        self.errors = 0
+        self.started = time.time()
+
+    def add(self, latency: Latency) -> None:
+        with self._lock:
+            self.requests += 1
+            self._latencies.append(latency)
+
+    def add_error(self) -> None:
+        with self._lock:
+            self.errors += 1
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            latencies = list(self._latencies)
+            summary: Dict[str, Any] = {
+                "requests": self.requests,
+                "errors": self.errors,
+                "uptime [s]": time.time() - self.started,
+            }
+        for key in ["queue", "simulation", "total"]:
+            values = np.array([getattr(lat, key) for lat in latencies])
+            if len(values):
+                summary[f"{key} [ms]"] = {
+                    "mean": float(values.mean()),
+                    "p50": float(np.percentile(values, 50)),
+                    "p95": float(np.percentile(values, 95)),
+                    "max": float(values.max()),
+                }
+        return summary
+
+
+def pk_parameters(time: np.ndarray, concentration: np.ndarray) -> Dict[str, float]:
+    """Cmax, tmax and AUC of the concentration curve (time [hr])."""
+    k_max = int(np.argmax(concentration))
+    return {
+        "cmax": float(concentration[k_max]),
+        "tmax": float(time[k_max]),
+        "auc": float(np.sum(np.diff(time) * (concentration[1:] + concentration[:-1]) / 2)),
+    }
+
+
+class WarmSimulator:
+    """Simulator with regimen engines cached per covariates."""
+
+    def __init__(
+        self, simulator: SimulatorSerial, max_engines: int = 64
+    ):
+        self.simulator = simulator
+        self.max_engines = max_engines
+        self._engines: "OrderedDict[Tuple, RegimenSimulator]" = OrderedDict()
+
+    def engine(self, covariates: Tuple[Tuple[str, float], ...]) -> RegimenSimulator:
+        """Regimen engine for the covariates (least recently used are evicted)."""
+        if covariates in self._engines:
+            self._engines.move_to_end(covariates)
+            return self._engines[covariates]
+
+        Q_ = self.simulator.uinfo.ureg.Quantity
+        changes = EdoxabanSimulationExperiment._default_changes(Q_=Q_)
+        for key, value in covariates:
+            changes[key] = Q_(value, covariate_units[key])
+        engine = RegimenSimulator(
+            simulator=self.simulator, changes=changes, selections=selections
+        )
+        self._engines[covariates] = engine
+        if len(self._engines) > self.max_engines:
+            self._engines.popitem(last=False)
+        return engine
+
+    def simulate(self, request: SimulationRequest) -> Dict[str, Any]:
+        regimen = request.regimen()
+        tend, steps = request.grid(regimen)
+        df = self.engine(request.covariates()).simulate(regimen, tend=tend, steps=steps)
+        time_hr = df["time"].to_numpy() / 60
+        uinfo = self.simulator.uinfo
+        return {
+            "time": time_hr.tolist(),
+            "trajectories": {
+                sid: df[sid].to_numpy().tolist() for sid in selections if sid != "time"
+            },
+            "units": {
+                "time": "hr",
+                **{sid: str(uinfo[sid]) for sid in selections if sid != "time"},
+            },
+            "pk": pk_parameters(time_hr, df["[Cve_edo]"].to_numpy()),
+        }
+
+
+class SimulationService:
+    """Pool of warm simulators answering simulation requests."""
+
+    def __init__(
+        self,
+        n_workers: int = 1,
+        backend: Backend = Backend.ROADRUNNER,
+        profile: SolverProfile = SolverProfile.PRODUCTION,
+        model_path: Path = MODEL_PATH,
+    ):
+        model_cache.install()
+        self.metrics = Metrics()
+        self._pool: "queue.Queue[WarmSimulator]" = queue.Queue()
+        simulator_cls = simulator_class(backend)
+        for _ in range(n_workers):
+            simulator = simulator_cls(model=model_path, **get_solver_settings(profile))
+            self._pool.put(WarmSimulator(simulator))
+        logger.info(f"{n_workers} warm simulators ({backend.value}, {profile.value})")
+
+    def handle(self, requests: List[SimulationRequest]) -> List[Dict[str, Any]]:
+        """Simulate a batch of requests.
+
+        Requests are grouped by covariates and run on one warm simulator, so
+        that the unit responses are shared.
+        """
+        t_start = time.perf_counter()
+        warm = self._pool.get()
+        t_queue = time.perf_counter()
+        try:
+            order = sorted(range(len(requests)), key=lambda k: requests[k].covariates())
+            results: List[Optional[Dict[str, Any]]] = [None] * len(requests)
+            t_last = t_queue
+            for k in order:
+                results[k] = warm.simulate(requests[k])
+                t_now = time.perf_counter()
+                latency = Latency(
+                    queue=(t_queue - t_start) * 1000,
+                    simulation=(t_now - t_last) * 1000,
+                    total=(t_now - t_start) * 1000,
+                )
+                t_last = t_now
+                results[k]["latency [ms]"] = asdict(latency)
+                self.metrics.add(latency)
+        finally:
+            self._pool.put(warm)
+        return results
+
+
+class SimulationRequestHandler(BaseHTTPRequestHandler):
+    """JSON API of the simulation service."""
+
+    service: SimulationService
+
+    def _send(self, status: int, data: Any) -> None:
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        if self.path == "/health":
+            self._send(200, {"status": "ok"})
+        elif self.path == "/metrics":
+            self._send(200, self.service.metrics.summary())
+        else:
+            self._send(404, {"error": f"Unknown path '{self.path}'"})
+
+    def do_POST(self) -> None:
+        if self.path != "/simulate":
+            self._send(404, {"error": f"Unknown path '{self.path}'"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            data = json.loads(self.rfile.read(length) or b"{}")
+            batch = isinstance(data, list)
+            requests = [
+                SimulationRequest.from_dict(d) for d in (data if batch else [data])
+            ]
+        except (ValueError, TypeError, KeyError) as err:
+            self.service.metrics.add_error()
+            self._send(400, {"error": str(err)})
+            return
+
+        try:
+            results = self.service.handle(requests)
+        except ValueError as err:
+            # e.g. dosing times not on the time grid
+            self.service.metrics.add_error()
+            self._send(400, {"error": str(err)})
+            return
+        except Exception as err:
+            self.service.metrics.add_error()
+            logger.error(f"Simulation failed: {err}")
+            self._send(500, {"error": str(err)})
+            return
+        self._send(200, results if batch else results[0])
+
+    def log_message(self, format: str, *args) -> None:
+        # client_address of Unix sockets is not a host/port pair
+        logger.debug(format % args)
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """HTTP server on a Unix socket."""
+
+    daemon_threads = True
+
+    def server_bind(self) -> None:
+        socketserver.UnixStreamServer.server_bind(self)
+        self.server_name = "localhost"
+        self.server_port = 0
+
+
+def serve(
+    host: str = "127.0.0.1",
+    port: int = 8765,
+    socket_path: Optional[Path] = None,
+    n_workers: int = 1,
+    backend: Backend = Backend.ROADRUNNER,
+    profile: SolverProfile = SolverProfile.PRODUCTION,
+) -> None:
+    """Run the simulation server until interrupted."""
+    service = SimulationService(n_workers=n_workers, backend=backend, profile=profile)
+    handler = type(
+        "BoundSimulationRequestHandler", (SimulationRequestHandler,), {"service": service}
+    )
+    if socket_path is not None:
+        socket_path = Path(socket_path)
+        if socket_path.exists():
+            os.remove(socket_path)
+        server = ThreadingUnixHTTPServer(str(socket_path), handler)
+        address = f"unix://{socket_path}"
+    else:
+        server = ThreadingHTTPServer((host, port), handler)
+        address = f"http://{host}:{port}"
+
+    console.print(f"Simulation server listening on {address}", style="info")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if socket_path is not None and socket_path.exists():
+            os.remove(socket_path)
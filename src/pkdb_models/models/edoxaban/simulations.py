@@ -2,10 +2,11 @@
 import shutil
 from pathlib import Path
 
+from pkdb_models.models.edoxaban.backends import Backend
+from pkdb_models.models.edoxaban.experiments.base_experiment import EdoxabanSimulationExperiment
 from pkdb_models.models.edoxaban.helpers import run_experiments
-from pkdb_models.models.edoxaban.experiments.studies import *
-from pkdb_models.models.edoxaban.experiments.misc import *
-from pkdb_models.models.edoxaban.experiments.scans.scan_parameters import EdoxabanParameterScan
+from pkdb_models.models.edoxaban.solver_profiles import SolverProfile
+from pkdb_models.models.edoxaban.registry import EXPERIMENTS
 from pkdb_models.models import edoxaban
 from pymetadata.console import console
 from pymetadata import log
@@ -17,71 +18,30 @@ Figure.fig_dpi = 300
 
 logger = log.get_logger(__name__)
 
-EXPERIMENTS = {
-        "studies": [
-            Bathala2012,
-            Brown2015,
-            Chen2017a,
-            Chen2017b,
-            Lenard2024,
-            Lenard2025,
-            Liu2022,
-            Matsushima2013,
-            Mendell2011,
-            Mendell2015,
-            Mendell2015a,
-            Ogata2010,
-            Parasrampuria2016,
-            Parasrampuria2016b,
-            Rohr2024,
-        ],
-        "bodyweight": [
-        ],
-        "dose_dependency": [
-            Brown2015,
-            Chen2017b,
-            Ogata2010,
-        ],
-        "iv": [
-            Matsushima2013,
-        ],
-        "ddi": [
-            Matsushima2013,
-            Lenard2024,
-            Lenard2025,
-            Mendell2015a,
-        ],
-        "multi": [
-            Chen2017a,
-            Ogata2010,
-            Parasrampuria2016b,
-        ],
-        "food": [
-            Mendell2011,
-            Liu2022,
-        ],
-        "hepatic_impairment": [
-            Mendell2015,
-        ],
-        "renal_impairment": [
-        ],
-        "misc": [
-            DoseDependencyExperiment,
-        ],
-        "scan": [
-            EdoxabanParameterScan,
-        ]
-
-}
-EXPERIMENTS["all"] = EXPERIMENTS["studies"] + EXPERIMENTS["misc"] + EXPERIMENTS["scan"]
-
 
 def run_simulation_experiments(
     selected: str = None,
     experiment_classes: list = None,
-    output_dir: Path = None
+    output_dir: Path = None,
+    n_workers: int = 1,
+    backend: Backend = Backend.ROADRUNNER,
+    profile: SolverProfile = SolverProfile.REFERENCE,
+    cache: bool = False,
+    result_store: bool = False,
+    render_workers: int = 2,
+    debug_selections: bool = False,
 ) -> None:
-    """Run edoxaban simulation experiments."""
+    """Run edoxaban simulation experiments.
+
+    :param n_workers: number of worker processes for the experiments
+    :param backend: numerical backend for the simulations
+    :param profile: solver profile (integrator tolerances)
+    :param cache: load unchanged simulations from the result cache
+    :param result_store: write all task results to the compressed result store
+    :param render_workers: number of processes rendering figures (0: no pool)
+    :param debug_selections: report the selections pruned from the experiments
+    """
+    EdoxabanSimulationExperiment.debug_selections = debug_selections
 
     Figure.fig_dpi = 600
     Figure.legend_fontsize = 10
@@ -109,19 +69,37 @@ def run_simulation_experiments(
         return
 
     # Run the experiments
-    run_experiments(experiment_classes=experiments_to_run, output_dir=output_dir)
+    run_experiments(
+        experiment_classes=experiments_to_run,
+        output_dir=output_dir,
+        n_workers=n_workers,
+        backend=backend,
+        profile=profile,
+        cache=cache,
+        result_store=result_store,
+        render_workers=render_workers,
+    )
 
     # Collect figures into one folder
     figures_dir = output_dir / "_figures"
     figures_dir.mkdir(parents=True, exist_ok=True)
+    n_copied = 0
     for f in output_dir.glob("**/*.png"):
         if f.parent == figures_dir:
             continue
+        target = figures_dir / f.name
+        # only changed figures (copy2 keeps the modification time)
+        stat = f.stat()
+        if target.exists():
+            target_stat = target.stat()
+            if (target_stat.st_mtime_ns, target_stat.st_size) == (stat.st_mtime_ns, stat.st_size):
+                continue
         try:
-            shutil.copy2(f, figures_dir / f.name)
+            shutil.copy2(f, target)
+            n_copied += 1
         except Exception as err:
             print(f"file {f.name} in {f.parent} fails, skipping. Error: {err}")
-    console.print(f"Figures copied to: file://{figures_dir}", style="info")
+    console.print(f"{n_copied} changed figures copied to: file://{figures_dir}", style="info")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,281 @@
+"""Named solver profiles with validation against reference runs.
+
+Profiles trade accuracy for speed:
+
+* `reference`: tight tolerances used for the published simulations,
+* `production`: default for routine simulation runs,
+* `fit`: tolerances of the parameter fitting,
+* `preview`: fast, low accuracy runs for interactive work.
+
+Every profile is validated against stored reference runs (`reference`
+profile) of all studies. The validation reports per experiment the maximal
+relative error of all trajectories and of the pharmacokinetic parameters
+(cmax, tmax, auc, final urine amounts, maximal PD effects) together with the
+speedup. The speedup is measured in the same call against the `reference`
+profile, both wall times are the best of `repeats` runs, so that caches
+(e.g. the compiled model cache) are warm for both. Missing reference runs are
+stored on demand from the reference profile runs of the validation.
+
+Usage:
+
+    run_edoxaban --action reference
+    run_edoxaban --action validate --profile production
+"""
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Type
+
+import numpy as np
+import pandas as pd
+from sbmlsim.experiment import ExperimentRunner, SimulationExperiment
+from sbmlutils import log
+from sbmlutils.console import console
+
+from pkdb_models.models.edoxaban import (
+    DATA_PATHS,
+    EDOXABAN_PATH,
+    MODEL_PATH,
+    RESULTS_PATH_REFERENCE,
+)
+from pkdb_models.models.edoxaban import model_cache
+from pkdb_models.models.edoxaban.backends import Backend, simulator_class
+from pkdb_models.models.edoxaban.options import SolverProfile
+
+logger = log.get_logger(__name__)
+
+
+solver_settings: Dict[SolverProfile, Dict[str, float]] = {
+    SolverProfile.REFERENCE: {
+        "absolute_tolerance": 1e-10,
+        "relative_tolerance": 1e-10,
+    },
+    SolverProfile.PRODUCTION: {
+        "absolute_tolerance": 1e-8,
+        "relative_tolerance": 1e-8,
+    },
+    SolverProfile.FIT: {
+        "absolute_tolerance": 1e-6,
+        "relative_tolerance": 1e-6,
+    },
+    SolverProfile.PREVIEW: {
+        "absolute_tolerance": 1e-4,
+        "relative_tolerance": 1e-4,
+    },
+}
+
+# PK parameters of the validation
+pk_substances = {
+    "edo": ("[Cve_edo]", "Aurine_edo"),
+    "m4": ("[Cve_m4]", "Aurine_m4"),
+    "m6": ("[Cve_m6]", "Aurine_m6"),
+}
+# PD outputs of the validation (maximal effect)
+pd_outputs = ["PT", "aPTT", "Xa_inhibition"]
+
+
+def get_solver_settings(profile: SolverProfile) -> Dict[str, float]:
+    """Integrator settings of the profile."""
+    if not isinstance(profile, SolverProfile):
+        raise ValueError(f"Unsupported solver profile: '{profile}'")
+    return dict(solver_settings[profile])
+
+
+def run_experiment(
+    experiment_class: Type[SimulationExperiment],
+    profile: SolverProfile,
+    backend: Backend = Backend.ROADRUNNER,
+    model_path: Optional[Path] = None,
+) -> SimulationExperiment:
+    """Run experiment with profile, figures are not created.
+
+    The `model_path` replaces the model of the experiment if provided.
+
+    :return: experiment with results
+    """
+    model_cache.install()
+    if model_path is not None:
+        experiment_class = type(
+            experiment_class.__name__, (experiment_class,), {"model_path": model_path}
+        )
+    runner = ExperimentRunner(
+        experiment_classes=[experiment_class],
+        simulator=simulator_class(backend)(
+            model=model_path if model_path is not None else MODEL_PATH
+        ),
+        data_path=DATA_PATHS,
+        base_path=EDOXABAN_PATH,
+        **get_solver_settings(profile),
+    )
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        exp_results = runner.run_experiments(
+            output_path=Path(tmp_dir),
+            show_figures=False,
+            save_results=False,
+            figure_formats=[],
+            reduced_selections=True,
+        )
+    return exp_results[0].experiment
+
+
+def simulate_experiments(
+    experiment_classes: List[Type[SimulationExperiment]],
+    profile: SolverProfile,
+    backend: Backend = Backend.ROADRUNNER,
+    model_path: Optional[Path] = None,
+    repeats: int = 1,
+) -> Dict[str, Dict]:
+    """Simulate experiments with profile, figures are not created.
+
+    The `model_path` replaces the model of the experiments if provided.
+
+    :param repeats: number of runs per experiment, the wall time is the best run
+    :return: trajectories per experiment {f"{task}|{sid}": values} and wall time
+    """
+    results = {}
+    for experiment_class in experiment_classes:
+        durations = []
+        for _ in range(repeats):
+            t_start = time.perf_counter()
+            experiment = run_experiment(
+                experiment_class, profile=profile, backend=backend, model_path=model_path
+            )
+            durations.append(time.perf_counter() - t_start)
+
+        trajectories: Dict[str, np.ndarray] = {}
+        for task_key, xres in experiment.results.items():
+            for sid in xres.xds.data_vars:
+                trajectories[f"{task_key}|{sid}"] = np.asarray(xres[sid].values)
+
+        results[experiment_class.__name__] = {
+            "trajectories": trajectories,
+            "time": min(durations),
+        }
+    return results
+
+
+def pk_parameters(trajectories: Dict[str, np.ndarray]) -> Dict[str, float]:
+    """Pharmacokinetic and pharmacodynamic parameters of all tasks."""
+    pk = {}
+    tasks = sorted({key.split("|")[0] for key in trajectories})
+    for task in tasks:
+        time_key = f"{task}|time"
+        if time_key not in trajectories:
+            continue
+        t = trajectories[time_key]
+        for substance, (conc_key, urine_key) in pk_substances.items():
+            c = trajectories.get(f"{task}|{conc_key}")
+            if c is not None:
+                t_c = np.broadcast_to(
+                    t.reshape(t.shape + (1,) * (c.ndim - t.ndim)), c.shape
+                )
+                k_max = np.argmax(c, axis=0)
+                pk[f"{task}|{substance}|cmax"] = np.max(c, axis=0)
+                pk[f"{task}|{substance}|tmax"] = np.take_along_axis(
+                    t_c, np.expand_dims(k_max, axis=0), axis=0
+                )[0]
+                pk[f"{task}|{substance}|auc"] = np.trapezoid(c, x=t_c, axis=0)
+            aurine = trajectories.get(f"{task}|{urine_key}")
+            if aurine is not None:
+                pk[f"{task}|{substance}|aurine"] = aurine[-1]
+        for sid in pd_outputs:
+            effect = trajectories.get(f"{task}|{sid}")
+            if effect is not None:
+                pk[f"{task}|{sid}|emax"] = np.max(effect, axis=0)
+    return pk
+
+
+def max_relative_error(
+    values: Dict[str, np.ndarray], reference: Dict[str, np.ndarray], atol: float
+) -> float:
+    """Maximal error of values relative to the range of the reference."""
+    error = 0.0
+    for key, ref in reference.items():
+        value = values.get(key)
+        if value is None or np.shape(value) != np.shape(ref):
+            return np.inf
+        ref = np.asarray(ref, dtype=float)
+        scale = max(np.nanmax(np.abs(ref)) if ref.size else 0.0, atol)
+        error = max(error, float(np.nanmax(np.abs(np.asarray(value) - ref)) / scale))
+    return error
+
+
+def create_reference(
+    experiment_classes: List[Type[SimulationExperiment]],
+    reference_path: Path = RESULTS_PATH_REFERENCE,
+) -> None:
+    """Store reference runs (reference profile) of the experiments."""
+    reference_path.mkdir(parents=True, exist_ok=True)
+    results = simulate_experiments(
+        experiment_classes=experiment_classes, profile=SolverProfile.REFERENCE
+    )
+    for sid, result in results.items():
+        _store_reference(reference_path / f"{sid}.npz", result["trajectories"])
+        console.print(f"Reference run stored: {sid} ({result['time']:.2f} s)")
+
+
+def _store_reference(path: Path, trajectories: Dict[str, np.ndarray]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez_compressed(path, **trajectories)
+
+
+def validate_profile(
+    profile: SolverProfile,
+    experiment_classes: List[Type[SimulationExperiment]],
+    reference_path: Path = RESULTS_PATH_REFERENCE,
+    backend: Backend = Backend.ROADRUNNER,
+    atol: float = 1e-12,
+    repeats: int = 3,
+) -> pd.DataFrame:
+    """Validate profile against stored reference runs.
+
+    The reference profile (roadrunner) and the profile are timed in this
+    call with the best of `repeats` runs each.
+
+    :return: DataFrame with max trajectory/PK errors and speedup per experiment
+    """
+    references = simulate_experiments(
+        experiment_classes=experiment_classes,
+        profile=SolverProfile.REFERENCE,
+        repeats=repeats,
+    )
+    results = simulate_experiments(
+        experiment_classes=experiment_classes,
+        profile=profile,
+        backend=backend,
+        repeats=repeats,
+    )
+    rows = []
+    for sid, result in results.items():
+        path = reference_path / f"{sid}.npz"
+        if not path.exists():
+            console.print(f"No reference run for '{sid}', storing reference run: {path}")
+            _store_reference(path, references[sid]["trajectories"])
+        with np.load(path) as data:
+            reference = {k: data[k] for k in data.files if k != "__time__"}
+        time_reference = references[sid]["time"]
+
+        rows.append({
+            "experiment": sid,
+            "profile": profile.value,
+            "trajectory_error": max_relative_error(
+                result["trajectories"], reference, atol=atol
+            ),
+            "pk_error": max_relative_error(
+                pk_parameters(result["trajectories"]), pk_parameters(reference), atol=atol
+            ),
+            "time_reference": time_reference,
+            "time": result["time"],
+            "speedup": time_reference / result["time"],
+        })
+
+    df = pd.DataFrame(rows)
+    total = df[["time_reference", "time"]].sum()
+    console.rule(f"Validation of solver profile '{profile.value}'", style="white")
+    console.print(df.to_string(index=False))
+    console.print(
+        f"max trajectory error: {df.trajectory_error.max():.3e}, "
+        f"max pk error: {df.pk_error.max():.3e}, "
+        f"speedup: {total.time_reference / total.time:.2f}"
+    )
+    return df
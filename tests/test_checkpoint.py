@@ -0,0 +1,44 @@
+"""Run directories of checkpointed fits."""
+import json
+
+import pytest
+
+from pkdb_models.models.edoxaban.fitting.checkpoint import prepare_run_directory
+
+settings = {"name": "EDOXABAN_LSQ_PK", "seed": 1234, "runs": 10}
+
+
+@pytest.fixture
+def run_dir(tmp_path):
+    run_dir = tmp_path / "runs" / "EDOXABAN_LSQ_PK__PK__1234"
+    prepare_run_directory(run_dir, settings=settings, resume=False)
+    checkpoint = run_dir / "PK" / "1234_10" / "run_0.pkl"
+    checkpoint.parent.mkdir(parents=True)
+    checkpoint.write_bytes(b"run")
+    return run_dir
+
+
+def test_new(run_dir):
+    with open(run_dir / "run.json") as f_json:
+        assert json.load(f_json) == settings
+
+
+@pytest.mark.parametrize("resume", [False, True])
+def test_keep_checkpoints(run_dir, resume):
+    if resume:
+        (run_dir / "run.json").unlink()
+    with pytest.raises(FileExistsError):
+        prepare_run_directory(run_dir, settings=settings, resume=resume)
+    assert (run_dir / "PK" / "1234_10" / "run_0.pkl").exists()
+
+
+def test_resume(run_dir):
+    prepare_run_directory(run_dir, settings=settings, resume=True)
+    assert (run_dir / "PK" / "1234_10" / "run_0.pkl").exists()
+    with pytest.raises(ValueError):
+        prepare_run_directory(run_dir, settings={**settings, "runs": 20}, resume=True)
+
+
+def test_overwrite(run_dir):
+    prepare_run_directory(run_dir, settings={**settings, "runs": 20}, resume=False, overwrite=True)
+    assert [p.name for p in run_dir.iterdir()] == ["run.json"]
@@ -0,0 +1,35 @@
+"""Chunked optimization runs of the parallel fitting."""
+import pytest
+
+from pkdb_models.models.edoxaban.fitting import fitting
+from pkdb_models.models.edoxaban.fitting.fitting import FitMethod, _fit_chunk, _run_chunks
+
+
+@pytest.mark.parametrize("size, n_chunks", [(10, 3), (10, 1), (2, 4)])
+def test_run_chunks(size, n_chunks):
+    chunks = _run_chunks(size, n_chunks, seed=1234)
+    assert len(chunks) == min(size, n_chunks)
+    assert sum(chunk_size for chunk_size, _ in chunks) == size
+    assert len({chunk_seed for _, chunk_seed in chunks}) == len(chunks)
+    assert chunks == _run_chunks(size, n_chunks, seed=1234)
+    assert chunks != _run_chunks(size, n_chunks, seed=1235)
+
+
+@pytest.mark.parametrize("fit_method", list(FitMethod))
+def test_fit_chunk(monkeypatch, fit_method):
+    """Every chunk is a serial `run_optimization` with the chunk seed."""
+    calls = []
+
+    def run_optimization(**kwargs):
+        calls.append(kwargs)
+        return "result"
+
+    monkeypatch.setattr(fitting, "run_optimization", run_optimization)
+    for size, seed in _run_chunks(10, 3, seed=1234):
+        assert _fit_chunk(fit_method, "op", size, seed, {"residual": None}) == "result"
+        kwargs = calls[-1]
+        assert kwargs["problem"] == "op"
+        assert (kwargs["size"], kwargs["seed"]) == (size, seed)
+        assert kwargs["serial"] is True
+        assert kwargs["n_cores"] == 1
+        assert kwargs["residual"] is None
@@ -0,0 +1,91 @@
+"""Matrix-exponential backend against the roadrunner integrator (CVODE)."""
+from copy import deepcopy
+
+import numpy as np
+import pytest
+from sbmlsim.simulation import Timecourse, TimecourseSim
+from sbmlsim.simulator.simulation_serial import SimulatorSerial
+
+from pkdb_models.models.edoxaban import MODEL_PATH
+from pkdb_models.models.edoxaban.batch import SimulatorBatch
+from pkdb_models.models.edoxaban.linear import SimulatorLinear
+
+selections = ["time", "[Cve_edo]", "[Cve_m4]", "Aurine_edo", "PT", "aPTT"]
+
+
+def _timecourse(changes) -> TimecourseSim:
+    return TimecourseSim(
+        [Timecourse(start=0, end=24 * 60, steps=240, changes=changes)]
+    )
+
+
+@pytest.fixture(scope="module")
+def reference() -> SimulatorSerial:
+    simulator = SimulatorSerial(
+        model=MODEL_PATH, relative_tolerance=1e-12, absolute_tolerance=1e-14
+    )
+    simulator.set_timecourse_selections(selections)
+    return simulator
+
+
+@pytest.mark.parametrize("simulator_class", [SimulatorLinear, SimulatorBatch])
+@pytest.mark.parametrize(
+    "changes", [{"PODOSE_edo": 60.0}, {"IVDOSE_edo": 30.0}, {"PODOSE_edo": 60.0, "BW": 90.0}]
+)
+def test_timecourse(reference, simulator_class, changes):
+    simulator = simulator_class(model=MODEL_PATH)
+    simulator.set_timecourse_selections(selections)
+
+    df_ref = reference._timecourses([_timecourse(changes)])[0]
+    df = simulator._timecourses([_timecourse(changes)])[0]
+    assert list(df.columns) == list(df_ref.columns)
+    for sid in selections:
+        np.testing.assert_allclose(
+            df[sid].values, df_ref[sid].values,
+            rtol=1e-6, atol=1e-6 * np.max(np.abs(df_ref[sid].values)),
+        )
+
+
+@pytest.mark.parametrize("simulator_class", [SimulatorLinear, SimulatorBatch])
+@pytest.mark.parametrize(
+    "points",
+    [
+        [{"PODOSE_edo": dose} for dose in [15.0, 60.0, 90.0]],
+        [{"PODOSE_edo": 60.0, "BW": bw} for bw in [50.0, 75.0, 100.0]],
+    ],
+)
+def test_scan(reference, simulator_class, points):
+    simulator = simulator_class(model=MODEL_PATH)
+    simulator.set_timecourse_selections(selections)
+
+    simulations = [_timecourse(changes) for changes in points]
+    for df, df_ref in zip(
+        simulator._timecourses(simulations), reference._timecourses(simulations)
+    ):
+        for sid in ["[Cve_edo]", "PT"]:
+            np.testing.assert_allclose(
+                df[sid].values, df_ref[sid].values,
+                rtol=1e-6, atol=1e-6 * np.max(np.abs(df_ref[sid].values)),
+            )
+
+
+@pytest.mark.parametrize("simulator_class", [SimulatorLinear, SimulatorBatch])
+def test_discard(reference, simulator_class):
+    simulator = simulator_class(model=MODEL_PATH)
+    simulator.set_timecourse_selections(selections)
+
+    simulation = TimecourseSim([
+        Timecourse(start=0, end=12 * 60, steps=120, changes={"PODOSE_edo": 60.0}, discard=True),
+        Timecourse(start=0, end=24 * 60, steps=240, changes={"PODOSE_edo": 60.0}),
+        Timecourse(start=0, end=24 * 60, steps=240, changes={"PODOSE_edo": 60.0}),
+    ])
+    # two points, so that the batch simulator does not fall back
+    simulations = [simulation, deepcopy(simulation)]
+    for df, df_ref in zip(
+        simulator._timecourses(simulations), reference._timecourses(simulations)
+    ):
+        np.testing.assert_allclose(df["time"].values, df_ref["time"].values)
+        np.testing.assert_allclose(
+            df["[Cve_edo]"].values, df_ref["[Cve_edo]"].values,
+            rtol=1e-6, atol=1e-6 * np.max(np.abs(df_ref["[Cve_edo]"].values)),
+        )
@@ -0,0 +1,33 @@
+"""Memoization of residual evaluations."""
+import numpy as np
+from scipy.optimize import OptimizeResult
+from sbmlsim.fit import FitParameter
+from sbmlsim.fit.result import OptimizationResult
+
+from pkdb_models.models.edoxaban.fitting.memoization import ResidualMemo, cache_statistics
+
+
+def test_quantum():
+    memo = ResidualMemo(namespace="test", quantum=1e-6, store_path=None)
+    xlog = np.array([-1.0, 0.5, 2.0])
+    memo.put(memo.key(xlog), np.ones(3))
+    assert memo.get(memo.key(xlog + 1e-8)) is not None
+    assert memo.get(memo.key(xlog + 1e-5)) is None
+    assert (memo.hits, memo.misses) == (1, 1)
+
+
+def test_cache_statistics(tmp_path):
+    parameters = [FitParameter(pid="k", start_value=1.0, lower_bound=0.1, upper_bound=10)]
+    fits = [
+        OptimizeResult(
+            x=np.array([1.0]), x0=np.array([1.0]), cost=1.0, success=True, duration=1.0,
+            cache_hits=hits, cache_misses=misses, cache_hit_rate=hits / (hits + misses),
+        )
+        for hits, misses in [(1, 3), (3, 3)]
+    ]
+    opt_result = OptimizationResult(parameters=parameters, fits=fits, trajectories=[[], []])
+    # statistics are stored in the json of the fit
+    path = opt_result.to_json(path=tmp_path / "test.json")
+    opt_result = OptimizationResult.from_json(path)
+    assert [fit["cache_hit_rate"] for fit in opt_result.fits] == [0.25, 0.5]
+    assert cache_statistics(opt_result) == {"hits": 4, "misses": 6, "hit_rate": 0.4}
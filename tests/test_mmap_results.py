@@ -0,0 +1,40 @@
+"""Scans streamed into memory maps against in-memory scans."""
+import numpy as np
+from sbmlsim.simulation import Dimension, ScanSim, Timecourse, TimecourseSim
+from sbmlsim.simulator.simulation_serial import SimulatorSerial
+
+from pkdb_models.models.edoxaban import MODEL_PATH
+from pkdb_models.models.edoxaban.mmap_results import run_path, run_scan_memmap
+
+
+def _scan(Q_) -> ScanSim:
+    return ScanSim(
+        simulation=TimecourseSim(
+            [Timecourse(start=0, end=24 * 60, steps=100, changes={})]
+        ),
+        dimensions=[
+            Dimension("dim_bw", changes={"BW": Q_(np.linspace(50, 100, 5), "kg")}),
+            Dimension(
+                "dim_dose", changes={"PODOSE_edo": Q_(np.array([30.0, 60.0, 90.0]), "mg")}
+            ),
+        ],
+    )
+
+
+def test_run_scan_memmap(tmp_path):
+    simulator = SimulatorSerial(model=MODEL_PATH)
+    simulator.set_timecourse_selections(["time", "[Cve_edo]", "PT"])
+
+    xres_ref = simulator.run_scan(_scan(simulator.Q_))
+    xres = run_scan_memmap(
+        simulator, _scan(simulator.Q_), path=tmp_path / "scan", chunk_size=4
+    )
+    assert xres.memmapped
+    for sid in ["[Cve_edo]", "PT"]:
+        assert isinstance(xres.xds[sid].variable._data, np.memmap)
+        assert xres.xds[sid].dims == xres_ref.xds[sid].dims
+        np.testing.assert_array_equal(xres.xds[sid].values, xres_ref.xds[sid].values)
+
+
+def test_run_path(tmp_path):
+    assert run_path(tmp_path) != run_path(tmp_path)
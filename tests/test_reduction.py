@@ -0,0 +1,30 @@
+"""Reduced (quasi-steady-state) model against the full model."""
+import libsbml
+
+from pkdb_models.models.edoxaban import MODEL_PATH, MODEL_PATH_QSS
+from pkdb_models.models.edoxaban.models.reduction import (
+    create_qss_model,
+    fast_exchanges,
+    validate_qss_model,
+)
+
+
+def test_qss_model_is_current(tmp_path):
+    sbml_qss_path = create_qss_model(MODEL_PATH, sbml_qss_path=tmp_path / "qss.xml")
+    assert sbml_qss_path.read_text() == MODEL_PATH_QSS.read_text()
+
+
+def test_qss_model_references():
+    model: libsbml.Model = libsbml.readSBMLFromFile(str(MODEL_PATH_QSS)).getModel()
+    tissue_ids = {exchange.tissue for exchange in fast_exchanges}
+    for reaction in model.getListOfReactions():
+        species = [
+            reference.getSpecies()
+            for reference in list(reaction.getListOfReactants())
+            + list(reaction.getListOfProducts())
+        ]
+        assert not tissue_ids & set(species), reaction.getId()
+
+
+def test_qss_model_matches_full_model():
+    assert validate_qss_model(MODEL_PATH, sbml_qss_path=MODEL_PATH_QSS) < 1e-3
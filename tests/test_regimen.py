@@ -0,0 +1,66 @@
+"""Superposition of dosing regimens against direct multiple-dose simulations."""
+import numpy as np
+import pytest
+from sbmlsim.simulation import Timecourse, TimecourseSim
+from sbmlsim.simulator.simulation_serial import SimulatorSerial
+
+from pkdb_models.models.edoxaban import MODEL_PATH
+from pkdb_models.models.edoxaban.experiments.base_experiment import (
+    EdoxabanSimulationExperiment,
+)
+from pkdb_models.models.edoxaban.linear import SimulatorLinear
+from pkdb_models.models.edoxaban.regimen import Regimen, RegimenSimulator
+
+selections = ["time", "[Cve_edo]", "Aurine_edo", "PT", "aPTT_ratio", "Xa_inhibition"]
+
+# 60 mg once daily for 4 days (multiple dosing of Parasrampuria2016b)
+dose, n_doses, steps_day = 60.0, 4, 480
+
+
+@pytest.fixture(scope="module")
+def reference():
+    """Direct simulation, every dose starts a new timecourse."""
+    simulator = SimulatorSerial(
+        model=MODEL_PATH, relative_tolerance=1e-10, absolute_tolerance=1e-12
+    )
+    simulator.set_timecourse_selections(selections)
+    Q_ = simulator.Q_
+    changes = {
+        **EdoxabanSimulationExperiment._default_changes(Q_=Q_),
+        "BW": Q_(80, "kg"),
+        "PT_ref": Q_(12.0, "s"),
+    }
+    tcs = [Timecourse(
+        start=0, end=24 * 60, steps=steps_day,
+        changes={**changes, "PODOSE_edo": Q_(dose, "mg")},
+    )] + [
+        Timecourse(start=0, end=24 * 60, steps=steps_day,
+                   changes={"PODOSE_edo": Q_(dose, "mg")})
+        for _ in range(n_doses - 1)
+    ]
+    tcsim = TimecourseSim(tcs)
+    tcsim.normalize(uinfo=simulator.uinfo)
+    df = simulator._timecourses([tcsim])[0]
+    return changes, df.drop_duplicates(subset="time").reset_index(drop=True)
+
+
+@pytest.mark.parametrize("simulator_class", [SimulatorSerial, SimulatorLinear])
+def test_regimen(reference, simulator_class):
+    changes, df_ref = reference
+    simulator = simulator_class(
+        model=MODEL_PATH, relative_tolerance=1e-10, absolute_tolerance=1e-12
+    )
+    engine = RegimenSimulator(simulator=simulator, changes=changes, selections=selections)
+    df = engine.simulate(
+        Regimen.multiple(dose=dose, interval=24 * 60, n_doses=n_doses),
+        tend=n_doses * 24 * 60,
+        steps=n_doses * steps_day,
+    )
+    np.testing.assert_allclose(df["time"].values, df_ref["time"].values)
+    # setting PODOSE_edo replaces the dose which is not dissolved after 24 hr
+    # (~2e-4 of the dose) instead of adding to it, superposition adds the doses
+    for sid in selections[1:]:
+        np.testing.assert_allclose(
+            df[sid].values, df_ref[sid].values,
+            rtol=1e-3, atol=1e-6 * np.max(np.abs(df_ref[sid].values)), err_msg=sid,
+        )
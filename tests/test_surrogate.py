@@ -0,0 +1,65 @@
+"""Surrogate-assisted differential evolution against scipy."""
+import numpy as np
+import pytest
+from scipy.optimize import differential_evolution
+
+from pkdb_models.models.edoxaban.fitting.surrogate import (
+    surrogate_differential_evolution,
+)
+
+# one-compartment model with first order absorption (ka [1/hr], ke [1/hr], V [l])
+time = np.array([0.25, 0.5, 1, 1.5, 2, 3, 4, 6, 8, 12, 24])
+bounds_log = [(-3, 2)] * 3
+
+
+def _concentration(ka: float, ke: float, v: float) -> np.ndarray:
+    dose = 100
+    return dose * ka / (v * (ka - ke)) * (np.exp(-ke * time) - np.exp(-ka * time))
+
+
+data = _concentration(ka=0.5, ke=0.05, v=80) * np.exp(
+    0.1 * np.random.default_rng(1).standard_normal(len(time))
+)
+
+
+def _cost(x_log: np.ndarray, data: np.ndarray = data) -> float:
+    with np.errstate(all="ignore"):
+        residuals = (_concentration(*np.power(10, x_log)) - data) / np.max(data)
+    return 0.5 * np.sum(residuals ** 2)
+
+
+@pytest.fixture(scope="module")
+def result_scipy():
+    return differential_evolution(_cost, bounds_log, seed=0)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_surrogate_differential_evolution(result_scipy, seed):
+    result = surrogate_differential_evolution(
+        _cost, bounds_log, max_evaluations=3000, seed=seed
+    )
+    assert result.success
+    assert result.fun == pytest.approx(result_scipy.fun, rel=1e-4)
+    # same cost with less than half of the evaluations (~500 vs ~1500)
+    assert result.nfev < 0.5 * result_scipy.nfev
+
+
+def test_surrogate_differential_evolution_budget():
+    result = surrogate_differential_evolution(
+        _cost, bounds_log, max_evaluations=300, seed=0
+    )
+    assert not result.success
+    assert result.nfev == 300
+
+
+@pytest.mark.parametrize(
+    "parameters, seed",
+    [((1.2, 0.15, 30), 8), ((0.5, 0.05, 80), 1), ((3.0, 0.3, 10), 4)],
+)
+def test_surrogate_differential_evolution_local_minima(parameters, seed):
+    # populations collapsed onto local minima for these seeds
+    data_exact = _concentration(*parameters)
+    result = surrogate_differential_evolution(
+        lambda x: _cost(x, data=data_exact), bounds_log, max_evaluations=3000, seed=seed
+    )
+    assert result.fun < 1e-6